@@ -0,0 +1,162 @@
+"""Micro-batching front end for batch-capable model calls.
+
+Concurrent callers each submit one item. A single worker thread groups the
+queued items into batches of up to ``max_batch_size``, waiting at most
+``max_wait_ms`` after the first item of a batch arrives, runs the model
+once per batch and hands each caller its own result.
+
+Usage:
+
+    batcher = MicroBatcher(lambda texts: model(texts), max_batch_size=16, max_wait_ms=10)
+    result = batcher("one input")                 # blocks until its batch ran
+    futures = [batcher.submit(t) for t in texts]  # or submit many at once
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, List
+
+
+class MicroBatcher:
+    """Group single-item calls into batched calls of ``batch_fn``.
+
+    batch_fn receives a list of items and must return a list of results in
+    the same order. If a batch raises, its items are retried one by one so a
+    single bad input does not fail its neighbours.
+    """
+
+    def __init__(
+        self,
+        batch_fn: Callable[[List[Any]], List[Any]],
+        max_batch_size: int = 16,
+        max_wait_ms: float = 10.0,
+        name: str = "micro-batcher",
+    ):
+        self.batch_fn = batch_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait_ms = max(0.0, float(max_wait_ms))
+        self.name = name
+
+        self._queue = queue.Queue()
+        self._worker = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._reset_stats()
+
+    # --- Public API ---
+
+    def submit(self, item) -> Future:
+        """Queue one item and return a Future for its result."""
+        self._ensure_worker()
+        future = Future()
+        self._queue.put((item, future, time.perf_counter()))
+        return future
+
+    def __call__(self, item):
+        """Submit one item and wait for its result."""
+        return self.submit(item).result()
+
+    def map(self, items) -> List[Any]:
+        """Submit several items at once and wait for all results (in order)."""
+        futures = [self.submit(item) for item in items]
+        return [f.result() for f in futures]
+
+    def stats(self) -> dict:
+        """Batch-fill ratio and queue latency counters since start / reset."""
+        with self._stats_lock:
+            batches = self._batches
+            items = self._items
+            return {
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait_ms,
+                "batches": batches,
+                "items": items,
+                "failed_batches": self._failed_batches,
+                "avg_batch_size": round(items / batches, 3) if batches else 0.0,
+                "batch_fill_ratio": round(items / (batches * self.max_batch_size), 3) if batches else 0.0,
+                "avg_queue_latency_ms": round(self._queue_latency_total / items * 1000, 3) if items else 0.0,
+                "max_queue_latency_ms": round(self._queue_latency_max * 1000, 3),
+                "avg_batch_run_ms": round(self._run_total / batches * 1000, 3) if batches else 0.0,
+                "queue_depth": self._queue.qsize(),
+            }
+
+    def reset_stats(self):
+        with self._stats_lock:
+            self._reset_stats()
+
+    # --- Worker ---
+
+    def _reset_stats(self):
+        self._batches = 0
+        self._items = 0
+        self._failed_batches = 0
+        self._queue_latency_total = 0.0
+        self._queue_latency_max = 0.0
+        self._run_total = 0.0
+
+    def _ensure_worker(self):
+        if self._worker is not None:
+            return
+        with self._start_lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._worker.start()
+
+    def _collect_batch(self):
+        """Block for the first item, then gather more until full or timed out."""
+        batch = [self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait_ms / 1000.0
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                if remaining <= 0:
+                    batch.append(self._queue.get_nowait())
+                else:
+                    batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect_batch()
+            started = time.perf_counter()
+            items = [item for item, _, _ in batch]
+
+            failed = False
+            try:
+                results = list(self.batch_fn(items))
+                if len(results) != len(items):
+                    raise ValueError(f"batch_fn returned {len(results)} results for {len(items)} items")
+                outcomes = [(True, r) for r in results]
+            except Exception as batch_error:
+                failed = True
+                if len(items) == 1:
+                    outcomes = [(False, batch_error)]
+                else:
+                    outcomes = [self._run_single(item) for item in items]
+
+            run_seconds = time.perf_counter() - started
+            for (_, future, _), (ok, value) in zip(batch, outcomes):
+                if ok:
+                    future.set_result(value)
+                else:
+                    future.set_exception(value)
+
+            with self._stats_lock:
+                self._batches += 1
+                self._items += len(batch)
+                self._failed_batches += int(failed)
+                self._run_total += run_seconds
+                for _, _, enqueued in batch:
+                    waited = started - enqueued
+                    self._queue_latency_total += waited
+                    self._queue_latency_max = max(self._queue_latency_max, waited)
+
+    def _run_single(self, item):
+        try:
+            return True, self.batch_fn([item])[0]
+        except Exception as e:
+            return False, e
@@ -0,0 +1,148 @@
+"""Small thread-safe LRU cache with per-entry TTL and hit/miss counters.
+
+Entries expire ``ttl_seconds`` after they were written and the least
+recently used entry is evicted once ``max_size`` is reached. Expiry uses
+wall-clock time so a cache saved with ``save()`` keeps its deadlines when
+it is loaded again after a restart.
+
+Values must be JSON-serializable if the cache is persisted.
+"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+
+def normalize_text(text: str) -> str:
+    """Cache key for free text: lowercased, whitespace collapsed."""
+    return " ".join(str(text).lower().split())
+
+
+class TTLCache:
+    """Bounded LRU cache with TTL, counters and optional JSON persistence."""
+
+    def __init__(self, max_size: int = 10000, ttl_seconds: float = 24 * 3600, path: str = None, save_every: int = 100):
+        self.max_size = max(1, int(max_size))
+        self.ttl_seconds = float(ttl_seconds)
+        self.path = path
+        self.save_every = save_every
+
+        self._data = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self._unsaved = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+        if path:
+            self.load(path)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            expires_at, value = entry
+            if expires_at < time.time():
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, ttl_seconds: float = None):
+        """Store value; ttl_seconds shortens this entry's lifetime (never past the cache TTL)."""
+        ttl = self.ttl_seconds if ttl_seconds is None else min(ttl_seconds, self.ttl_seconds)
+        with self._lock:
+            self._data[key] = (time.time() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+            self._unsaved += 1
+            should_save = self.path and self.save_every and self._unsaved >= self.save_every
+        if should_save:
+            self.save()
+
+    def delete(self, key):
+        """Drop one entry (no-op if absent)."""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def delete_where(self, predicate) -> int:
+        """Drop the entries for which predicate(key, value) is true; returns how many."""
+        with self._lock:
+            keys = [k for k, (_, v) in self._data.items() if predicate(k, v)]
+            for key in keys:
+                del self._data[key]
+            return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+    # --- Persistence ---
+
+    def save(self, path: str = None):
+        """Write live entries to a JSON file (atomically, via a temp file)."""
+        path = path or self.path
+        if not path:
+            return
+        now = time.time()
+        with self._lock:
+            entries = [[k, exp, v] for k, (exp, v) in self._data.items() if exp >= now]
+            self._unsaved = 0
+        tmp_path = None
+        try:
+            # A temp file of our own: other workers may save the same path
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)),
+                                            prefix=f"{os.path.basename(path)}.", suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(entries, f)
+            os.replace(tmp_path, path)
+        except (OSError, TypeError, ValueError):
+            # Persistence is best effort; the in-memory cache keeps working
+            if tmp_path is not None and os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+
+    def load(self, path: str = None):
+        """Load entries saved by save(), skipping expired ones."""
+        path = path or self.path
+        if not path or not os.path.exists(path):
+            return
+        try:
+            with open(path, encoding="utf-8") as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            return
+        now = time.time()
+        with self._lock:
+            for key, expires_at, value in entries:
+                if expires_at >= now:
+                    self._data[key] = (expires_at, value)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
@@ -0,0 +1,281 @@
+"""Binary columnar catalog for the recommender.
+
+``loaded_movies_df.csv`` stores genres as Python list literals, so loading
+it means CSV parsing plus one ``ast.literal_eval`` per movie. This module
+converts it once into ``models/catalog.npz``, a typed columnar artifact:
+
+- numeric columns as fixed-width arrays (int32 ids/years, float64
+  avg_rating, int16 vibe_cluster codes)
+- string columns as one NUL-separated UTF-8 blob plus a null mask (strings
+  containing NUL are rejected)
+- genres as a genre vocabulary, a flat array of genre codes and an
+  offsets array (genres of movie i are ``codes[offsets[i]:offsets[i+1]]``)
+
+Reading it is a handful of array reads and one ``str.split`` per string
+column, with no per-row Python parsing.
+
+Build it from the ``main/`` directory:
+
+    python -m backend.ai.catalog
+"""
+
+import os
+import ast
+import hashlib
+import argparse
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List
+import numpy as np
+import pandas as pd
+
+MODELS_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "models"))
+
+MOVIES_DF_PATH = os.path.join(MODELS_DIR, "loaded_movies_df.csv")
+CATALOG_PATH = os.path.join(MODELS_DIR, "catalog.npz")
+
+# Column name → storage dtype for the numeric columns we know about
+NUMERIC_DTYPES = {
+    "movieId": np.int32,
+    "release_year": np.int32,
+    # float64 like the CSV parse, so ratings shown to users match it exactly
+    "avg_rating": np.float64,
+    "vibe_cluster": np.int16,
+}
+
+# Bumped when the stored layout or dtypes change; older artifacts are rebuilt
+CATALOG_FORMAT = 2
+
+_SEP = "\x00"
+
+
+def _ensure_genres_list(val):
+    """Parse a genres cell (list literal, "A|B" string or list) into a list."""
+    if isinstance(val, list):
+        return val
+    if isinstance(val, str) and val.startswith("[") and "]" in val:
+        try:
+            parsed = ast.literal_eval(val)
+            if isinstance(parsed, list):
+                return parsed
+        except Exception:
+            pass
+    if isinstance(val, str):
+        return val.split("|")
+    return []
+
+
+@dataclass
+class Catalog:
+    """Column arrays for the movie catalog (one entry per movie)."""
+    columns: Dict[str, object] = field(default_factory=dict)
+    column_order: List[str] = field(default_factory=list)
+    genre_vocab: List[str] = field(default_factory=list)
+    genre_offsets: np.ndarray = None
+    genre_codes: np.ndarray = None
+    # (size, mtime_ns) of the CSV the catalog was built from, if known
+    source_stamp: np.ndarray = None
+
+    def __len__(self) -> int:
+        return len(self.genre_offsets) - 1
+
+    def genres_of(self, i: int) -> List[str]:
+        """Genres of movie i as a list of strings."""
+        codes = self.genre_codes[self.genre_offsets[i]:self.genre_offsets[i + 1]]
+        return [self.genre_vocab[c] for c in codes]
+
+    def genre_lists(self) -> List[List[str]]:
+        """Genres of every movie, decoded once."""
+        vocab = np.array(self.genre_vocab, dtype=object)
+        names = vocab[self.genre_codes].tolist()
+        offsets = self.genre_offsets.tolist()
+        return [names[offsets[i]:offsets[i + 1]] for i in range(len(self))]
+
+    def to_frame(self) -> pd.DataFrame:
+        """Rebuild the movies DataFrame (genres as lists, like the CSV loader)."""
+        data = {}
+        for name in self.column_order:
+            data[name] = self.genre_lists() if name == "genres" else self.columns[name]
+        return pd.DataFrame(data)
+
+
+def catalog_from_frame(movies_df: pd.DataFrame) -> Catalog:
+    """Convert a movies DataFrame (genres as lists or literals) into a Catalog."""
+    catalog = Catalog(column_order=list(movies_df.columns))
+
+    if "genres" in movies_df.columns:
+        genre_lists = movies_df["genres"].apply(_ensure_genres_list)
+    else:
+        genre_lists = pd.Series([[] for _ in range(len(movies_df))])
+    vocab = sorted({str(g) for genres in genre_lists for g in genres})
+    code_of = {g: i for i, g in enumerate(vocab)}
+    code_dtype = np.uint8 if len(vocab) <= 256 else np.uint16
+
+    lengths = np.fromiter((len(g) for g in genre_lists), dtype=np.int32, count=len(genre_lists))
+    catalog.genre_vocab = vocab
+    catalog.genre_offsets = np.concatenate([[0], np.cumsum(lengths)]).astype(np.int32)
+    catalog.genre_codes = np.fromiter(
+        (code_of[str(g)] for genres in genre_lists for g in genres),
+        dtype=code_dtype,
+        count=int(lengths.sum()),
+    )
+
+    for name in movies_df.columns:
+        if name == "genres":
+            continue
+        col = movies_df[name]
+        if name in NUMERIC_DTYPES or pd.api.types.is_numeric_dtype(col):
+            dtype = NUMERIC_DTYPES.get(name, np.float32 if pd.api.types.is_float_dtype(col) else np.int64)
+            if np.issubdtype(dtype, np.integer):
+                col = col.fillna(-1)
+            catalog.columns[name] = col.to_numpy(dtype=dtype)
+        else:
+            catalog.columns[name] = [None if pd.isna(v) else str(v) for v in col.tolist()]
+    return catalog
+
+
+def write_catalog(catalog: Catalog, path: str = CATALOG_PATH, **extra):
+    """Write a Catalog to an uncompressed .npz (no pickled objects)."""
+    arrays = {
+        "column_order": np.array(catalog.column_order),
+        "genre_vocab": np.array(catalog.genre_vocab),
+        "genre_offsets": catalog.genre_offsets,
+        "genre_codes": catalog.genre_codes,
+    }
+    for name, values in catalog.columns.items():
+        if isinstance(values, np.ndarray):
+            arrays[f"num:{name}"] = values
+        else:
+            nulls = np.array([v is None for v in values], dtype=bool)
+            strings = ["" if v is None else str(v) for v in values]
+            bad = next((i for i, v in enumerate(strings) if _SEP in v), None)
+            if bad is not None:
+                raise ValueError(f"Column {name!r}, row {bad}: NUL characters cannot be stored in the catalog")
+            blob = _SEP.join(strings).encode("utf-8")
+            arrays[f"str:{name}"] = np.frombuffer(blob, dtype=np.uint8)
+            arrays[f"null:{name}"] = nulls
+    arrays["meta:format"] = np.asarray(CATALOG_FORMAT)
+    for key, value in extra.items():
+        arrays[f"meta:{key}"] = np.asarray(value)
+    with open(path, "wb") as f:
+        np.savez(f, **arrays)
+
+
+def read_catalog(path: str = CATALOG_PATH) -> Catalog:
+    """Read a Catalog written by write_catalog()."""
+    with np.load(path) as data:
+        catalog = Catalog(
+            column_order=data["column_order"].tolist(),
+            genre_vocab=data["genre_vocab"].tolist(),
+            genre_offsets=data["genre_offsets"],
+            genre_codes=data["genre_codes"],
+            source_stamp=data["meta:source_stamp"] if "meta:source_stamp" in data.files else None,
+        )
+        for key in data.files:
+            kind, _, name = key.partition(":")
+            if kind == "num":
+                catalog.columns[name] = data[key]
+            elif kind == "str":
+                values = data[key].tobytes().decode("utf-8").split(_SEP) if len(catalog) else []
+                nulls = data[f"null:{name}"]
+                if nulls.any():
+                    values = [None if n else v for v, n in zip(values, nulls.tolist())]
+                catalog.columns[name] = values
+    return catalog
+
+
+def _source_stamp(csv_path: str):
+    st = os.stat(csv_path)
+    return np.array([st.st_size, st.st_mtime_ns], dtype=np.int64)
+
+
+def build_catalog(csv_path: str = MOVIES_DF_PATH, path: str = CATALOG_PATH) -> Catalog:
+    """Parse the movies CSV once and write the binary catalog next to it."""
+    catalog = catalog_from_frame(pd.read_csv(csv_path))
+    catalog.source_stamp = _source_stamp(csv_path)
+    write_catalog(catalog, path, source_stamp=catalog.source_stamp)
+    return catalog
+
+
+def load_catalog(csv_path: str = MOVIES_DF_PATH, path: str = CATALOG_PATH) -> Catalog:
+    """Load the binary catalog, rebuilding it if the CSV changed since.
+
+    If the CSV is not shipped (e.g. in a slim image) the binary catalog
+    is used as-is.
+    """
+    if os.path.exists(path):
+        if not os.path.exists(csv_path):
+            return read_catalog(path)
+        with np.load(path) as data:
+            stamp = data["meta:source_stamp"] if "meta:source_stamp" in data.files else None
+            fmt = int(data["meta:format"]) if "meta:format" in data.files else 1
+        if fmt == CATALOG_FORMAT and stamp is not None and np.array_equal(stamp, _source_stamp(csv_path)):
+            return read_catalog(path)
+
+    catalog = catalog_from_frame(pd.read_csv(csv_path))
+    catalog.source_stamp = _source_stamp(csv_path)
+    try:
+        write_catalog(catalog, path, source_stamp=catalog.source_stamp)
+    except (OSError, ValueError) as e:
+        # Read-only models dir or unstorable strings: serve from the parsed CSV this time
+        if isinstance(e, ValueError):
+            print("Catalog not written:", e)
+    return catalog
+
+
+# --- Source keys of derived artifacts ---
+#
+# Artifacts computed from the catalog (mood vectors, neighbor and CF
+# indexes) store a key of the inputs they were built from; a cached file
+# whose key differs from the current inputs is rebuilt.
+
+def file_stamp(path: str) -> str:
+    """name:size:mtime of one file ("missing" if it does not exist)."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return "missing"
+    return f"{os.path.basename(path)}:{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def file_digest(path: str) -> str:
+    """sha1 of a file's content ("missing" if it does not exist)."""
+    digest = hashlib.sha1()
+    try:
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+    except OSError:
+        return "missing"
+    return digest.hexdigest()
+
+
+def catalog_stamp(catalog: Catalog, path: str = CATALOG_PATH) -> str:
+    """Identity of a catalog: the CSV it was built from, else the catalog file."""
+    if catalog.source_stamp is not None:
+        return ":".join(str(v) for v in catalog.source_stamp.tolist())
+    return file_stamp(path)
+
+
+def artifact_source_key(**stamps: str) -> str:
+    """Short hash of named input stamps, e.g. ``catalog=..., vectorizer=...``."""
+    parts = "|".join(f"{name}={stamp}" for name, stamp in stamps.items())
+    return hashlib.sha1(parts.encode()).hexdigest()[:16]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert loaded_movies_df.csv into the binary catalog.")
+    parser.add_argument("--input", default=MOVIES_DF_PATH)
+    parser.add_argument("--output", default=CATALOG_PATH)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    catalog = build_catalog(args.input, args.output)
+    print(
+        f"Saved {len(catalog)} movies ({len(catalog.genre_vocab)} genres) to {args.output} "
+        f"in {time.perf_counter() - start:.2f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
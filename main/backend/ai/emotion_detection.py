@@ -6,68 +6,106 @@ This module exposes helpers for the FastAPI backend:
 - detect_mood(text)     → maps free-text input to one of our moods
 - recommend(mood, ...)  → returns a list of recommended movies for a mood
 - surprise_me(mood, ...)→ returns one "surprise" movie using vibe clusters
+                          (pass seed=... for a reproducible pick)
+- detect_mood_batch(texts) → detect_mood for many texts in one forward pass
+- detect_emotions(text) → full {emotion label: score} distribution (cached)
+- similar_movies(i, ...)→ returns the nearest neighbors of one movie
+- warm_up() / engine    → background artifact loading and readiness status
+- engine.reload(version)→ load, smoke-test and atomically swap in an artifact bundle
+
+Importing the module is cheap: artifacts (vectorizer, catalog, neighbor
+index, mood vectors, emotion model) are loaded by the shared ``engine`` on
+first use, or ahead of time by ``warm_up()`` in a background thread.
+They form one ``ArtifactBundle``; each request reads ``engine.bundle`` once
+and uses it throughout, so a reload never mixes two versions in one answer.
 """
 
 import os
-import ast
+import atexit
+import hashlib
+import itertools
 import random
+import re
+import secrets
+import threading
+import time
+import warnings
+from collections import Counter, OrderedDict
+from dataclasses import dataclass, field
+from typing import Optional
 import numpy as np
 import pandas as pd
-from transformers import pipeline
 import joblib
+from scipy import sparse
+from backend.ai.batching import MicroBatcher
+from backend.ai.cache import TTLCache, normalize_text
+from backend.ai.catalog import _ensure_genres_list, artifact_source_key, catalog_stamp, file_digest, load_catalog
+from backend.ai.genre_index import GenreIndex
+from backend.ai.item_cf import RATINGS_PATH, build_from_ratings, group_affinity, load_item_cf_index, ratings_stamp
+from backend.ai.lexicon import LexiconScorer
+from backend.ai.rating_store import RatingAggregates
+from backend.ai.surprise import ClusterPool
+from backend.ai.neighbor_index import (
+    build_neighbor_index,
+    index_source_key,
+    load_neighbor_index,
+    neighbors_of,
+    save_neighbor_index,
+    tfidf_features,
+)
 from personalization.context import build_context
-from personalization.ranker import apply_context_boost
+from personalization.ranker import ContextBoostTable, context_key
 
-# --- Load precomputed artifacts (vectorizer, similarity matrix, movies) ---
+# --- Artifact locations (vectorizer, neighbor index, movies) ---
 
 MODELS_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "models")
 MODELS_DIR = os.path.abspath(MODELS_DIR)
 
 TFIDF_VECTORIZER_PATH = os.path.join(MODELS_DIR, "tfidf_vectorizer.pkl")
-COSINE_SIM_MATRIX_PATH = os.path.join(MODELS_DIR, "cosine_sim_matrix.npy")
+NEIGHBOR_INDEX_PATH = os.path.join(MODELS_DIR, "neighbor_index.npz")
 MOVIES_DF_PATH = os.path.join(MODELS_DIR, "loaded_movies_df.csv")
-
-# Load TF-IDF vectorizer (kept for future use / compatibility)
-tfidf_vectorizer = joblib.load(TFIDF_VECTORIZER_PATH)
-
-# Load cosine similarity matrix
-cosine_sim_matrix = np.load(COSINE_SIM_MATRIX_PATH)
-
-# Load movies with ratings
-movies_df = pd.read_csv(MOVIES_DF_PATH)
-
-# Ensure genres are a proper Python list
-def _ensure_genres_list(val):
-    if isinstance(val, list):
-        return val
-    if isinstance(val, str) and val.startswith("[") and "]" in val:
-        try:
-            parsed = ast.literal_eval(val)
-            if isinstance(parsed, list):
-                return parsed
-        except Exception:
-            pass
-    if isinstance(val, str):
-        return val.split("|")
-    return []
-
-if "genres" in movies_df.columns:
-    movies_df["genres"] = movies_df["genres"].apply(_ensure_genres_list)
-
-# Ensure vibe_cluster column exists and is integer (for KMeans clustering)
-if "vibe_cluster" in movies_df.columns:
-    movies_df["vibe_cluster"] = movies_df["vibe_cluster"].fillna(-1).astype(int)
-else:
-    movies_df["vibe_cluster"] = -1
+CATALOG_PATH = os.path.join(MODELS_DIR, "catalog.npz")
+MOOD_SCORES_PATH = os.path.join(MODELS_DIR, "mood_sim_scores.npz")
+
+EMOTION_MODEL_NAME = "j-hartmann/emotion-english-distilroberta-base"
+
+# Emotion inference backend: "torch" (HuggingFace pipeline) or "onnx"
+# (int8-quantized ONNX Runtime, see backend/ai/onnx_backend.py)
+EMOTION_BACKEND = os.getenv("VYBER_EMOTION_BACKEND", "torch").strip().lower()
+ONNX_INTRA_OP_THREADS = int(os.getenv("VYBER_ONNX_THREADS", "0")) or None
+
+# Micro-batching of emotion inference: concurrent detect_mood() calls are
+# grouped into one padded forward pass of up to BATCH_SIZE texts, waiting at
+# most BATCH_WAIT_MS for a batch to fill.
+EMOTION_BATCH_SIZE = int(os.getenv("VYBER_EMOTION_BATCH_SIZE", "16"))
+EMOTION_BATCH_WAIT_MS = float(os.getenv("VYBER_EMOTION_BATCH_WAIT_MS", "10"))
+
+# Cache of emotion score distributions keyed on normalized text, so repeat
+# queries skip the transformer. Set VYBER_MOOD_CACHE_PATH to persist it.
+MOOD_CACHE_SIZE = int(os.getenv("VYBER_MOOD_CACHE_SIZE", "10000"))
+MOOD_CACHE_TTL_SECONDS = float(os.getenv("VYBER_MOOD_CACHE_TTL", str(24 * 3600)))
+MOOD_CACHE_PATH = os.getenv("VYBER_MOOD_CACHE_PATH") or None
+
+# Cache of ranked catalog indices keyed on (mood, context bucket, top_n,
+# weights). Explanations are rendered per read, so cached results still vary.
+RANKING_CACHE_SIZE = int(os.getenv("VYBER_RANKING_CACHE_SIZE", "2048"))
+RANKING_CACHE_TTL_SECONDS = float(os.getenv("VYBER_RANKING_CACHE_TTL", "3600"))
+
+# Rank on live rating aggregates (offline ratings + /feedback, Bayesian
+# shrunk, see backend/ai/rating_store.py) instead of the static avg_rating
+# column. Set VYBER_LIVE_RATINGS=0 to use the catalog column.
+LIVE_RATINGS = os.getenv("VYBER_LIVE_RATINGS", "1") == "1"
+
+# Tiered detection: texts the keyword lexicon scores at or above this
+# confidence skip the transformer entirely. Set above 1 to disable the tier.
+LEXICON_CONFIDENCE_THRESHOLD = float(os.getenv("VYBER_LEXICON_THRESHOLD", "0.8"))
+
+# Set VYBER_CHECK_MOOD_SCORES=1 to recompute the candidate submatrix mean on
+# every request and compare it with the precomputed mood vector.
+CHECK_MOOD_SCORES = os.getenv("VYBER_CHECK_MOOD_SCORES", "0") == "1"
 
 # --- Emotion model and mapping ---
 
-# Pretrained HuggingFace model for emotion classification
-emotion_pipeline = pipeline(
-    "text-classification",
-    model="j-hartmann/emotion-english-distilroberta-base"
-)
-
 # Map fine-grained emotions → 6 Vyber moods
 emotion_to_mood_map = {
     "joy": "happy",
@@ -105,9 +143,780 @@ mood_to_genres_map = {
     "fantasy": ["Fantasy", "Sci-Fi", "Adventure"]
 }
 
+# Shared generator for unseeded surprise picks
+_surprise_rng = np.random.default_rng()
+
+
+# --- Per-mood similarity helpers ---
+
+def _mood_candidate_indices(genre_index: GenreIndex, mood: str) -> np.ndarray:
+    """Indices of movies that contain at least one of the mood's genres."""
+    candidate_indices = genre_index.indices_for(mood_to_genres_map[mood])
+
+    if len(candidate_indices) == 0:
+        # Fallback: if no movie matches, just take all movies
+        candidate_indices = np.arange(len(genre_index))
+    return candidate_indices
+
+
+def _centroid_sim_scores(features, candidate_indices) -> np.ndarray:
+    """Average similarity of each candidate to all candidates.
+
+    Cosine similarity of unit TF-IDF rows is a dot product, so the mean over
+    the candidate block is each row dotted with the candidates' mean vector.
+    That is O(nnz) instead of O(k²) and needs no similarity matrix at all.
+    """
+    features = features[candidate_indices]
+    centroid = np.asarray(features.mean(axis=0)).ravel()
+    return np.asarray(features @ centroid, dtype=float).ravel()
+
+
+def _submatrix_sim_scores(features, candidate_indices, chunk_size: int = 1024) -> np.ndarray:
+    """Reference path: explicit mean over the candidate × candidate block.
+
+    This is the original per-request computation, with the similarity
+    block rebuilt from TF-IDF rows in chunks instead of read from the dense
+    matrix. Only used to check the precomputed vectors.
+    """
+    candidate_indices = np.asarray(candidate_indices)
+    candidates_t = features[candidate_indices].T.tocsc()
+    scores = np.empty(len(candidate_indices), dtype=float)
+    for start in range(0, len(candidate_indices), chunk_size):
+        rows = candidate_indices[start:start + chunk_size]
+        block = (features[rows] @ candidates_t).toarray()
+        scores[start:start + chunk_size] = block.mean(axis=1)
+    return scores
+
+# --- Versioned artifact bundles ---
+
+# Named bundles live in BUNDLES_DIR/<version>/ with the same file layout as
+# MODELS_DIR (tfidf_vectorizer.pkl, loaded_movies_df.csv / catalog.npz, ...,
+# optionally emotion_onnx/ or a local emotion_model/). engine.reload(version)
+# loads one next to the serving bundle and swaps it in once it passes a smoke
+# query.
+BUNDLES_DIR = os.path.abspath(os.getenv("VYBER_BUNDLES_DIR", os.path.join(MODELS_DIR, "bundles")))
+BUNDLE_VERSION_PATTERN = re.compile(r"^[A-Za-z0-9._-]+$")
+RELOAD_HISTORY_SIZE = int(os.getenv("VYBER_RELOAD_HISTORY", "20"))
+
+_bundle_generations = itertools.count(1)
+
+
+class ArtifactBundle:
+    """One consistent set of recommender artifacts, loaded from one directory.
+
+    Each artifact is loaded on first use, guarded by its own lock, so a
+    request that needs the catalog does not wait behind a background load of
+    the emotion model. Load times and errors are recorded for the readiness
+    endpoint. A bundle is never modified once it serves traffic: reloading
+    builds a new bundle instead.
+    """
+
+    # Artifacts loaded by load_all() / warm_up(), in dependency order
+    WARM_ARTIFACTS = (
+        "tfidf_vectorizer",
+        "catalog",
+        "movies_df",
+        "genre_index",
+        "result_columns",
+        "rating_slots",
+        "context_boosts",
+        "mood_sim_scores",
+        "item_cf_index",
+        "mood_cf_scores",
+        "surprise_pools",
+        "emotion_pipeline",
+    )
+    # Loaded only when needed (e.g. to rebuild a missing cache, or by
+    # similar_movies())
+    LAZY_ARTIFACTS = ("tfidf_matrix", "neighbor_index")
+
+    def __init__(self, models_dir: str = MODELS_DIR, version: str = None, ratings: RatingAggregates = None):
+        self.models_dir = os.path.abspath(models_dir)
+        # Live rating store shared by all bundles (None: static avg_rating)
+        self.ratings = ratings
+        self.name = version or "default"
+        self.fingerprint = _dir_fingerprint(self.models_dir)
+        # Part of every ranking cache key, so rankings of different bundles
+        # never mix even if their versions share a name
+        self.generation = next(_bundle_generations)
+        self.created_at = time.time()
+
+        self.tfidf_vectorizer_path = os.path.join(self.models_dir, "tfidf_vectorizer.pkl")
+        self.neighbor_index_path = os.path.join(self.models_dir, "neighbor_index.npz")
+        self.movies_df_path = os.path.join(self.models_dir, "loaded_movies_df.csv")
+        self.catalog_path = os.path.join(self.models_dir, "catalog.npz")
+        self.mood_scores_path = os.path.join(self.models_dir, "mood_sim_scores.npz")
+        self.item_cf_index_path = os.path.join(self.models_dir, "item_cf_index.npz")
+        # A bundle may ship its own ratings; otherwise data/ratings_cleaned.csv
+        bundle_ratings = os.path.join(self.models_dir, "ratings_cleaned.csv")
+        self.ratings_path = bundle_ratings if os.path.exists(bundle_ratings) else RATINGS_PATH
+
+        self._values = {}
+        self._load_seconds = {}
+        self._errors = {}
+        self._emotion_key = None
+        self._input_stamps = {}
+        self._locks = {
+            name: threading.RLock()
+            for name in self.WARM_ARTIFACTS + self.LAZY_ARTIFACTS
+        }
+
+    @property
+    def version(self) -> str:
+        return f"{self.name}@{self.fingerprint}"
+
+    def _get(self, name: str):
+        if name in self._values:
+            return self._values[name]
+        with self._locks[name]:
+            if name in self._values:
+                return self._values[name]
+            start = time.perf_counter()
+            try:
+                value = getattr(self, f"_load_{name}")()
+            except Exception as e:
+                self._errors[name] = f"{type(e).__name__}: {e}"
+                raise
+            self._load_seconds[name] = time.perf_counter() - start
+            self._errors.pop(name, None)
+            self._values[name] = value
+            return value
+
+    def load_all(self, names=None):
+        """Load the given artifacts (all warm ones by default); raises on the first error."""
+        for name in names or self.WARM_ARTIFACTS:
+            self._get(name)
+
+    def share_from(self, other: "ArtifactBundle"):
+        """Reuse other's emotion model if both bundles use the same one.
+
+        The model is by far the slowest artifact to load and rarely changes
+        between catalog releases.
+        """
+        if other is not None and other.emotion_source() == self.emotion_source() and other.is_loaded("emotion_pipeline"):
+            with self._locks["emotion_pipeline"]:
+                self._values["emotion_pipeline"] = other._values["emotion_pipeline"]
+                self._load_seconds["emotion_pipeline"] = 0.0
+
+    def emotion_source(self) -> tuple:
+        """(backend, model dir or name) the emotion pipeline is loaded from."""
+        if EMOTION_BACKEND == "onnx":
+            return ("onnx", os.path.join(self.models_dir, "emotion_onnx"))
+        local_model = os.path.join(self.models_dir, "emotion_model")
+        return ("torch", local_model if os.path.isdir(local_model) else EMOTION_MODEL_NAME)
+
+    @property
+    def emotion_key(self) -> str:
+        """Short id of the emotion model, prefixed to mood cache keys.
+
+        Covers the source and, for local models, the files' fingerprint, so
+        distributions cached (or persisted) for another model are never served.
+        """
+        if self._emotion_key is None:
+            backend, source = self.emotion_source()
+            fingerprint = _dir_fingerprint(source) if os.path.isdir(source) else ""
+            self._emotion_key = hashlib.sha1(f"{backend}:{source}:{fingerprint}".encode()).hexdigest()[:8]
+        return self._emotion_key
+
+    def _input_stamp(self, name: str) -> str:
+        """Identity of one input of the derived artifacts (computed once per bundle)."""
+        stamp = self._input_stamps.get(name)
+        if stamp is None:
+            if name == "catalog":
+                stamp = catalog_stamp(self.catalog, self.catalog_path)
+            elif name == "vectorizer":
+                stamp = file_digest(self.tfidf_vectorizer_path)
+            elif name == "ratings":
+                stamp = ratings_stamp(self.ratings_path)
+            else:
+                raise ValueError(f"Unknown artifact input: {name!r}")
+            self._input_stamps[name] = stamp
+        return stamp
+
+    def source_key(self, *inputs: str) -> str:
+        """Short hash of the given inputs ("catalog", "vectorizer", "ratings").
+
+        Stored next to each derived artifact (mood vectors, neighbor and CF
+        indexes); a cached file whose key differs is rebuilt.
+        """
+        return artifact_source_key(**{name: self._input_stamp(name) for name in inputs})
+
+    # --- Artifact accessors ---
+
+    @property
+    def tfidf_vectorizer(self):
+        return self._get("tfidf_vectorizer")
+
+    @property
+    def catalog(self):
+        return self._get("catalog")
+
+    @property
+    def movies_df(self) -> pd.DataFrame:
+        return self._get("movies_df")
+
+    @property
+    def genre_index(self) -> GenreIndex:
+        return self._get("genre_index")
+
+    @property
+    def result_columns(self) -> dict:
+        return self._get("result_columns")
+
+    @property
+    def rating_slots(self):
+        return self._get("rating_slots")
+
+    @property
+    def context_boosts(self) -> ContextBoostTable:
+        return self._get("context_boosts")
+
+    @property
+    def tfidf_matrix(self):
+        return self._get("tfidf_matrix")
+
+    @property
+    def neighbor_index(self):
+        return self._get("neighbor_index")
+
+    @property
+    def mood_sim_scores(self) -> dict:
+        return self._get("mood_sim_scores")
+
+    @property
+    def item_cf_index(self):
+        return self._get("item_cf_index")
+
+    @property
+    def mood_cf_scores(self) -> dict:
+        return self._get("mood_cf_scores")
+
+    @property
+    def surprise_pools(self) -> dict:
+        return self._get("surprise_pools")
+
+    @property
+    def emotion_pipeline(self):
+        return self._get("emotion_pipeline")
+
+    # --- Loaders ---
+
+    def _load_tfidf_vectorizer(self):
+        return joblib.load(self.tfidf_vectorizer_path)
+
+    def _load_catalog(self):
+        # Binary columnar catalog, converted from loaded_movies_df.csv on
+        # first run (see backend/ai/catalog.py)
+        return load_catalog(self.movies_df_path, self.catalog_path)
+
+    def _load_movies_df(self):
+        movies_df = self.catalog.to_frame()
+        # Ensure vibe_cluster column exists and is integer (for KMeans clustering)
+        if "vibe_cluster" in movies_df.columns:
+            movies_df["vibe_cluster"] = movies_df["vibe_cluster"].fillna(-1).astype(int)
+        else:
+            movies_df["vibe_cluster"] = -1
+        return movies_df
+
+    def _load_genre_index(self):
+        # N×G multi-hot genres, straight from the catalog's genre codes
+        return GenreIndex.from_catalog(self.catalog)
+
+    def _load_result_columns(self):
+        """Pre-parsed columns gathered by build_results() / recommend()."""
+        movies_df = self.movies_df
+        n_movies = len(movies_df)
+        genre_source = movies_df["genres"] if "genres" in movies_df.columns else [None] * n_movies
+        genres = np.empty(n_movies, dtype=object)
+        for i, val in enumerate(genre_source):
+            genres[i] = [str(g) for g in val if g is not None] if isinstance(val, (list, tuple, set)) else []
+
+        has_avg_rating = "avg_rating" in movies_df.columns
+        return {
+            "title": movies_df["title"].to_numpy(dtype=object),
+            "genres": genres,
+            # float64 (as stored in the catalog), so values match what
+            # float(row["avg_rating"]) returns on the parsed CSV
+            "avg_rating": movies_df["avg_rating"].to_numpy(dtype=float) if has_avg_rating
+            else np.full(n_movies, np.nan),
+            "has_avg_rating": has_avg_rating,
+            "vibe_cluster": movies_df["vibe_cluster"].to_numpy(dtype=np.int64),
+        }
+
+    def _load_rating_slots(self):
+        # Catalog row → live rating store slot (None: rank on avg_rating)
+        movie_ids = self.catalog.columns.get("movieId")
+        if self.ratings is None or movie_ids is None:
+            return None
+        slots = self.ratings.slots_for(movie_ids)
+        slots.setflags(write=False)
+        return slots
+
+    def _load_context_boosts(self):
+        # Per-context boost vectors over the catalog (personalization.ranker)
+        genre_index = self.genre_index
+        return ContextBoostTable(genre_index.vocab, genre_index.matrix).compile_all()
+
+    def _load_tfidf_matrix(self):
+        # L2-normalized TF-IDF rows of the catalog
+        return tfidf_features(self.tfidf_vectorizer, self.movies_df["combined_features"])
+
+    def _load_neighbor_index(self):
+        # Sparse top-K cosine neighbors (replaces the dense cosine_sim_matrix.npy),
+        # rebuilt from TF-IDF if missing or built from another catalog / vectorizer
+        source_key = self.source_key("catalog", "vectorizer")
+        if os.path.exists(self.neighbor_index_path) and index_source_key(self.neighbor_index_path) == source_key:
+            index = load_neighbor_index(self.neighbor_index_path)
+            if index.shape[0] == len(self.movies_df):
+                return index
+
+        index = build_neighbor_index(self.tfidf_matrix)
+        try:
+            save_neighbor_index(index, self.neighbor_index_path, source_key=source_key)
+        except OSError:
+            pass
+        return index
+
+    def _load_mood_sim_scores(self):
+        """Return {mood: (candidate_indices, sim_scores)} for every mood.
+
+        The vectors only depend on the catalog and the mood → genres mapping,
+        so they are computed once (from TF-IDF centroids, not from the top-K
+        neighbor index, whose truncation would change the means) and cached in
+        mood_sim_scores.npz next to the catalog.
+        The cache is rebuilt if the catalog, the vectorizer or a mood's
+        genres change.
+        """
+        movies_df = self.movies_df
+        source_key = self.source_key("catalog", "vectorizer")
+        if os.path.exists(self.mood_scores_path):
+            try:
+                with np.load(self.mood_scores_path) as data:
+                    if str(data["source_key"]) == source_key and int(data["n_movies"]) == len(movies_df) and all(
+                        list(data[f"{mood}_genres"]) == genres
+                        for mood, genres in mood_to_genres_map.items()
+                    ):
+                        return {
+                            mood: (data[f"{mood}_indices"], data[f"{mood}_scores"])
+                            for mood in mood_to_genres_map
+                        }
+            except Exception:
+                pass
+
+        scores = {}
+        arrays = {"source_key": np.array(source_key), "n_movies": np.array(len(movies_df))}
+        for mood, genres in mood_to_genres_map.items():
+            candidate_indices = _mood_candidate_indices(self.genre_index, mood)
+            sim_scores = _centroid_sim_scores(self.tfidf_matrix, candidate_indices)
+            scores[mood] = (candidate_indices, sim_scores)
+            arrays[f"{mood}_genres"] = np.array(genres)
+            arrays[f"{mood}_indices"] = candidate_indices
+            arrays[f"{mood}_scores"] = sim_scores
+
+        try:
+            np.savez(self.mood_scores_path, **arrays)
+        except OSError:
+            # Read-only models dir: keep the in-memory copy only
+            pass
+        return scores
+
+    def _load_item_cf_index(self):
+        # Top-K co-rating neighbors (backend/ai/item_cf.py), rebuilt from the
+        # ratings if missing or built from another catalog / ratings; empty if
+        # there are no ratings to build from
+        n_movies = len(self.movies_df)
+        movie_ids = self.catalog.columns.get("movieId")
+        has_ratings = movie_ids is not None and os.path.exists(self.ratings_path)
+        source_key = self.source_key("catalog", "ratings")
+        if os.path.exists(self.item_cf_index_path):
+            # Without the ratings (e.g. a slim image) a shipped index is used as-is
+            if not has_ratings or index_source_key(self.item_cf_index_path) == source_key:
+                index = load_item_cf_index(self.item_cf_index_path)
+                if index.shape[0] == n_movies:
+                    return index
+
+        if not has_ratings:
+            return sparse.csr_matrix((n_movies, n_movies), dtype=np.float32)
+        index = build_from_ratings(movie_ids, self.ratings_path)
+        try:
+            save_neighbor_index(index, self.item_cf_index_path, source_key=source_key)
+        except OSError:
+            pass
+        return index
+
+    def _load_mood_cf_scores(self):
+        # {mood: CF affinity of each candidate to the mood's other candidates},
+        # aligned with mood_sim_scores
+        return {
+            mood: group_affinity(self.item_cf_index, candidate_indices)
+            for mood, (candidate_indices, _) in self.mood_sim_scores.items()
+        }
+
+    def _load_surprise_pools(self):
+        # {mood: ClusterPool}: the mood's candidates partitioned by vibe_cluster
+        clusters = self.result_columns["vibe_cluster"]
+        return {
+            mood: ClusterPool(candidate_indices, clusters[candidate_indices])
+            for mood, (candidate_indices, _) in self.mood_sim_scores.items()
+        }
+
+    def _load_emotion_pipeline(self):
+        backend, source = self.emotion_source()
+        if backend == "onnx":
+            from backend.ai.onnx_backend import load_onnx_classifier
+
+            return load_onnx_classifier(EMOTION_MODEL_NAME, model_dir=source, intra_op_threads=ONNX_INTRA_OP_THREADS)
+
+        # Pretrained HuggingFace model for emotion classification.
+        # Imported here so that importing this module does not pull in torch.
+        from transformers import pipeline
+
+        return pipeline("text-classification", model=source)
+
+    # --- Status ---
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self._values
+
+    @property
+    def ready(self) -> bool:
+        return all(name in self._values for name in self.WARM_ARTIFACTS)
+
+    def artifact_status(self) -> dict:
+        """Which artifacts are loaded, how long each took and any load errors."""
+        artifacts = {}
+        for name in self.WARM_ARTIFACTS + self.LAZY_ARTIFACTS:
+            if name in self.LAZY_ARTIFACTS and name not in self._values:
+                continue
+            seconds = self._load_seconds.get(name)
+            artifacts[name] = {
+                "loaded": name in self._values,
+                "load_seconds": round(seconds, 4) if seconds is not None else None,
+                "error": self._errors.get(name),
+            }
+        return artifacts
+
+    def describe(self) -> dict:
+        return {
+            "version": self.version,
+            "name": self.name,
+            "fingerprint": self.fingerprint,
+            "models_dir": self.models_dir,
+            "generation": self.generation,
+            "created_at": self.created_at,
+        }
+
+
+def _dir_fingerprint(path: str) -> str:
+    """Short hash of the (name, size, mtime) of the files in a directory."""
+    digest = hashlib.sha1()
+    try:
+        entries = sorted(os.scandir(path), key=lambda e: e.name)
+    except OSError:
+        return "missing"
+    for entry in entries:
+        if entry.is_file():
+            stat = entry.stat()
+            digest.update(f"{entry.name}:{stat.st_size}:{stat.st_mtime_ns};".encode())
+    return digest.hexdigest()[:12]
+
+
+def bundle_dir(version: str = None) -> str:
+    """Directory of a named bundle (MODELS_DIR itself for None / "default")."""
+    if version in (None, "", "default"):
+        return MODELS_DIR
+    if not BUNDLE_VERSION_PATTERN.match(version) or version.startswith("."):
+        raise ValueError(f"Invalid bundle version: {version!r}")
+    path = os.path.join(BUNDLES_DIR, version)
+    if not os.path.isdir(path):
+        raise FileNotFoundError(f"No artifact bundle {version!r} in {BUNDLES_DIR}")
+    return path
+
+
+def smoke_test(bundle: ArtifactBundle) -> dict:
+    """Run one query of each kind against a freshly loaded bundle.
+
+    Raises if any fails or returns nothing; returns timings in ms.
+    """
+    timings = {}
+    start = time.perf_counter()
+    ctx = build_context("solo")
+    for mood in mood_to_genres_map:
+        ratings = _live_ratings(bundle)
+        top_indices = _rank_candidates(mood, ctx, 5, bundle=bundle, ratings=ratings)
+        if len(top_indices) == 0:
+            raise RuntimeError(f"Empty ranking for mood {mood!r}")
+        build_results(top_indices[:1], mood, bundle=bundle, ratings=ratings)
+        bundle.surprise_pools[mood].draw(np.random.default_rng(0))
+    timings["rank_ms"] = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    scores = bundle.emotion_pipeline(["smoke test"], batch_size=1, truncation=True, top_k=None)
+    if not scores or not scores[0]:
+        raise RuntimeError("Emotion model returned no scores")
+    timings["emotion_ms"] = (time.perf_counter() - start) * 1000
+    return {name: round(ms, 3) for name, ms in timings.items()}
+
+
+@dataclass
+class ReloadJob:
+    """Progress of one engine.reload(), as reported by the admin endpoints."""
+
+    id: str
+    requested_version: str
+    status: str = "pending"  # pending → loading → validating → succeeded | failed
+    version: Optional[str] = None
+    previous_version: Optional[str] = None
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+    load_seconds: Optional[float] = None
+    smoke_test: dict = field(default_factory=dict)
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("succeeded", "failed")
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.id,
+            "requested_version": self.requested_version,
+            "status": self.status,
+            "version": self.version,
+            "previous_version": self.previous_version,
+            "error": self.error,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+            "load_seconds": round(self.load_seconds, 4) if self.load_seconds is not None else None,
+            "smoke_test": self.smoke_test,
+        }
+
+
+# --- Recommender engine ---
+
+class RecommenderEngine:
+    """Serves the current artifact bundle and swaps in new ones atomically.
+
+    ``engine.bundle`` is replaced in one assignment, so a request that read
+    it keeps a consistent set of artifacts until it returns, even while a
+    reload runs; the next request sees the new bundle. Artifact attributes
+    (engine.catalog, engine.emotion_pipeline, ...) resolve through the
+    current bundle.
+    """
+
+    WARM_ARTIFACTS = ArtifactBundle.WARM_ARTIFACTS
+    LAZY_ARTIFACTS = ArtifactBundle.LAZY_ARTIFACTS
+
+    def __init__(self, models_dir: str = MODELS_DIR):
+        self.ratings = RatingAggregates() if LIVE_RATINGS else None
+        self.bundle = ArtifactBundle(models_dir, ratings=self.ratings)
+        self._warmup_thread = None
+        self._reload_lock = threading.Lock()
+        self._reload_jobs = OrderedDict()
+        self._active_reload = None
+        self.emotion_batcher = MicroBatcher(
+            self._classify_batch,
+            max_batch_size=EMOTION_BATCH_SIZE,
+            max_wait_ms=EMOTION_BATCH_WAIT_MS,
+            name="vyber-emotion-batcher",
+        )
+        self.mood_cache = TTLCache(
+            max_size=MOOD_CACHE_SIZE,
+            ttl_seconds=MOOD_CACHE_TTL_SECONDS,
+            path=MOOD_CACHE_PATH,
+        )
+        self.ranking_cache = TTLCache(
+            max_size=RANKING_CACHE_SIZE,
+            ttl_seconds=RANKING_CACHE_TTL_SECONDS,
+        )
+        self.lexicon = LexiconScorer(emotion_to_mood_map)
+        self.lexicon_threshold = LEXICON_CONFIDENCE_THRESHOLD
+        # How many detect requests each tier answered
+        self.tier_counts = Counter()
+        self._tier_lock = threading.Lock()
+
+    def __getattr__(self, name):
+        # Only called for attributes not found normally: artifact names
+        if name in ArtifactBundle.WARM_ARTIFACTS or name in ArtifactBundle.LAZY_ARTIFACTS:
+            return getattr(self.bundle, name)
+        raise AttributeError(f"{type(self).__name__!r} object has no attribute {name!r}")
+
+    def _classify_batch(self, texts):
+        """Run the emotion model once over a list of texts (padded batch).
+
+        Returns the full label distribution for each text.
+        """
+        return self.bundle.emotion_pipeline(list(texts), batch_size=len(texts), truncation=True, top_k=None)
+
+    # --- Warm-up & readiness ---
+
+    def warm_up(self, background: bool = True):
+        """Load every artifact of the current bundle, in a daemon thread unless background=False.
+
+        Calling it again while a warm-up is running (or after it finished)
+        does nothing, so it is safe to call on every Streamlit rerun.
+        """
+        if self._warmup_thread is not None:
+            return self._warmup_thread
+        bundle = self.bundle
+
+        def _run():
+            for name in bundle.WARM_ARTIFACTS:
+                try:
+                    bundle._get(name)
+                except Exception:
+                    # Recorded in status(); the next real use retries the load
+                    pass
+
+        if not background:
+            _run()
+            return None
+        self._warmup_thread = threading.Thread(target=_run, name="vyber-warmup", daemon=True)
+        self._warmup_thread.start()
+        return self._warmup_thread
+
+    # --- Hot reload ---
+
+    def reload(self, version: str = None, background: bool = True) -> ReloadJob:
+        """Load a bundle (MODELS_DIR, or BUNDLES_DIR/<version>) and swap it in.
+
+        The new bundle is fully loaded and smoke-tested while the current one
+        keeps serving; it only replaces it if every step succeeds. Returns
+        the ReloadJob; if a reload is already running, that job is returned
+        instead of starting a second one.
+        """
+        with self._reload_lock:
+            active = self._active_reload
+            if active is not None and not active.done:
+                return active
+            job = ReloadJob(id=secrets.token_hex(8), requested_version=version or "default")
+            self._reload_jobs[job.id] = job
+            while len(self._reload_jobs) > RELOAD_HISTORY_SIZE:
+                self._reload_jobs.popitem(last=False)
+            self._active_reload = job
+
+        if background:
+            threading.Thread(target=self._run_reload, args=(job,), name=f"vyber-reload-{job.id}", daemon=True).start()
+        else:
+            self._run_reload(job)
+        return job
+
+    def _run_reload(self, job: ReloadJob):
+        current = self.bundle
+        job.previous_version = current.version
+        try:
+            job.status = "loading"
+            start = time.perf_counter()
+            bundle = ArtifactBundle(bundle_dir(None if job.requested_version == "default" else job.requested_version),
+                                    version=job.requested_version, ratings=self.ratings)
+            job.version = bundle.version
+            bundle.share_from(current)
+            bundle.load_all()
+            job.load_seconds = time.perf_counter() - start
+
+            job.status = "validating"
+            job.smoke_test = smoke_test(bundle)
+
+            # The swap: one reference assignment. Requests already holding
+            # the old bundle finish on it; cached rankings and moods carry the
+            # bundle generation / emotion model in their key, so clearing
+            # only frees memory.
+            self.bundle = bundle
+            self.ranking_cache.clear()
+            if bundle.emotion_key != current.emotion_key:
+                self.mood_cache.clear()
+            job.status = "succeeded"
+        except Exception as e:
+            job.error = f"{type(e).__name__}: {e}"
+            job.status = "failed"
+        finally:
+            job.finished_at = time.time()
+
+    def reload_job(self, job_id: str) -> Optional[ReloadJob]:
+        return self._reload_jobs.get(job_id)
+
+    def is_loaded(self, name: str) -> bool:
+        return self.bundle.is_loaded(name)
+
+    @property
+    def ready(self) -> bool:
+        return self.bundle.ready
+
+    def status(self) -> dict:
+        """Which artifacts are loaded, how long each took and any load errors."""
+        bundle = self.bundle
+        warming = self._warmup_thread is not None and self._warmup_thread.is_alive()
+        last_reload = self._active_reload
+        return {
+            "ready": bundle.ready,
+            "warming_up": warming,
+            "emotion_backend": EMOTION_BACKEND,
+            "version": bundle.version,
+            "reloading": last_reload is not None and not last_reload.done,
+            "last_reload": last_reload.to_dict() if last_reload is not None else None,
+            "artifacts": bundle.artifact_status(),
+        }
+
+    def count_tier(self, tier: str, n: int = 1):
+        with self._tier_lock:
+            self.tier_counts[tier] += n
+
+    def metrics(self) -> dict:
+        """Runtime counters of the serving path."""
+        with self._tier_lock:
+            tiers = dict(self.tier_counts)
+        return {
+            "mood_tiers": {"lexicon_threshold": self.lexicon_threshold, **tiers},
+            "emotion_batching": self.emotion_batcher.stats(),
+            "mood_cache": self.mood_cache.stats(),
+            "ranking_cache": {
+                "bundle_version": self.bundle.version,
+                **self.ranking_cache.stats(),
+            },
+            "ratings": self.ratings.stats() if self.ratings is not None else None,
+        }
+
+
+# Shared engine used by the module-level helpers below
+engine = RecommenderEngine()
+if MOOD_CACHE_PATH:
+    atexit.register(engine.mood_cache.save)
+
+
+def warm_up(background: bool = True):
+    """Start loading all artifacts of the shared engine (non-blocking by default)."""
+    return engine.warm_up(background=background)
+
+
+def __getattr__(name):
+    # Backwards compatible module attributes (movies_df, emotion_pipeline, ...)
+    # now resolve lazily through the shared engine
+    if name in RecommenderEngine.WARM_ARTIFACTS or name in RecommenderEngine.LAZY_ARTIFACTS:
+        return getattr(engine, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 def load_movies():
     """Return the full movies DataFrame used by the recommender."""
-    return movies_df.copy()
+    return engine.movies_df.copy()
+
+
+def verify_mood_scores() -> dict:
+    """Compare precomputed mood vectors against the per-request computation.
+
+    Returns {mood: max absolute difference}; all values should be ~0.
+    """
+    bundle = engine.bundle
+    diffs = {}
+    for mood, (candidate_indices, sim_scores) in bundle.mood_sim_scores.items():
+        reference = _submatrix_sim_scores(bundle.tfidf_matrix, candidate_indices)
+        diffs[mood] = float(np.max(np.abs(reference - sim_scores)))
+    return diffs
+
+def similar_movies(movie_index: int, top_n: int = 10):
+    """Return [(movie_index, similarity), ...] for the closest movies."""
+    cols, scores = neighbors_of(engine.neighbor_index, movie_index)
+    return [(int(c), float(v)) for c, v in zip(cols[:top_n], scores[:top_n])]
 
 # --- Helpers for emotion detection & explanations ---
 
@@ -123,27 +932,139 @@ def _extract_top_dict(results):
     return None
 
 
+def _to_distribution(results) -> dict:
+    """Turn any pipeline output shape into {label: score}."""
+    obj = results
+    # Unwrap [[{...}, ...]] → [{...}, ...]
+    while isinstance(obj, list) and len(obj) == 1 and isinstance(obj[0], list):
+        obj = obj[0]
+    if isinstance(obj, dict):
+        obj = [obj]
+    if not isinstance(obj, list):
+        return {}
+    return {
+        str(d.get("label", "")).lower(): float(d.get("score", 0.0))
+        for d in obj
+        if isinstance(d, dict)
+    }
+
+
+def _distribution_to_mood(distribution: dict) -> str:
+    """Map the top-scoring emotion label to one of our moods."""
+    if not distribution:
+        return DEFAULT_MOOD
+    label = max(distribution, key=distribution.get)
+    return emotion_to_mood_map.get(label, DEFAULT_MOOD)
+
+
+def _mood_cache_key(text: str) -> str:
+    return f"{engine.bundle.emotion_key}:{normalize_text(text)}"
+
+
+def detect_emotions(text: str) -> dict:
+    """Return the emotion model's {label: score} distribution for a text.
+
+    Results are cached on the emotion model and the normalized text (case
+    and whitespace insensitive), so repeated phrases do not hit the
+    transformer again.
+    Raises if the model fails; returns {} for empty input.
+    """
+    if not isinstance(text, str) or not text.strip():
+        return {}
+
+    key = _mood_cache_key(text)
+    distribution = engine.mood_cache.get(key)
+    if distribution is None:
+        # Goes through the micro-batcher so concurrent callers share a forward pass
+        distribution = _to_distribution(engine.emotion_batcher(text))
+        engine.mood_cache.set(key, distribution)
+        engine.count_tier("model")
+    else:
+        engine.count_tier("cache")
+    return distribution
+
+
+def _lexicon_mood(text: str):
+    """Mood from the keyword tier, or None if it is not confident enough."""
+    result = engine.lexicon.score(text)
+    if result.mood is not None and result.confidence >= engine.lexicon_threshold:
+        engine.count_tier("lexicon")
+        return result.mood
+    return None
+
+
 def detect_mood(text: str) -> str:
     """Detect a coarse mood (one of 6) from free-text input.
 
+    Tiered: a keyword lexicon answers obvious inputs, everything else goes
+    to the (cached, batched) emotion model.
     Handles different output shapes from the HuggingFace pipeline.
     If anything goes wrong, returns DEFAULT_MOOD.
     """
     if not isinstance(text, str) or not text.strip():
+        engine.count_tier("empty")
         return DEFAULT_MOOD
 
+    mood = _lexicon_mood(text)
+    if mood is not None:
+        return mood
+
     try:
-        results = emotion_pipeline(text)
+        distribution = detect_emotions(text)
     except Exception:
+        engine.count_tier("error")
         return DEFAULT_MOOD
 
-    top = _extract_top_dict(results)
-    if top is None:
-        return DEFAULT_MOOD
+    return _distribution_to_mood(distribution)
+
+
+def detect_mood_batch(texts) -> list:
+    """Detect moods for many texts at once; returns one mood per text.
+
+    Lexicon and cache hits are answered directly; the remaining texts are
+    queued together (once per distinct normalized text) so they run as
+    full batches.
+    """
+    moods = [None] * len(texts)
+    distributions = {}
+    futures = {}
+    pending = []  # (position, key) waiting for the model
+
+    for pos, text in enumerate(texts):
+        if not isinstance(text, str) or not text.strip():
+            engine.count_tier("empty")
+            moods[pos] = DEFAULT_MOOD
+            continue
+        mood = _lexicon_mood(text)
+        if mood is not None:
+            moods[pos] = mood
+            continue
+
+        key = _mood_cache_key(text)
+        pending.append((pos, key))
+        if key in distributions or key in futures:
+            # Same text earlier in this batch: answered by that lookup
+            engine.count_tier("cache")
+            continue
+        cached = engine.mood_cache.get(key)
+        if cached is not None:
+            engine.count_tier("cache")
+            distributions[key] = cached
+        else:
+            futures[key] = engine.emotion_batcher.submit(text)
+
+    for key, future in futures.items():
+        try:
+            distributions[key] = _to_distribution(future.result())
+            engine.mood_cache.set(key, distributions[key])
+            engine.count_tier("model")
+        except Exception:
+            engine.count_tier("error")
+            distributions[key] = {}
 
-    label = str(top.get("label", "")).lower()
-    mood = emotion_to_mood_map.get(label, DEFAULT_MOOD)
-    return mood
+    for pos, key in pending:
+        moods[pos] = _distribution_to_mood(distributions[key])
+    return moods
 
 
 def build_explanation(
@@ -225,6 +1146,52 @@ def build_explanation(
 
 #Recommendation logic
 
+def build_results(indices, mood: str, user_text: str = None, start_rank: int = 1,
+                  bundle: ArtifactBundle = None, ratings=None) -> list:
+    """Turn catalog row indices into result dicts (with explanations).
+
+    Title, genres, rating and cluster are gathered for all indices at once
+    from the pre-parsed result columns, so the per-row work is only the
+    explanation text. Pass the bundle the indices were ranked on (default:
+    the current one) and, to show live average ratings, the RatingSnapshot.
+    """
+    bundle = bundle or engine.bundle
+    columns = bundle.result_columns
+    indices = np.asarray(indices, dtype=np.intp)
+
+    titles = columns["title"][indices].tolist()
+    genre_lists = columns["genres"][indices].tolist()
+    avg_ratings = columns["avg_rating"][indices]
+    if ratings is not None:
+        # Live mean where the movie has ratings, the catalog value otherwise
+        live = ratings.mean[bundle.rating_slots[indices]]
+        avg_ratings = np.where(np.isnan(live), avg_ratings, live)
+    ratings = avg_ratings.tolist()
+    clusters = columns["vibe_cluster"][indices].tolist()
+
+    results = []
+    for rank, (title, genres_list, rating, vibe_cluster) in enumerate(
+        zip(titles, genre_lists, ratings, clusters), start=start_rank
+    ):
+        avg_rating = None if rating != rating else rating  # NaN → None
+        results.append({
+            "title": title,
+            "genres": list(genres_list),
+            "mood": mood,
+            "avg_rating": avg_rating,
+            "vibe_cluster": vibe_cluster,
+            "explanation": build_explanation(
+                title=title,
+                mood=mood,
+                genres_list=genres_list,
+                avg_rating=avg_rating,
+                rank=rank,
+                user_text=user_text,
+            ),
+        })
+    return results
+
+
 def recommend(
     mood: str,
     top_n: int = 5,
@@ -232,42 +1199,85 @@ def recommend(
     weight_rating: float = 0.3,
     user_text: str = None,
     viewing_mode: str = "solo",
+    weight_cf: float = 0.0,
 ):
     """Recommend movies for a given mood.
 
     Combines cosine similarity (based on title + genres)
     and average rating to score movies, then returns a list
     of dicts with title, genres, mood, rating, vibe_cluster, explanation.
+    With weight_cf > 0, item-item collaborative filtering (how much the
+    movie's audience overlaps with the rest of the mood's) is blended in too.
     """
-    mood = (mood or "").lower()
-    if mood not in mood_to_genres_map:
-        mood = DEFAULT_MOOD
+    bundle = engine.bundle
+    ratings = _live_ratings(bundle)
+    mood = _normalize_mood(mood)
     ctx = build_context(viewing_mode)
-    target_genres = mood_to_genres_map[mood]
+    top_indices = _cached_ranking(bundle, ratings, mood, ctx, top_n, weight_sim, weight_rating, weight_cf)
+    return build_results(top_indices, mood, user_text=user_text, bundle=bundle, ratings=ratings)
 
-    # Simple genre filter: keep movies that contain at least one target genre
-    def has_genre(genres):
-        if not isinstance(genres, (list, tuple, set)):
-            return False
-        genres_lower = [str(g).lower() for g in genres]
-        return any(tg.lower() in genres_lower for tg in target_genres)
 
-    mask = movies_df["genres"].apply(has_genre)
-    candidate_indices = movies_df.index[mask].tolist()
+def _live_ratings(bundle: ArtifactBundle):
+    """Current RatingSnapshot if the bundle ranks on live ratings, else None."""
+    if bundle.ratings is None or bundle.rating_slots is None:
+        return None
+    return bundle.ratings.snapshot()
 
-    if not candidate_indices:
-        # Fallback: if no movie matches, just take all movies
-        candidate_indices = list(movies_df.index)
 
-    # Slice similarity matrix & ratings for the candidates
-    sim_submatrix = cosine_sim_matrix[np.ix_(candidate_indices, candidate_indices)]
+def _cached_ranking(bundle: ArtifactBundle, ratings, mood: str, ctx, top_n: int,
+                    weight_sim: float, weight_rating: float, weight_cf: float = 0.0) -> np.ndarray:
+    """_rank_candidates() through engine.ranking_cache.
+
+    The ranking only depends on the bundle, the rating snapshot, these
+    inputs and the context bucket, so only the indices are cached;
+    explanations are rendered by the caller. A new rating snapshot (at most
+    one per VYBER_RATING_REFRESH_SECONDS) starts new cache keys.
+    """
+    epoch = ratings.epoch if ratings is not None else 0
+    key = (bundle.generation, epoch, mood, context_key(ctx), int(top_n),
+           float(weight_sim), float(weight_rating), float(weight_cf))
+    top_indices = engine.ranking_cache.get(key)
+    if top_indices is None:
+        top_indices = _rank_candidates(mood, ctx, top_n, weight_sim, weight_rating, weight_cf,
+                                       bundle=bundle, ratings=ratings)
+        top_indices.setflags(write=False)
+        if engine.bundle is bundle:
+            engine.ranking_cache.set(key, top_indices)
+    return top_indices
+
+
+def _normalize_mood(mood: str) -> str:
+    mood = (mood or "").lower()
+    return mood if mood in mood_to_genres_map else DEFAULT_MOOD
 
-    # For simplicity, use the average similarity of each candidate to all others
-    sim_scores = sim_submatrix.mean(axis=1)
 
-    # Use avg_rating column if present, else fallback to ones
-    if "avg_rating" in movies_df.columns:
-        ratings = movies_df.loc[candidate_indices, "avg_rating"].values
+def _rank_candidates(mood: str, ctx, top_n: int, weight_sim: float = 0.7, weight_rating: float = 0.3,
+                     weight_cf: float = 0.0, bundle: ArtifactBundle = None, ratings=None) -> np.ndarray:
+    """Catalog indices of the top_n movies for a (normalized) mood and context.
+
+    ratings is a RatingSnapshot to rank on (Bayesian-shrunk live means);
+    without one the catalog's avg_rating column is used.
+    """
+    bundle = bundle or engine.bundle
+    # Candidates and their similarity scores only depend on the mood,
+    # so they are looked up instead of recomputed per request
+    candidate_indices, sim_scores = bundle.mood_sim_scores[mood]
+
+    if CHECK_MOOD_SCORES:
+        reference = _submatrix_sim_scores(bundle.tfidf_matrix, candidate_indices)
+        if not np.allclose(reference, sim_scores):
+            warnings.warn(
+                f"Precomputed similarity scores for mood '{mood}' differ from the "
+                f"submatrix mean (max diff {np.max(np.abs(reference - sim_scores)):.2e})",
+                RuntimeWarning,
+            )
+
+    # Live shrunk means, else the avg_rating column if present, else ones
+    columns = bundle.result_columns
+    if ratings is not None:
+        ratings = ratings.shrunk[bundle.rating_slots[candidate_indices]]
+    elif columns["has_avg_rating"]:
+        ratings = columns["avg_rating"][candidate_indices]
     else:
         ratings = np.ones(len(candidate_indices))
 
@@ -282,11 +1292,11 @@ def recommend(
     rating_norm = _normalize(ratings)
 
     final_scores = weight_sim * sim_norm + weight_rating * rating_norm
+    if weight_cf:
+        final_scores = final_scores + weight_cf * _normalize(bundle.mood_cf_scores[mood])
 
-    # Add context-aware boost per movie
-    boosts = movies_df.loc[candidate_indices, "genres"].apply(
-        lambda g: apply_context_boost(g if isinstance(g, list) else [], ctx)
-        ).values
+    # Add context-aware boost per movie (precompiled for this context bucket)
+    boosts = bundle.context_boosts.boosts(ctx)[candidate_indices]
 
     final_scores = final_scores + boosts
 
@@ -294,144 +1304,30 @@ def recommend(
     sorted_idx = np.argsort(final_scores)[::-1]  # descending
     top_idx = sorted_idx[:top_n]
 
-    top_movie_indices = [candidate_indices[i] for i in top_idx]
-    top_movies = movies_df.loc[top_movie_indices]
+    return candidate_indices[top_idx]
 
-    results = []
-    for rank, (_, row) in enumerate(top_movies.iterrows(), start=1):
-        genres_val = row.get("genres", [])
-        if isinstance(genres_val, str):
-            try:
-                parsed = ast.literal_eval(genres_val)
-                if isinstance(parsed, list):
-                    genres_val = parsed
-                else:
-                    genres_val = [genres_val]
-            except Exception:
-                genres_val = [genres_val]
-        elif not isinstance(genres_val, (list, tuple, set)):
-            genres_val = [str(genres_val)]
-
-        genres_list = [str(g) for g in genres_val if g is not None]
-
-        avg_rating = None
-        if "avg_rating" in row and not pd.isna(row["avg_rating"]):
-            avg_rating = float(row["avg_rating"])
-
-        explanation = build_explanation(
-            title=row["title"],
-            mood=mood,
-            genres_list=genres_list,
-            avg_rating=avg_rating,
-            rank=rank,
-            user_text=user_text,
-        )
-
-        # Safe handling for vibe_cluster from the dataframe
-        if "vibe_cluster" in row:
-            vibe_val = row["vibe_cluster"]
-        else:
-            vibe_val = None
-
-        try:
-            vibe_cluster = int(vibe_val) if vibe_val is not None and not pd.isna(vibe_val) else None
-        except Exception:
-            vibe_cluster = None
 
-        results.append({
-            "title": row["title"],
-            "genres": genres_list,
-            "mood": mood,
-            "avg_rating": avg_rating,
-            "vibe_cluster": vibe_cluster,
-            "explanation": explanation,
-        })
-
-    return results
-
-
-def surprise_me(mood: str, user_text: str = None):
+def surprise_me(mood: str, user_text: str = None, seed: int = None):
     """
     Surprise-me recommender that uses mood + vibe clusters.
 
-    - Picks movies for the mood (like recommend)
-    - Tries to choose one from a *different* vibe_cluster than the main top picks
-      so it feels fresh but still relevant.
-    """
+    - Looks up the vibe clusters of the mood's main top picks (like recommend)
+    - Draws one movie uniformly from the mood's candidates in a *different*
+      vibe_cluster, so it feels fresh but still relevant.
 
-    # Normalize mood
-    mood = (mood or "").lower()
-    if mood not in mood_to_genres_map:
-        mood = DEFAULT_MOOD
-
-    # 1) Use existing recommend() to see the main clusters
-    base_recs = recommend(mood=mood, top_n=5, user_text=user_text)
-    base_clusters = {
-        r.get("vibe_cluster")
-        for r in base_recs
-        if r.get("vibe_cluster") is not None
-    }
-
-    # 2) Build candidate set: same mood’s genre filter
-    target_genres = mood_to_genres_map[mood]
-
-    def has_genre(genres):
-        if not isinstance(genres, (list, tuple, set)):
-            return False
-        genres_lower = [str(g).lower() for g in genres]
-        return any(tg.lower() in genres_lower for tg in target_genres)
-
-    mask = movies_df["genres"].apply(has_genre)
-    candidates_df = movies_df[mask].copy()
-    if candidates_df.empty:
-        candidates_df = movies_df.copy()
-
-    # 3) Prefer movies from a *different* vibe_cluster than main recs
-    if "vibe_cluster" in candidates_df.columns and base_clusters:
-        alt_candidates = candidates_df[~candidates_df["vibe_cluster"].isin(base_clusters)]
-        if not alt_candidates.empty:
-            candidates_df = alt_candidates
-
-    # 4) Randomly pick ONE surprise movie
-    surprise_row = candidates_df.sample(n=1, random_state=None).iloc[0]
-
-    # 5) Clean genres to a list of strings
-    genres_val = surprise_row.get("genres", [])
-    if isinstance(genres_val, str):
-        try:
-            parsed = ast.literal_eval(genres_val)
-            if isinstance(parsed, list):
-                genres_val = parsed
-            else:
-                genres_val = [genres_val]
-        except Exception:
-            genres_val = [genres_val]
-    elif not isinstance(genres_val, (list, tuple, set)):
-        genres_val = [str(genres_val)]
-
-    genres_list = [str(g) for g in genres_val if g is not None]
-
-    # 6) Get rating
-    avg_rating = None
-    if "avg_rating" in surprise_row and not pd.isna(surprise_row["avg_rating"]):
-        avg_rating = float(surprise_row["avg_rating"])
-
-    # 7) Reuse explanation system
-    explanation = build_explanation(
-        title=surprise_row["title"],
-        mood=mood,
-        genres_list=genres_list,
-        avg_rating=avg_rating,
-        rank=1,
-        user_text=user_text,
-    )
-
-    # 8) Return a single movie dict
-    return {
-        "title": surprise_row["title"],
-        "genres": genres_list,
-        "mood": mood,
-        "avg_rating": avg_rating,
-        "vibe_cluster": int(surprise_row["vibe_cluster"]) if "vibe_cluster" in surprise_row else None,
-        "explanation": explanation,
-    }
+    The candidates are pre-partitioned by cluster (bundle.surprise_pools), so
+    the pick is a constant-time draw. Pass ``seed`` for a reproducible pick.
+    """
+    bundle = engine.bundle
+    ratings = _live_ratings(bundle)
+    mood = _normalize_mood(mood)
+    pool = bundle.surprise_pools[mood]
+
+    # 1) Clusters of the main top 5 (the same cached ranking recommend() uses)
+    top_indices = _cached_ranking(bundle, ratings, mood, build_context("solo"), 5, 0.7, 0.3)
+    base_clusters = frozenset(bundle.result_columns["vibe_cluster"][top_indices].tolist())
+
+    # 2) Random candidate outside those clusters (any candidate if none is left)
+    rng = np.random.default_rng(seed) if seed is not None else _surprise_rng
+    surprise_index = pool.draw(rng, exclude=base_clusters)
+    return build_results([surprise_index], mood, user_text=user_text, bundle=bundle, ratings=ratings)[0]
@@ -0,0 +1,94 @@
+"""Multi-hot genre index for vectorized genre filtering.
+
+Instead of running a Python closure over every row (lowercasing each genre
+string per request), the catalog's genres are encoded once into an N×G
+uint8 matrix over a fixed genre vocabulary. "Movies with any of these
+genres" is then a single vectorized column lookup:
+
+    index = GenreIndex.from_catalog(catalog)        # or from_genre_lists
+    mask = index.mask_for(["Comedy", "Family"])     # bool array, one entry per movie
+
+The index is built once per catalog (the engine keeps it as a bundle
+artifact); the API's database catalog is filtered in SQL through the
+``movie_genres`` table instead.
+
+Matching is exact per genre and case-insensitive ("Drama" does not match
+"Docudrama").
+"""
+
+from typing import Iterable, List
+import numpy as np
+
+
+class GenreIndex:
+    """N×G multi-hot matrix of movie genres plus its vocabulary."""
+
+    def __init__(self, vocab: List[str], matrix: np.ndarray):
+        self.vocab = list(vocab)
+        self.matrix = matrix
+        # Lowercased name → columns; a catalog vocabulary may hold several
+        # spellings of one genre ("Comedy", "comedy")
+        self._columns = {}
+        for i, g in enumerate(self.vocab):
+            self._columns.setdefault(g.lower(), []).append(i)
+
+    def __len__(self) -> int:
+        return self.matrix.shape[0]
+
+    # --- Builders ---
+
+    @classmethod
+    def from_codes(cls, vocab: List[str], offsets: np.ndarray, codes: np.ndarray) -> "GenreIndex":
+        """Build from flat genre codes and per-movie offsets (see catalog.Catalog)."""
+        n_movies = len(offsets) - 1
+        matrix = np.zeros((n_movies, len(vocab)), dtype=np.uint8)
+        rows = np.repeat(np.arange(n_movies), np.diff(offsets))
+        matrix[rows, codes] = 1
+        return cls(vocab, matrix)
+
+    @classmethod
+    def from_catalog(cls, catalog) -> "GenreIndex":
+        return cls.from_codes(catalog.genre_vocab, catalog.genre_offsets, catalog.genre_codes)
+
+    @classmethod
+    def from_genre_lists(cls, genre_lists: Iterable) -> "GenreIndex":
+        """Build from one list of genre names per movie (non-lists count as empty)."""
+        genre_lists = [
+            [str(g).strip() for g in genres if g is not None and str(g).strip()]
+            if isinstance(genres, (list, tuple, set)) else []
+            for genres in genre_lists
+        ]
+        # Case-insensitive vocabulary, keeping the first spelling seen
+        vocab = []
+        column = {}
+        for genres in genre_lists:
+            for g in genres:
+                if g.lower() not in column:
+                    column[g.lower()] = len(vocab)
+                    vocab.append(g)
+
+        lengths = np.fromiter((len(g) for g in genre_lists), dtype=np.int64, count=len(genre_lists))
+        offsets = np.concatenate([[0], np.cumsum(lengths)])
+        codes = np.fromiter(
+            (column[g.lower()] for genres in genre_lists for g in genres),
+            dtype=np.int64,
+            count=int(lengths.sum()),
+        )
+        return cls.from_codes(vocab, offsets, codes)
+
+    # --- Queries ---
+
+    def columns_for(self, genres: Iterable[str]) -> List[int]:
+        """Vocabulary columns of the given genre names (unknown names are skipped)."""
+        return [i for g in genres for i in self._columns.get(g.lower(), ())]
+
+    def mask_for(self, genres: Iterable[str]) -> np.ndarray:
+        """Boolean mask of movies that have at least one of the genres."""
+        cols = self.columns_for(genres)
+        if not cols:
+            return np.zeros(len(self), dtype=bool)
+        return self.matrix[:, cols].any(axis=1)
+
+    def indices_for(self, genres: Iterable[str]) -> np.ndarray:
+        """Row indices of movies that have at least one of the genres."""
+        return np.flatnonzero(self.mask_for(genres))
@@ -0,0 +1,123 @@
+"""Keyword lexicon scorer: the cheap first tier of mood detection.
+
+Many inputs are obvious ("sad", "scared", "want to laugh"). The scorer
+matches words and short phrases against a small lexicon of emotion labels,
+the same labels ``emotion_to_mood_map`` uses, and turns the hits into a
+mood and a confidence in [0, 1]. Only low-confidence inputs need the
+transformer.
+
+Confidence is the share of keyword weight that agrees on the top mood,
+scaled by how many hits agree (``min_hits`` agreeing hits for full weight,
+so a single keyword scores at most 0.5 and never skips the transformer on
+its own). It is scaled down for long texts, where a keyword says little,
+and set to 0 when a hit is negated ("not happy") or nothing matched.
+
+Words that are just as common outside the emotion ("love to watch",
+"I wonder what", "action" in a plot summary) are left out of the lexicon.
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+# Emotion label → keywords / short phrases (lowercase). Keys are the labels
+# of emotion_to_mood_map, or a mood name directly for genre-like words.
+EMOTION_LEXICON = {
+    "joy": ["happy", "happier", "glad", "joy", "joyful", "cheerful", "great mood", "good mood",
+            "feel good", "feel-good", "cheer up", "cheer me up", "uplifting", "wholesome"],
+    "amusement": ["laugh", "laughing", "funny", "hilarious", "lol", "silly", "goofy"],
+    "optimism": ["hopeful", "optimistic", "motivated", "inspired", "inspiring"],
+    "contentment": ["chill", "cozy", "relaxed", "relax", "light-hearted", "lighthearted"],
+    "love": ["in love", "crush", "valentine"],
+    "caring": ["cuddle", "cuddly", "heartwarming"],
+    "sadness": ["sad", "sadness", "depressed", "unhappy", "cry", "crying", "tearjerker",
+                "lonely", "heartbroken", "broken heart", "miserable", "feeling down", "feel down"],
+    "grief": ["grief", "grieving", "mourning"],
+    "disappointment": ["disappointed", "let down"],
+    "anger": ["angry", "furious", "rage", "pissed", "blow off steam"],
+    "annoyance": ["annoyed", "irritated", "frustrated"],
+    "fear": ["scared", "afraid", "fear", "terrified", "frightened"],
+    "nervousness": ["nervous", "anxious", "tense"],
+    "disgust": ["disgusted", "gross", "gory"],
+    "excitement": ["excited", "hyped", "pumped"],
+    "curiosity": ["curious", "another world"],
+    "anticipation": ["can't wait", "cant wait", "looking forward"],
+    # Genre-like words that name a mood directly
+    "happy": ["comedy", "comedies"],
+    "romantic": ["romantic", "romance", "rom-com", "romcom", "date night"],
+    "action": ["action-packed", "action movie", "explosions", "adrenaline", "car chase"],
+    "scary": ["scary", "horror", "spooky", "creepy", "haunted", "thriller", "suspense"],
+    "fantasy": ["fantasy", "magic", "magical", "dragons", "wizard", "fairy tale"],
+}
+
+NEGATIONS = {"not", "no", "never", "don't", "dont", "isn't", "isnt", "aren't", "wasn't", "nothing",
+             "without", "hardly", "neither", "nor", "can't", "cannot", "won't"}
+
+_TOKEN_RE = re.compile(r"[a-z][a-z'\-]*")
+
+
+@dataclass
+class LexiconResult:
+    """Outcome of the lexicon tier."""
+    mood: Optional[str]
+    confidence: float
+    matches: List[str] = field(default_factory=list)
+
+
+class LexiconScorer:
+    """Score free text against EMOTION_LEXICON and map hits to moods."""
+
+    def __init__(self, emotion_to_mood: Dict[str, str], lexicon: Dict[str, List[str]] = None,
+                 long_text_tokens: int = 12, negation_window: int = 3, min_hits: int = 2):
+        self.long_text_tokens = long_text_tokens
+        self.min_hits = max(1, int(min_hits))
+        self.negation_window = negation_window
+
+        # phrase (tuple of tokens) → mood, for labels the mood map knows
+        moods = set(emotion_to_mood.values())
+        self._phrases = {}
+        for label, words in (lexicon or EMOTION_LEXICON).items():
+            mood = emotion_to_mood.get(label, label if label in moods else None)
+            if mood is None:
+                continue
+            for word in words:
+                self._phrases[tuple(_TOKEN_RE.findall(word.lower()))] = mood
+        self._max_len = max((len(p) for p in self._phrases), default=1)
+
+    def score(self, text: str) -> LexiconResult:
+        tokens = _TOKEN_RE.findall((text or "").lower())
+        if not tokens:
+            return LexiconResult(None, 0.0)
+
+        weights = {}
+        matches = []
+        negated = False
+        i = 0
+        while i < len(tokens):
+            # Longest phrase starting at i wins ("broken heart" over "broken")
+            for size in range(min(self._max_len, len(tokens) - i), 0, -1):
+                phrase = tuple(tokens[i:i + size])
+                mood = self._phrases.get(phrase)
+                if mood is None:
+                    continue
+                window = tokens[max(0, i - self.negation_window):i]
+                if any(t in NEGATIONS for t in window):
+                    negated = True
+                weights[mood] = weights.get(mood, 0.0) + 1.0
+                matches.append(" ".join(phrase))
+                i += size - 1
+                break
+            i += 1
+
+        if not weights:
+            return LexiconResult(None, 0.0)
+
+        mood = max(weights, key=weights.get)
+        confidence = weights[mood] / sum(weights.values())
+        # One stray keyword is weak evidence: full weight needs min_hits agreeing hits
+        confidence *= min(1.0, weights[mood] / self.min_hits)
+        if len(tokens) > self.long_text_tokens:
+            confidence *= self.long_text_tokens / len(tokens)
+        if negated:
+            confidence = 0.0
+        return LexiconResult(mood, round(confidence, 4), matches)
@@ -0,0 +1,171 @@
+"""Sparse top-K neighbor index over the TF-IDF movie features.
+
+This replaces the dense N×N ``cosine_sim_matrix.npy``. Every movie keeps
+only its K most similar movies, stored as a CSR float32 matrix where row i
+holds the neighbors of movie i (column = neighbor index, value = cosine
+similarity). The movie itself is not part of its own neighbor list.
+
+Memory ceiling
+--------------
+A CSR entry costs 8 bytes (float32 value + int32 column index), plus one
+``indptr`` entry per movie. For K neighbors and N movies that is
+about ``8 * K * N`` bytes:
+
+- K=50,  100k movies → ~40 MB  (dense float64 would be ~80 GB)
+- K=100, 100k movies → ~80 MB
+
+Building walks the catalog in row chunks, so peak build memory is about
+``chunk_size * N * 4`` bytes on top of the TF-IDF matrix
+(~200 MB for chunk_size=512 and 100k movies).
+
+Build it from the ``main/`` directory:
+
+    python -m backend.ai.neighbor_index --top-k 50
+"""
+
+import os
+import argparse
+import time
+import numpy as np
+import pandas as pd
+import joblib
+from scipy import sparse
+from sklearn.preprocessing import normalize
+
+from backend.ai.catalog import (
+    CATALOG_PATH,
+    MODELS_DIR,
+    MOVIES_DF_PATH,
+    artifact_source_key,
+    catalog_stamp,
+    file_digest,
+    load_catalog,
+)
+
+TFIDF_VECTORIZER_PATH = os.path.join(MODELS_DIR, "tfidf_vectorizer.pkl")
+NEIGHBOR_INDEX_PATH = os.path.join(MODELS_DIR, "neighbor_index.npz")
+
+DEFAULT_TOP_K = 50
+
+
+def tfidf_features(vectorizer, combined_features) -> sparse.csr_matrix:
+    """Return L2-normalized TF-IDF rows for the given feature strings.
+
+    With unit rows, ``features @ features.T`` is exactly the cosine
+    similarity matrix the notebook used to save.
+    """
+    texts = pd.Series(combined_features).fillna("").astype(str)
+    return normalize(vectorizer.transform(texts), norm="l2", copy=False).tocsr()
+
+
+def build_neighbor_index(features, top_k: int = DEFAULT_TOP_K, chunk_size: int = 512) -> sparse.csr_matrix:
+    """Compute the top-K cosine neighbors of every row of ``features``."""
+    features = sparse.csr_matrix(features, dtype=np.float32)
+    n_movies = features.shape[0]
+    top_k = max(0, min(top_k, n_movies - 1))
+    if top_k == 0:
+        return sparse.csr_matrix((n_movies, n_movies), dtype=np.float32)
+    features_t = features.T.tocsc()
+
+    indices = np.empty((n_movies, top_k), dtype=np.int32)
+    values = np.empty((n_movies, top_k), dtype=np.float32)
+
+    for start in range(0, n_movies, chunk_size):
+        stop = min(start + chunk_size, n_movies)
+        block = (features[start:stop] @ features_t).toarray()
+
+        # Never list a movie as its own neighbor
+        rows = np.arange(stop - start)
+        block[rows, rows + start] = -np.inf
+
+        top = np.argpartition(block, -top_k, axis=1)[:, -top_k:]
+        top_scores = np.take_along_axis(block, top, axis=1)
+        order = np.argsort(-top_scores, axis=1, kind="stable")
+
+        indices[start:stop] = np.take_along_axis(top, order, axis=1)
+        values[start:stop] = np.take_along_axis(top_scores, order, axis=1)
+
+    indptr = np.arange(0, (n_movies + 1) * top_k, top_k, dtype=np.int64)
+    index = sparse.csr_matrix(
+        (values.ravel(), indices.ravel(), indptr),
+        shape=(n_movies, n_movies),
+    )
+    # Zero similarities carry no information, drop them from storage
+    index.eliminate_zeros()
+    return index
+
+
+def save_neighbor_index(index: sparse.csr_matrix, path: str = NEIGHBOR_INDEX_PATH, source_key: str = None):
+    """Write the index as an uncompressed .npz (fast to load).
+
+    The layout is scipy's ``save_npz`` one, plus the optional key of the
+    inputs the index was built from (see ``artifact_source_key``).
+    """
+    index = index.tocsr()
+    arrays = {
+        "format": np.array(b"csr"),
+        "shape": np.array(index.shape),
+        "data": index.data,
+        "indices": index.indices,
+        "indptr": index.indptr,
+    }
+    if source_key is not None:
+        arrays["source_key"] = np.array(source_key)
+    np.savez(path, **arrays)
+
+
+def load_neighbor_index(path: str = NEIGHBOR_INDEX_PATH) -> sparse.csr_matrix:
+    """Load a neighbor index written by save_neighbor_index()."""
+    index = sparse.load_npz(path).tocsr()
+    if index.dtype != np.float32:
+        index = index.astype(np.float32)
+    return index
+
+
+def index_source_key(path: str = NEIGHBOR_INDEX_PATH):
+    """The source key stored with an index, or None if it has none."""
+    with np.load(path) as data:
+        return str(data["source_key"]) if "source_key" in data.files else None
+
+
+def neighbors_of(index: sparse.csr_matrix, movie_index: int):
+    """Return (neighbor_indices, scores) for one movie, most similar first."""
+    start, stop = index.indptr[movie_index], index.indptr[movie_index + 1]
+    cols = index.indices[start:stop]
+    scores = index.data[start:stop]
+    order = np.argsort(-scores, kind="stable")
+    return cols[order], scores[order]
+
+
+def index_nbytes(index: sparse.csr_matrix) -> int:
+    """In-memory size of the CSR arrays in bytes."""
+    return index.data.nbytes + index.indices.nbytes + index.indptr.nbytes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the sparse top-K neighbor index.")
+    parser.add_argument("--top-k", type=int, default=DEFAULT_TOP_K)
+    parser.add_argument("--chunk-size", type=int, default=512)
+    parser.add_argument("--output", default=NEIGHBOR_INDEX_PATH)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    # Through the catalog, so the stored key matches what the recommender checks
+    catalog = load_catalog(MOVIES_DF_PATH, CATALOG_PATH)
+    features = tfidf_features(joblib.load(TFIDF_VECTORIZER_PATH), catalog.columns["combined_features"])
+    source_key = artifact_source_key(
+        catalog=catalog_stamp(catalog, CATALOG_PATH),
+        vectorizer=file_digest(TFIDF_VECTORIZER_PATH),
+    )
+
+    index = build_neighbor_index(features, top_k=args.top_k, chunk_size=args.chunk_size)
+    save_neighbor_index(index, args.output, source_key=source_key)
+
+    print(
+        f"Saved {index.shape[0]} x top-{args.top_k} neighbor index to {args.output} "
+        f"({index_nbytes(index) / 1e6:.1f} MB in memory, {time.perf_counter() - start:.1f}s)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,275 @@
+"""Quantized ONNX Runtime backend for the emotion classifier.
+
+The PyTorch distilroberta pipeline dominates detect latency and memory on
+CPU. This module exports the model once to ONNX, applies dynamic int8
+quantization to its weights and serves it through ONNX Runtime.
+``OnnxEmotionClassifier`` is called like the HuggingFace text-classification
+pipeline and returns the same label/score shapes, so the rest of
+emotion_detection does not care which backend is active.
+
+Select it with ``VYBER_EMOTION_BACKEND=onnx`` (``VYBER_ONNX_THREADS`` sets
+the intra-op thread count). From the ``main/`` directory:
+
+    python -m backend.ai.onnx_backend export        # one-time export + quantization
+    python -m backend.ai.onnx_backend bench         # latency + agreement vs PyTorch
+
+Needs ``onnxruntime`` to serve and ``torch`` + ``onnx`` to export.
+"""
+
+import os
+import argparse
+import json
+import time
+import numpy as np
+
+MODELS_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "models"))
+
+ONNX_DIR = os.path.join(MODELS_DIR, "emotion_onnx")
+FP32_MODEL_FILE = "model.onnx"
+QUANTIZED_MODEL_FILE = "model.int8.onnx"
+
+DEFAULT_MODEL_NAME = "j-hartmann/emotion-english-distilroberta-base"
+
+# Fixed corpus for the benchmark / agreement check
+BENCH_TEXTS = [
+    "I'm exhausted but I want something light and funny to relax with.",
+    "I feel so happy today, everything is going great!",
+    "I just got great news and I can't stop smiling.",
+    "Feeling really down after a long week.",
+    "I miss my family and feel kind of lonely tonight.",
+    "My heart is broken and I just want to cry.",
+    "I'm so in love, I want something romantic.",
+    "Date night with my partner, looking for something sweet.",
+    "I'm furious about work and need to blow off some steam.",
+    "Everything is annoying me today.",
+    "I'm scared to be alone in the house tonight.",
+    "That noise outside is making me nervous.",
+    "I'm disgusted by the news lately.",
+    "I'm curious and want to explore a magical world.",
+    "Can't wait for the weekend, I'm so excited!",
+    "I wonder what it would be like to live on another planet.",
+    "Bored. Nothing to do.",
+    "Just a normal day, nothing special.",
+    "I feel calm and relaxed after a walk in the park.",
+    "I'm anxious about my exam tomorrow.",
+    "We're celebrating with friends, something fun please!",
+    "I had a terrible day and need cheering up.",
+    "I want to laugh until my stomach hurts.",
+    "Feeling nostalgic about my childhood.",
+]
+
+
+def _softmax(logits: np.ndarray) -> np.ndarray:
+    shifted = logits - logits.max(axis=-1, keepdims=True)
+    exp = np.exp(shifted)
+    return exp / exp.sum(axis=-1, keepdims=True)
+
+
+def export_onnx(model_name: str = DEFAULT_MODEL_NAME, out_dir: str = ONNX_DIR, quantize: bool = True) -> str:
+    """Export the HuggingFace model to ONNX (+ int8 copy); return the served path."""
+    import torch
+    from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+    os.makedirs(out_dir, exist_ok=True)
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModelForSequenceClassification.from_pretrained(model_name).eval()
+    tokenizer.save_pretrained(out_dir)
+    model.config.save_pretrained(out_dir)
+
+    sample = tokenizer(["export sample text"], return_tensors="pt")
+    fp32_path = os.path.join(out_dir, FP32_MODEL_FILE)
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            (sample["input_ids"], sample["attention_mask"]),
+            fp32_path,
+            input_names=["input_ids", "attention_mask"],
+            output_names=["logits"],
+            dynamic_axes={
+                "input_ids": {0: "batch", 1: "sequence"},
+                "attention_mask": {0: "batch", 1: "sequence"},
+                "logits": {0: "batch"},
+            },
+            opset_version=17,
+            dynamo=False,
+        )
+
+    if not quantize:
+        return fp32_path
+
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    quantized_path = os.path.join(out_dir, QUANTIZED_MODEL_FILE)
+    quantize_dynamic(fp32_path, quantized_path, weight_type=QuantType.QInt8)
+    return quantized_path
+
+
+class OnnxEmotionClassifier:
+    """ONNX Runtime drop-in for ``pipeline("text-classification", ...)``.
+
+    Output shapes follow the pipeline: a string gives ``[{label, score}]``,
+    a list gives one ``{label, score}`` per text, and ``top_k=None`` gives the
+    full score-sorted label list per text instead.
+    """
+
+    def __init__(self, model_dir: str = ONNX_DIR, model_file: str = QUANTIZED_MODEL_FILE,
+                 intra_op_threads: int = None, max_length: int = 512):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        with open(os.path.join(model_dir, "config.json"), encoding="utf-8") as f:
+            id2label = json.load(f)["id2label"]
+        self.labels = [id2label[str(i)] for i in range(len(id2label))]
+        self.max_length = max_length
+
+        options = ort.SessionOptions()
+        if intra_op_threads:
+            options.intra_op_num_threads = int(intra_op_threads)
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(
+            os.path.join(model_dir, model_file),
+            options,
+            providers=["CPUExecutionProvider"],
+        )
+        self._input_names = {i.name for i in self.session.get_inputs()}
+
+    def predict_proba(self, texts, batch_size: int = None, truncation: bool = True) -> np.ndarray:
+        """Softmax scores, one row per text (columns follow self.labels)."""
+        texts = list(texts)
+        batch_size = batch_size or len(texts) or 1
+        rows = []
+        for start in range(0, len(texts), batch_size):
+            encoded = self.tokenizer(
+                texts[start:start + batch_size],
+                padding=True,
+                truncation=truncation,
+                max_length=self.max_length,
+                return_tensors="np",
+            )
+            feeds = {k: v.astype(np.int64) for k, v in encoded.items() if k in self._input_names}
+            logits = self.session.run(None, feeds)[0]
+            rows.append(_softmax(logits.astype(np.float64)))
+        return np.vstack(rows) if rows else np.empty((0, len(self.labels)))
+
+    def _format(self, probs: np.ndarray, top_k):
+        order = np.argsort(-probs, kind="stable")
+        ranked = [{"label": self.labels[i], "score": float(probs[i])} for i in order]
+        if top_k is None:
+            return ranked
+        if top_k == 1:
+            return ranked[0]
+        return ranked[:top_k]
+
+    def __call__(self, texts, batch_size: int = None, truncation: bool = True, top_k=1, **kwargs):
+        single = isinstance(texts, str)
+        probs = self.predict_proba([texts] if single else texts, batch_size=batch_size, truncation=truncation)
+        outputs = [self._format(row, top_k) for row in probs]
+        if single:
+            return [outputs[0]] if top_k == 1 else outputs[0]
+        return outputs
+
+
+def load_onnx_classifier(model_name: str = DEFAULT_MODEL_NAME, model_dir: str = ONNX_DIR,
+                         intra_op_threads: int = None) -> OnnxEmotionClassifier:
+    """Load the quantized model, exporting it first if it does not exist yet."""
+    if not os.path.exists(os.path.join(model_dir, QUANTIZED_MODEL_FILE)):
+        export_onnx(model_name, model_dir, quantize=True)
+    return OnnxEmotionClassifier(model_dir, QUANTIZED_MODEL_FILE, intra_op_threads=intra_op_threads)
+
+
+# --- Benchmark & agreement check ---
+
+def _timed_calls(fn, texts, batch_size: int, repeats: int):
+    """Return (per-text single-call latencies in ms, batched texts/second)."""
+    fn(texts[:2], batch_size=2)  # warm-up
+    single = []
+    for _ in range(repeats):
+        for text in texts:
+            start = time.perf_counter()
+            fn([text], batch_size=1)
+            single.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn(texts, batch_size=batch_size)
+    throughput = len(texts) * repeats / (time.perf_counter() - start)
+    return np.array(single), throughput
+
+
+def benchmark(model_name: str = DEFAULT_MODEL_NAME, model_dir: str = ONNX_DIR, texts=None,
+              intra_op_threads: int = None, batch_size: int = 8, repeats: int = 3) -> dict:
+    """Compare latency and predictions of the PyTorch and ONNX backends."""
+    from transformers import pipeline
+
+    from backend.ai.emotion_detection import emotion_to_mood_map, DEFAULT_MOOD
+
+    texts = list(texts or BENCH_TEXTS)
+    torch_pipe = pipeline("text-classification", model=model_name)
+    onnx_clf = load_onnx_classifier(model_name, model_dir, intra_op_threads=intra_op_threads)
+
+    def torch_proba(batch, batch_size=None):
+        outputs = torch_pipe(list(batch), batch_size=batch_size or len(batch), truncation=True, top_k=None)
+        scores = np.zeros((len(outputs), len(onnx_clf.labels)))
+        column = {label: i for i, label in enumerate(onnx_clf.labels)}
+        for row, ranked in enumerate(outputs):
+            for d in ranked:
+                scores[row, column[d["label"]]] = d["score"]
+        return scores
+
+    report = {"texts": len(texts), "batch_size": batch_size}
+    for name, fn in (("torch", torch_proba), ("onnx_int8", onnx_clf.predict_proba)):
+        single_ms, throughput = _timed_calls(fn, texts, batch_size, repeats)
+        report[name] = {
+            "single_p50_ms": round(float(np.percentile(single_ms, 50)), 2),
+            "single_p95_ms": round(float(np.percentile(single_ms, 95)), 2),
+            "batched_texts_per_s": round(throughput, 1),
+        }
+
+    torch_scores = torch_proba(texts)
+    onnx_scores = onnx_clf.predict_proba(texts)
+    torch_labels = [onnx_clf.labels[i] for i in torch_scores.argmax(axis=1)]
+    onnx_labels = [onnx_clf.labels[i] for i in onnx_scores.argmax(axis=1)]
+    to_mood = lambda label: emotion_to_mood_map.get(label.lower(), DEFAULT_MOOD)
+    report["agreement"] = {
+        "top_label": round(float(np.mean([a == b for a, b in zip(torch_labels, onnx_labels)])), 4),
+        "mood": round(float(np.mean([to_mood(a) == to_mood(b) for a, b in zip(torch_labels, onnx_labels)])), 4),
+        "max_abs_score_diff": round(float(np.abs(torch_scores - onnx_scores).max()), 4),
+        "mean_abs_score_diff": round(float(np.abs(torch_scores - onnx_scores).mean()), 4),
+        "disagreements": [
+            {"text": t, "torch": a, "onnx": b}
+            for t, a, b in zip(texts, torch_labels, onnx_labels)
+            if a != b
+        ],
+    }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export / benchmark the ONNX emotion backend.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    export_cmd = sub.add_parser("export", help="export to ONNX and quantize to int8")
+    export_cmd.add_argument("--model", default=DEFAULT_MODEL_NAME)
+    export_cmd.add_argument("--output", default=ONNX_DIR)
+    export_cmd.add_argument("--no-quantize", action="store_true")
+
+    bench_cmd = sub.add_parser("bench", help="latency + agreement against the PyTorch pipeline")
+    bench_cmd.add_argument("--model", default=DEFAULT_MODEL_NAME)
+    bench_cmd.add_argument("--model-dir", default=ONNX_DIR)
+    bench_cmd.add_argument("--threads", type=int, default=None)
+    bench_cmd.add_argument("--batch-size", type=int, default=8)
+    bench_cmd.add_argument("--repeats", type=int, default=3)
+
+    args = parser.parse_args()
+    if args.command == "export":
+        path = export_onnx(args.model, args.output, quantize=not args.no_quantize)
+        print(f"Exported {args.model} to {path}")
+    else:
+        report = benchmark(args.model, args.model_dir, intra_op_threads=args.threads,
+                           batch_size=args.batch_size, repeats=args.repeats)
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,272 @@
+"""Live per-movie rating aggregates (count, sum, Bayesian-shrunk mean).
+
+The store starts from its last checkpoint, else from the offline per-movie
+stats (``models/movie_rating_stats.npz``, see ``backend.ai.ratings_pipeline``)
+or the raw ratings (``data/ratings_cleaned.csv``), and every rating posted to ``/feedback`` is added
+with an O(1) update of the movie's count and sum. Readers never see the
+working arrays: ``snapshot()`` returns an immutable ``RatingSnapshot`` that
+is republished at most every ``refresh_seconds`` when something changed, so
+the recommender's ranking cache can key on its epoch.
+
+The shrunk mean pulls movies with few ratings towards the global mean:
+
+    shrunk = (prior_weight * global_mean + sum) / (prior_weight + count)
+
+Movies are keyed by their MovieLens ``movieId`` (``Movie.movielens_id`` in the
+API database, as loaded by ``python -m backend.ingest``). Each id gets a
+fixed slot, so catalogs of different artifact bundles can map their rows to
+slots once and read ``snapshot().shrunk[slots]``.
+
+    store = RatingAggregates()
+    store.load()                              # checkpoint, else seed ratings
+    store.add(movie_id=1, rating=4.5)         # O(1)
+    store.snapshot().shrunk[store.slots_for(catalog_movie_ids)]
+    store.checkpoint()                        # also: maybe_checkpoint()
+"""
+
+import os
+import tempfile
+import threading
+import time
+from collections import namedtuple
+import numpy as np
+
+from backend.ai.item_cf import read_ratings
+from backend.ai.ratings_pipeline import MOVIE_RATING_STATS_PATH, RATINGS_PATH, read_stats
+
+MODELS_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "models"))
+
+RATING_AGGREGATES_PATH = os.getenv("VYBER_RATING_AGGREGATES_PATH", os.path.join(MODELS_DIR, "rating_aggregates.npz"))
+RATING_PRIOR_WEIGHT = float(os.getenv("VYBER_RATING_PRIOR_WEIGHT", "5"))
+RATING_REFRESH_SECONDS = float(os.getenv("VYBER_RATING_REFRESH_SECONDS", "1"))
+RATING_CHECKPOINT_SECONDS = float(os.getenv("VYBER_RATING_CHECKPOINT_SECONDS", "60"))
+
+# epoch changes on every publish; arrays are indexed by slot and read-only
+RatingSnapshot = namedtuple("RatingSnapshot", ["epoch", "count", "mean", "shrunk", "global_mean"])
+
+
+class RatingAggregates:
+    """Per-movie rating count and sum with periodic snapshots and checkpoints."""
+
+    def __init__(
+        self,
+        path: str = RATING_AGGREGATES_PATH,
+        seed_path: str = None,
+        prior_weight: float = RATING_PRIOR_WEIGHT,
+        refresh_seconds: float = RATING_REFRESH_SECONDS,
+        checkpoint_seconds: float = RATING_CHECKPOINT_SECONDS,
+    ):
+        self.path = path
+        # Movie stats artifact if it was built, else the raw ratings CSV
+        self.seed_path = seed_path or (MOVIE_RATING_STATS_PATH if os.path.exists(MOVIE_RATING_STATS_PATH) else RATINGS_PATH)
+        self.prior_weight = float(prior_weight)
+        self.refresh_seconds = float(refresh_seconds)
+        self.checkpoint_seconds = float(checkpoint_seconds)
+        # Highest Feedback.id already counted (see backend.main)
+        self.watermark = 0
+
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._slots = {}  # movieId -> slot
+        self._movie_ids = np.empty(0, dtype=np.int64)
+        self._count = np.empty(0, dtype=np.int64)
+        self._sum = np.empty(0, dtype=np.float64)
+        self._size = 0
+        self._total_count = 0
+        self._total_sum = 0.0
+
+        self._events = 0
+        self._dirty = False
+        self._unsaved = False
+        self._snapshot = None
+        self._epoch = 0
+        self._published_at = 0.0
+        self._checkpointed_at = time.monotonic()
+
+    # --- Loading & checkpoints ---
+
+    def load(self):
+        """Read the checkpoint, or build the aggregates from the seed ratings."""
+        with self._lock:
+            if self._loaded:
+                return self
+            if self.path and os.path.exists(self.path):
+                with np.load(self.path) as data:
+                    movie_ids, count, total = data["movie_ids"], data["count"], data["sum"]
+                    self.watermark = int(data["watermark"])
+            elif self.seed_path and self.seed_path.endswith(".npz") and os.path.exists(self.seed_path):
+                stats = read_stats(self.seed_path)
+                movie_ids, count, total = stats["movie_id"], stats["count"], stats["sum"]
+                self._unsaved = True
+            elif self.seed_path and os.path.exists(self.seed_path):
+                _, seed_movies, seed_ratings = read_ratings(self.seed_path)
+                movie_ids, codes = np.unique(seed_movies, return_inverse=True)
+                count = np.bincount(codes, minlength=len(movie_ids))
+                total = np.bincount(codes, weights=seed_ratings.astype(np.float64), minlength=len(movie_ids))
+                self._unsaved = True
+            else:
+                movie_ids, count, total = np.empty(0, np.int64), np.empty(0, np.int64), np.empty(0)
+
+            self._ensure_capacity(len(movie_ids))
+            n = len(movie_ids)
+            self._movie_ids[:n] = movie_ids
+            self._count[:n] = count
+            self._sum[:n] = total
+            self._size = n
+            self._slots = {int(m): i for i, m in enumerate(movie_ids.tolist())}
+            self._total_count = int(self._count[:n].sum())
+            self._total_sum = float(self._sum[:n].sum())
+            self._loaded = True
+            self._publish()
+            return self
+
+    def reset_to_seed(self):
+        """Drop the checkpointed counts: back to the seed ratings, watermark 0.
+
+        Used when the checkpoint was written against another feedback table,
+        whose rows must not be counted on top of the ones replayed next.
+        Existing slots keep their movie, so slot arrays of loaded bundles
+        stay valid.
+        """
+        seed = RatingAggregates(path=None, seed_path=self.seed_path, prior_weight=self.prior_weight).load()
+        with self._lock:
+            self._loaded = True
+            n = seed._size
+            slots = np.fromiter((self._slot(int(m)) for m in seed._movie_ids[:n]), dtype=np.int64, count=n)
+            self._count[:] = 0
+            self._sum[:] = 0.0
+            self._count[slots] = seed._count[:n]
+            self._sum[slots] = seed._sum[:n]
+            self._total_count = seed._total_count
+            self._total_sum = seed._total_sum
+            self.watermark = 0
+            self._unsaved = True
+            self._publish()
+        return self
+
+    def checkpoint(self, path: str = None):
+        """Write the aggregates (and the feedback watermark) atomically."""
+        path = path or self.path
+        with self._lock:
+            n = self._size
+            arrays = {
+                "movie_ids": self._movie_ids[:n].copy(),
+                "count": self._count[:n].copy(),
+                "sum": self._sum[:n].copy(),
+                "watermark": np.array(self.watermark),
+            }
+            self._unsaved = False
+            self._checkpointed_at = time.monotonic()
+        # A temp file of our own: other workers may checkpoint the same path
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)),
+                                        prefix=f"{os.path.basename(path)}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez(f, **arrays)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def maybe_checkpoint(self) -> bool:
+        """Checkpoint if there are unsaved updates and the interval has passed."""
+        if not self._unsaved or time.monotonic() - self._checkpointed_at < self.checkpoint_seconds:
+            return False
+        try:
+            self.checkpoint()
+        except OSError:
+            # Read-only models dir: the DB replay from the last watermark
+            # rebuilds the state on restart anyway
+            return False
+        return True
+
+    # --- Updates ---
+
+    def _ensure_capacity(self, size: int):
+        if size <= len(self._count):
+            return
+        capacity = max(size, 2 * len(self._count), 1024)
+        for name, dtype in (("_movie_ids", np.int64), ("_count", np.int64), ("_sum", np.float64)):
+            grown = np.zeros(capacity, dtype=dtype)
+            old = getattr(self, name)
+            grown[:len(old)] = old
+            setattr(self, name, grown)
+
+    def _slot(self, movie_id: int) -> int:
+        slot = self._slots.get(movie_id)
+        if slot is None:
+            slot = self._size
+            self._ensure_capacity(slot + 1)
+            self._movie_ids[slot] = movie_id
+            self._slots[movie_id] = slot
+            self._size += 1
+        return slot
+
+    def add(self, movie_id: int, rating: float):
+        """Count one rating (O(1))."""
+        with self._lock:
+            slot = self._slot(int(movie_id))
+            self._count[slot] += 1
+            self._sum[slot] += rating
+            self._total_count += 1
+            self._total_sum += rating
+            self._events += 1
+            self._dirty = self._unsaved = True
+
+    def add_many(self, events, watermark: int = None):
+        """Count (movie_id, rating) pairs and advance the watermark."""
+        with self._lock:
+            for movie_id, rating in events:
+                self.add(movie_id, rating)
+            if watermark is not None and watermark > self.watermark:
+                self.watermark = int(watermark)
+                self._unsaved = True
+
+    def slots_for(self, movie_ids) -> np.ndarray:
+        """Slot of each movie id (new ids get empty slots)."""
+        self.load()
+        with self._lock:
+            slots = np.fromiter((self._slot(int(m)) for m in movie_ids), dtype=np.int64, count=len(movie_ids))
+            if self._snapshot is None or self._size > len(self._snapshot.count):
+                self._publish()
+            return slots
+
+    # --- Reads ---
+
+    def _publish(self):
+        n = self._size
+        count = self._count[:n].copy()
+        total = self._sum[:n]
+        global_mean = self._total_sum / self._total_count if self._total_count else 0.0
+        mean = np.divide(total, count, out=np.full(n, np.nan), where=count > 0)
+        shrunk = (self.prior_weight * global_mean + total) / (self.prior_weight + count)
+        for array in (count, mean, shrunk):
+            array.setflags(write=False)
+        self._epoch += 1
+        self._snapshot = RatingSnapshot(self._epoch, count, mean, shrunk, global_mean)
+        self._published_at = time.monotonic()
+        self._dirty = False
+
+    def snapshot(self) -> RatingSnapshot:
+        """Latest published aggregates (republished when stale and changed)."""
+        snapshot = self._snapshot
+        if snapshot is None or (self._dirty and time.monotonic() - self._published_at >= self.refresh_seconds):
+            self.load()
+            with self._lock:
+                if self._dirty or self._snapshot is None:
+                    self._publish()
+                snapshot = self._snapshot
+        return snapshot
+
+    def stats(self) -> dict:
+        snapshot = self._snapshot
+        return {
+            "movies": self._size,
+            "ratings": self._total_count,
+            "events": self._events,
+            "watermark": self.watermark,
+            "epoch": snapshot.epoch if snapshot is not None else 0,
+            "global_mean": round(snapshot.global_mean, 4) if snapshot is not None else None,
+            "prior_weight": self.prior_weight,
+            "unsaved": self._unsaved,
+        }
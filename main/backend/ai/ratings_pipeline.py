@@ -0,0 +1,269 @@
+"""Streaming ratings pipeline: per-movie and per-user aggregates in bounded memory.
+
+Reads a ratings CSV (userId, movieId, rating, timestamp), or every
+``*.csv`` / ``*.csv.gz`` file of a directory in name order, in chunks of
+``chunk_size`` rows with fixed dtypes (int32 ids, float32 ratings, int64
+timestamps). Each chunk is folded into running aggregates held in arrays
+indexed by id, then dropped, so peak memory depends on the chunk size and
+the id range, not on the number of rows.
+
+Artifacts (``models/``):
+
+- ``movie_rating_stats.npz`` – movie_id, count, sum, sum_sq, mean, std,
+  first_ts, last_ts for every rated movie
+- ``user_rating_stats.npz`` – the same per user_id
+
+``backend.ai.rating_store`` seeds the live rating aggregates from the movie
+stats when they exist. From the ``main/`` directory:
+
+    python -m backend.ai.ratings_pipeline run data/ratings_cleaned.csv
+    python -m backend.ai.ratings_pipeline run /data/ml-25m/  --chunk-size 1000000
+    python -m backend.ai.ratings_pipeline bench --rows 100000 1000000 25000000
+"""
+
+import os
+import argparse
+import glob
+import json
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+MODELS_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "models"))
+DATA_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "data"))
+
+RATINGS_PATH = os.path.join(DATA_DIR, "ratings_cleaned.csv")
+MOVIE_RATING_STATS_PATH = os.path.join(MODELS_DIR, "movie_rating_stats.npz")
+USER_RATING_STATS_PATH = os.path.join(MODELS_DIR, "user_rating_stats.npz")
+
+RATINGS_DTYPES = {"userId": np.int32, "movieId": np.int32, "rating": np.float32, "timestamp": np.int64}
+DEFAULT_CHUNK_SIZE = 500_000
+
+
+# --- Reading ---
+
+def rating_files(path: str) -> list:
+    """The file itself, or the directory's *.csv / *.csv.gz files in name order."""
+    if os.path.isdir(path):
+        files = sorted(glob.glob(os.path.join(path, "*.csv")) + glob.glob(os.path.join(path, "*.csv.gz")))
+        if not files:
+            raise FileNotFoundError(f"No *.csv or *.csv.gz files in {path}")
+        return files
+    if not os.path.exists(path):
+        raise FileNotFoundError(path)
+    return [path]
+
+
+def iter_rating_chunks(path: str, chunk_size: int = DEFAULT_CHUNK_SIZE, columns=None):
+    """Yield typed DataFrame chunks of every rating file under ``path``."""
+    columns = list(columns or RATINGS_DTYPES)
+    dtypes = {name: RATINGS_DTYPES[name] for name in columns}
+    for file_path in rating_files(path):
+        with pd.read_csv(file_path, usecols=columns, dtype=dtypes, chunksize=chunk_size) as reader:
+            yield from reader
+
+
+# --- Aggregation ---
+
+class RunningStats:
+    """count / sum / sum_sq / first_ts / last_ts per integer id, grown on demand."""
+
+    def __init__(self):
+        self.count = np.zeros(0, dtype=np.int64)
+        self.sum = np.zeros(0, dtype=np.float64)
+        self.sum_sq = np.zeros(0, dtype=np.float64)
+        self.first_ts = np.zeros(0, dtype=np.int64)
+        self.last_ts = np.zeros(0, dtype=np.int64)
+
+    def _grow(self, size: int):
+        if size <= len(self.count):
+            return
+        size = max(size, 2 * len(self.count))
+        for name, fill in (("count", 0), ("sum", 0), ("sum_sq", 0),
+                           ("first_ts", np.iinfo(np.int64).max), ("last_ts", np.iinfo(np.int64).min)):
+            old = getattr(self, name)
+            grown = np.full(size, fill, dtype=old.dtype)
+            grown[:len(old)] = old
+            setattr(self, name, grown)
+
+    def update(self, ids: np.ndarray, ratings: np.ndarray, timestamps: np.ndarray = None):
+        if len(ids) == 0:
+            return
+        self._grow(int(ids.max()) + 1)
+        size = len(self.count)
+        ratings = ratings.astype(np.float64)
+        self.count += np.bincount(ids, minlength=size)
+        self.sum += np.bincount(ids, weights=ratings, minlength=size)
+        self.sum_sq += np.bincount(ids, weights=ratings * ratings, minlength=size)
+        if timestamps is not None:
+            np.minimum.at(self.first_ts, ids, timestamps)
+            np.maximum.at(self.last_ts, ids, timestamps)
+
+    def to_arrays(self, id_name: str) -> dict:
+        """Arrays for the ids that have at least one rating."""
+        ids = np.flatnonzero(self.count).astype(np.int32)
+        count = self.count[ids]
+        mean = self.sum[ids] / count
+        variance = np.maximum(self.sum_sq[ids] / count - mean * mean, 0.0)
+        return {
+            id_name: ids,
+            "count": count,
+            "sum": self.sum[ids],
+            "sum_sq": self.sum_sq[ids],
+            "mean": mean.astype(np.float32),
+            "std": np.sqrt(variance).astype(np.float32),
+            "first_ts": self.first_ts[ids],
+            "last_ts": self.last_ts[ids],
+        }
+
+
+def aggregate_ratings(path: str, chunk_size: int = DEFAULT_CHUNK_SIZE, on_progress=None) -> dict:
+    """Stream ``path`` once; returns {"movies": stats, "users": stats, "report": {...}}."""
+    movies, users = RunningStats(), RunningStats()
+    rows = skipped = chunks = 0
+    start = time.perf_counter()
+    for chunk in iter_rating_chunks(path, chunk_size):
+        user_ids = chunk["userId"].to_numpy()
+        movie_ids = chunk["movieId"].to_numpy()
+        ratings = chunk["rating"].to_numpy()
+        timestamps = chunk["timestamp"].to_numpy()
+
+        valid = (user_ids >= 0) & (movie_ids >= 0) & np.isfinite(ratings)
+        if not valid.all():
+            skipped += int((~valid).sum())
+            user_ids, movie_ids, ratings, timestamps = (
+                user_ids[valid], movie_ids[valid], ratings[valid], timestamps[valid]
+            )
+        movies.update(movie_ids, ratings, timestamps)
+        users.update(user_ids, ratings, timestamps)
+        rows += len(ratings)
+        chunks += 1
+        if on_progress:
+            on_progress(_report(rows, skipped, chunks, start))
+    return {"movies": movies, "users": users, "report": _report(rows, skipped, chunks, start, done=True)}
+
+
+def _report(rows: int, skipped: int, chunks: int, start: float, done: bool = False) -> dict:
+    seconds = time.perf_counter() - start
+    report = {
+        "rows": rows,
+        "skipped": skipped,
+        "chunks": chunks,
+        "seconds": round(seconds, 3),
+        "rows_per_s": round(rows / seconds, 1) if seconds > 0 else 0.0,
+        "done": done,
+    }
+    if resource is not None:
+        # ru_maxrss is KiB on Linux
+        report["peak_rss_mb"] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    return report
+
+
+# --- Artifacts ---
+
+def write_stats(stats: RunningStats, path: str, id_name: str, **extra):
+    """Write one stats artifact atomically."""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)),
+                                    prefix=f"{os.path.basename(path)}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            np.savez(f, **stats.to_arrays(id_name), **extra)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def read_stats(path: str) -> dict:
+    with np.load(path) as data:
+        return {name: data[name] for name in data.files}
+
+
+def run(path: str = RATINGS_PATH, movie_stats_path: str = MOVIE_RATING_STATS_PATH,
+        user_stats_path: str = USER_RATING_STATS_PATH, chunk_size: int = DEFAULT_CHUNK_SIZE,
+        on_progress=None) -> dict:
+    """Aggregate the ratings under ``path`` and write both artifacts; returns the report."""
+    result = aggregate_ratings(path, chunk_size, on_progress)
+    rows = np.array(result["report"]["rows"])
+    write_stats(result["movies"], movie_stats_path, "movie_id", rows=rows)
+    write_stats(result["users"], user_stats_path, "user_id", rows=rows)
+    return result["report"]
+
+
+# --- Benchmark ---
+
+def write_synthetic_ratings(path: str, n_rows: int, n_users: int = 160_000, n_movies: int = 60_000,
+                            chunk_size: int = 1_000_000, seed: int = 0):
+    """MovieLens-shaped CSV of n_rows ratings, written chunk by chunk."""
+    rng = np.random.default_rng(seed)
+    popularity = 1.0 / np.arange(1, n_movies + 1) ** 0.8
+    popularity /= popularity.sum()
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("userId,movieId,rating,timestamp\n")
+        for start in range(0, n_rows, chunk_size):
+            n = min(chunk_size, n_rows - start)
+            pd.DataFrame({
+                "userId": rng.integers(1, n_users + 1, size=n, dtype=np.int32),
+                "movieId": rng.choice(n_movies, size=n, p=popularity).astype(np.int32) + 1,
+                "rating": rng.integers(1, 11, size=n) / 2,
+                "timestamp": rng.integers(800_000_000, 1_700_000_000, size=n, dtype=np.int64),
+            }).to_csv(f, header=False, index=False)
+
+
+def benchmark(sizes, chunk_size: int = DEFAULT_CHUNK_SIZE) -> list:
+    """Throughput and peak RSS per synthetic file size, one fresh process each."""
+    report = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_rows in sizes:
+            csv_path = os.path.join(tmp, f"ratings_{n_rows}.csv")
+            write_synthetic_ratings(csv_path, n_rows)
+            out = subprocess.run(
+                [sys.executable, "-m", "backend.ai.ratings_pipeline", "run", csv_path,
+                 "--chunk-size", str(chunk_size), "--quiet",
+                 "--movie-stats", os.path.join(tmp, "movies.npz"),
+                 "--user-stats", os.path.join(tmp, "users.npz")],
+                check=True, capture_output=True, text=True,
+                cwd=os.path.dirname(MODELS_DIR),
+            )
+            final = json.loads(out.stdout.strip().splitlines()[-1])
+            final["file_mb"] = round(os.path.getsize(csv_path) / 1e6, 1)
+            report.append(final)
+            os.remove(csv_path)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream ratings into per-movie / per-user aggregate artifacts.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run_cmd = sub.add_parser("run")
+    run_cmd.add_argument("path", nargs="?", default=RATINGS_PATH, help="ratings CSV or a directory of them")
+    run_cmd.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    run_cmd.add_argument("--movie-stats", default=MOVIE_RATING_STATS_PATH)
+    run_cmd.add_argument("--user-stats", default=USER_RATING_STATS_PATH)
+    run_cmd.add_argument("--quiet", action="store_true", help="only print the final report")
+
+    bench_cmd = sub.add_parser("bench")
+    bench_cmd.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000, 5_000_000, 25_000_000])
+    bench_cmd.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    if args.command == "bench":
+        print(json.dumps(benchmark(args.rows, args.chunk_size), indent=2))
+        return
+
+    on_progress = None if args.quiet else (lambda progress: print(json.dumps(progress), flush=True))
+    report = run(args.path, args.movie_stats, args.user_stats, args.chunk_size, on_progress)
+    print(json.dumps(report))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Cluster-partitioned candidate pools for surprise picks.
+
+For each mood the candidate movies are sorted by ``vibe_cluster`` once, so
+each cluster is a contiguous slice. A surprise pick draws uniformly from
+all candidates outside a set of excluded clusters (the clusters of the
+mood's top recommendations) in constant time: pick a random position in
+the concatenation of the allowed slices and map it back with a search over
+the handful of cluster boundaries.
+"""
+
+import numpy as np
+
+
+class ClusterPool:
+    """Candidate indices of one mood, partitioned by vibe cluster."""
+
+    def __init__(self, candidate_indices, clusters):
+        candidate_indices = np.asarray(candidate_indices)
+        clusters = np.asarray(clusters)
+        order = np.argsort(clusters, kind="stable")
+
+        self.indices = candidate_indices[order]
+        self.cluster_ids, self.starts, self.sizes = np.unique(
+            clusters[order], return_index=True, return_counts=True
+        )
+        # frozenset(excluded clusters) → (slice starts, cumulative sizes)
+        self._allowed = {}
+
+    def __len__(self) -> int:
+        return len(self.indices)
+
+    def partition(self, cluster_id) -> np.ndarray:
+        """Candidate indices in one cluster."""
+        pos = np.searchsorted(self.cluster_ids, cluster_id)
+        if pos == len(self.cluster_ids) or self.cluster_ids[pos] != cluster_id:
+            return self.indices[:0]
+        return self.indices[self.starts[pos]:self.starts[pos] + self.sizes[pos]]
+
+    def _allowed_slices(self, exclude: frozenset):
+        entry = self._allowed.get(exclude)
+        if entry is None:
+            keep = ~np.isin(self.cluster_ids, list(exclude))
+            if not keep.any():
+                # Every candidate is in an excluded cluster: draw from all of them
+                keep[:] = True
+            entry = (self.starts[keep], np.cumsum(self.sizes[keep]))
+            self._allowed[exclude] = entry
+        return entry
+
+    def draw(self, rng: np.random.Generator, exclude=frozenset()) -> int:
+        """Uniform random candidate outside the excluded clusters."""
+        starts, cumulative = self._allowed_slices(frozenset(exclude))
+        r = int(rng.integers(cumulative[-1]))
+        part = int(np.searchsorted(cumulative, r, side="right"))
+        offset = r - (int(cumulative[part - 1]) if part else 0)
+        return int(self.indices[starts[part] + offset])
@@ -0,0 +1,472 @@
+"""Dense movie embeddings: encoder, memory-mapped vector store and IVF index.
+
+Movie text (title, genres, description) is embedded in batches into unit
+float32 vectors. Row ``i`` of ``vectors.npy`` is the vector of the movie with
+``Movie.vector_id == i``; the file is opened memory-mapped, so only the
+pages a query touches are read. Nearest-neighbor queries go through an
+in-process IVF index: spherical k-means centroids, every vector filed under
+its closest centroid, and a query scans only the ``nprobe`` closest lists.
+
+Encoders (``VYBER_EMBEDDING_BACKEND``):
+
+- ``lsa`` (default): TF-IDF + truncated SVD fitted on the catalog itself.
+  Fully local, no model download, a few seconds to fit.
+- ``transformer``: mean-pooled HuggingFace encoder
+  (``VYBER_EMBEDDING_MODEL``, default sentence-transformers/all-MiniLM-L6-v2
+  or a local model directory).
+
+An index directory holds ``vectors.npy``, ``movie_ids.npy`` (vector_id →
+Movie.id), ``ivf.npz``, ``encoder.joblib`` and ``meta.json``.
+``backend/embed_movies.py`` builds one per run under the embeddings root
+(``models/embeddings/<version>/`` by default) and publishes it by atomically
+replacing the root's ``CURRENT`` pointer file, so readers always see either
+the previous or the new index, never none.
+
+    index = SemanticIndex.load()  # the published version
+    index.search_text("a gentle story about grief and friendship", k=10)
+
+Benchmark from the ``main/`` directory:
+
+    python -m backend.ai.vector_index bench --vectors 100000 300000 --dim 128
+"""
+
+import os
+import argparse
+import json
+import secrets
+import shutil
+import tempfile
+import time
+import joblib
+import numpy as np
+
+MODELS_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "models"))
+
+EMBEDDINGS_DIR = os.getenv("VYBER_EMBEDDINGS_DIR", os.path.join(MODELS_DIR, "embeddings"))
+EMBEDDING_BACKEND = os.getenv("VYBER_EMBEDDING_BACKEND", "lsa").strip().lower()
+EMBEDDING_MODEL = os.getenv("VYBER_EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+EMBEDDING_DIM = int(os.getenv("VYBER_EMBEDDING_DIM", "128"))
+DEFAULT_NPROBE = int(os.getenv("VYBER_ANN_NPROBE", "8"))
+
+VECTORS_FILE = "vectors.npy"
+MOVIE_IDS_FILE = "movie_ids.npy"
+IVF_FILE = "ivf.npz"
+ENCODER_FILE = "encoder.joblib"
+META_FILE = "meta.json"
+CURRENT_FILE = "CURRENT"  # name of the published version directory
+
+
+def movie_text(title, genres=None, description=None) -> str:
+    """Text embedded for one movie."""
+    genres = (genres or "").replace(",", ", ").replace("|", ", ")
+    return ". ".join(part for part in (title or "", genres, description or "") if part)
+
+
+def _unit_rows(x: np.ndarray) -> np.ndarray:
+    x = np.asarray(x, dtype=np.float32)
+    norms = np.linalg.norm(x, axis=1, keepdims=True)
+    return np.divide(x, norms, out=np.zeros_like(x), where=norms > 0)
+
+
+# --- Encoders ---
+
+class LsaEncoder:
+    """TF-IDF (words + bigrams) projected onto ``dim`` SVD components."""
+
+    backend = "lsa"
+    needs_fit = True
+
+    def __init__(self, dim: int = EMBEDDING_DIM, max_fit_docs: int = 100_000):
+        self.dim = dim
+        self.max_fit_docs = max_fit_docs
+        self.vectorizer = None
+        self.svd = None
+
+    def fit(self, texts, seed: int = 0):
+        from sklearn.decomposition import TruncatedSVD
+        from sklearn.feature_extraction.text import TfidfVectorizer
+
+        texts = list(texts)
+        if len(texts) > self.max_fit_docs:
+            rng = np.random.default_rng(seed)
+            texts = [texts[i] for i in rng.choice(len(texts), self.max_fit_docs, replace=False)]
+        self.vectorizer = TfidfVectorizer(
+            sublinear_tf=True,
+            ngram_range=(1, 2),
+            min_df=2 if len(texts) >= 1000 else 1,
+            max_features=200_000,
+            stop_words="english",
+        )
+        features = self.vectorizer.fit_transform(texts)
+        self.dim = max(1, min(self.dim, features.shape[1] - 1))
+        self.svd = TruncatedSVD(n_components=self.dim, random_state=seed).fit(features)
+        # Fewer documents than components: the SVD keeps fewer of them
+        self.dim = self.svd.components_.shape[0]
+        return self
+
+    def encode(self, texts, batch_size: int = 1024) -> np.ndarray:
+        texts = list(texts)
+        out = np.empty((len(texts), self.dim), dtype=np.float32)
+        for start in range(0, len(texts), batch_size):
+            block = self.svd.transform(self.vectorizer.transform(texts[start:start + batch_size]))
+            out[start:start + batch_size] = _unit_rows(block)
+        return out
+
+
+class TransformerEncoder:
+    """Mean-pooled token embeddings of a HuggingFace encoder model."""
+
+    backend = "transformer"
+    needs_fit = False
+
+    def __init__(self, model_name: str = EMBEDDING_MODEL, max_length: int = 256):
+        self.model_name = model_name
+        self.max_length = max_length
+        self._load()
+
+    def _load(self):
+        # Imported here so that importing this module does not pull in torch
+        from transformers import AutoModel, AutoTokenizer
+
+        self.tokenizer = AutoTokenizer.from_pretrained(self.model_name)
+        self.model = AutoModel.from_pretrained(self.model_name).eval()
+        self.dim = int(self.model.config.hidden_size)
+
+    def __getstate__(self):
+        # Persist the model reference, not the weights
+        return {"model_name": self.model_name, "max_length": self.max_length}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._load()
+
+    def fit(self, texts, seed: int = 0):
+        return self
+
+    def encode(self, texts, batch_size: int = 64) -> np.ndarray:
+        import torch
+
+        texts = list(texts)
+        out = np.empty((len(texts), self.dim), dtype=np.float32)
+        with torch.no_grad():
+            for start in range(0, len(texts), batch_size):
+                encoded = self.tokenizer(
+                    texts[start:start + batch_size],
+                    padding=True,
+                    truncation=True,
+                    max_length=self.max_length,
+                    return_tensors="pt",
+                )
+                hidden = self.model(**encoded).last_hidden_state
+                mask = encoded["attention_mask"].unsqueeze(-1).to(hidden.dtype)
+                pooled = (hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1)
+                out[start:start + batch_size] = _unit_rows(pooled.numpy())
+        return out
+
+
+def make_encoder(backend: str = EMBEDDING_BACKEND):
+    if backend == "lsa":
+        return LsaEncoder()
+    if backend == "transformer":
+        return TransformerEncoder()
+    raise ValueError(f"Unsupported embedding backend: {backend!r} (use 'lsa' or 'transformer')")
+
+
+# --- Vector store ---
+
+def create_vector_file(path: str, n_vectors: int, dim: int) -> np.memmap:
+    """Writable memory-mapped float32 matrix (an .npy file, so it has a header)."""
+    return np.lib.format.open_memmap(path, mode="w+", dtype=np.float32, shape=(n_vectors, dim))
+
+
+def open_vector_file(path: str) -> np.memmap:
+    return np.load(path, mmap_mode="r")
+
+
+# --- IVF index ---
+
+def train_centroids(vectors, n_lists: int, iterations: int = 10, sample_size: int = 50_000,
+                    chunk_size: int = 8192, seed: int = 0) -> np.ndarray:
+    """Spherical k-means on a sample of the (unit) vectors."""
+    rng = np.random.default_rng(seed)
+    n_vectors = len(vectors)
+    sample_ids = np.sort(rng.choice(n_vectors, min(sample_size, n_vectors), replace=False))
+    sample = np.asarray(vectors[sample_ids], dtype=np.float32)
+    n_lists = max(1, min(n_lists, len(sample)))
+    centroids = sample[rng.choice(len(sample), n_lists, replace=False)].copy()
+
+    for _ in range(iterations):
+        assignment = assign_lists(sample, centroids, chunk_size)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignment, sample)
+        counts = np.bincount(assignment, minlength=n_lists)
+        empty = counts == 0
+        if empty.any():
+            # Re-seed empty lists from random sample points
+            sums[empty] = sample[rng.choice(len(sample), int(empty.sum()), replace=False)]
+        centroids = _unit_rows(sums)
+    return centroids
+
+
+def assign_lists(vectors, centroids: np.ndarray, chunk_size: int = 8192) -> np.ndarray:
+    """Closest centroid (highest dot product) of every vector, in chunks."""
+    assignment = np.empty(len(vectors), dtype=np.int32)
+    for start in range(0, len(vectors), chunk_size):
+        block = np.asarray(vectors[start:start + chunk_size], dtype=np.float32)
+        assignment[start:start + chunk_size] = np.argmax(block @ centroids.T, axis=1)
+    return assignment
+
+
+class IvfIndex:
+    """Inverted lists over a vector matrix: ids grouped by closest centroid."""
+
+    def __init__(self, centroids: np.ndarray, ids: np.ndarray, offsets: np.ndarray):
+        self.centroids = centroids
+        self.ids = ids          # vector ids, grouped by list
+        self.offsets = offsets  # list j is ids[offsets[j]:offsets[j + 1]]
+
+    @classmethod
+    def build(cls, vectors, n_lists: int = None, iterations: int = 10, seed: int = 0) -> "IvfIndex":
+        # ~sqrt(N) lists balances the centroid scan against the list scans
+        n_lists = n_lists or max(1, int(np.sqrt(len(vectors))))
+        centroids = train_centroids(vectors, n_lists, iterations=iterations, seed=seed)
+        assignment = assign_lists(vectors, centroids)
+        ids = np.argsort(assignment, kind="stable").astype(np.int32)
+        offsets = np.concatenate([[0], np.cumsum(np.bincount(assignment, minlength=len(centroids)))])
+        return cls(centroids, ids, offsets.astype(np.int64))
+
+    @property
+    def n_lists(self) -> int:
+        return len(self.centroids)
+
+    def save(self, path: str):
+        np.savez(path, centroids=self.centroids, ids=self.ids, offsets=self.offsets)
+
+    @classmethod
+    def load(cls, path: str) -> "IvfIndex":
+        with np.load(path) as data:
+            return cls(data["centroids"], data["ids"], data["offsets"])
+
+    def search(self, vectors, query: np.ndarray, k: int = 10, nprobe: int = DEFAULT_NPROBE):
+        """(vector_ids, scores) of the k best matches among the nprobe closest lists."""
+        query = np.asarray(query, dtype=np.float32).ravel()
+        nprobe = max(1, min(nprobe, self.n_lists))
+        centroid_scores = self.centroids @ query
+        probe = np.argpartition(-centroid_scores, nprobe - 1)[:nprobe]
+        candidates = np.concatenate([self.ids[self.offsets[j]:self.offsets[j + 1]] for j in probe])
+        if len(candidates) == 0:
+            return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float32)
+        candidates.sort()  # sequential reads from the memory map
+        scores = np.asarray(vectors[candidates]) @ query
+        return _top_k(candidates, scores, k)
+
+
+def exact_search(vectors, query: np.ndarray, k: int = 10, chunk_size: int = 65536):
+    """Brute-force (vector_ids, scores), the reference for recall."""
+    query = np.asarray(query, dtype=np.float32).ravel()
+    scores = np.concatenate([
+        np.asarray(vectors[start:start + chunk_size]) @ query
+        for start in range(0, len(vectors), chunk_size)
+    ])
+    return _top_k(np.arange(len(vectors), dtype=np.int32), scores, k)
+
+
+def _top_k(ids: np.ndarray, scores: np.ndarray, k: int):
+    k = min(k, len(scores))
+    top = np.argpartition(-scores, k - 1)[:k] if k < len(scores) else np.arange(len(scores))
+    top = top[np.argsort(-scores[top], kind="stable")]
+    return ids[top], scores[top]
+
+
+# --- Index directory ---
+
+class SemanticIndex:
+    """Encoder + memory-mapped vectors + IVF lists of one index directory."""
+
+    def __init__(self, encoder, vectors, ivf: IvfIndex, movie_ids: np.ndarray, meta: dict):
+        self.encoder = encoder
+        self.vectors = vectors
+        self.ivf = ivf
+        self.movie_ids = movie_ids
+        self.meta = meta
+
+    @classmethod
+    def load(cls, path: str = None) -> "SemanticIndex":
+        """Load one index directory (default: the published one under EMBEDDINGS_DIR)."""
+        path = path or current_index_dir()
+        if path is None:
+            raise FileNotFoundError(f"No semantic index published under {EMBEDDINGS_DIR}")
+        with open(os.path.join(path, META_FILE), encoding="utf-8") as f:
+            meta = json.load(f)
+        return cls(
+            encoder=joblib.load(os.path.join(path, ENCODER_FILE)),
+            vectors=open_vector_file(os.path.join(path, VECTORS_FILE)),
+            ivf=IvfIndex.load(os.path.join(path, IVF_FILE)),
+            movie_ids=np.load(os.path.join(path, MOVIE_IDS_FILE)),
+            meta=meta,
+        )
+
+    def __len__(self) -> int:
+        return len(self.vectors)
+
+    def search_vector(self, query: np.ndarray, k: int = 10, nprobe: int = DEFAULT_NPROBE):
+        return self.ivf.search(self.vectors, query, k, nprobe)
+
+    def search_text(self, text: str, k: int = 10, nprobe: int = DEFAULT_NPROBE):
+        """[(vector_id, score), ...] for a free-text query, best first."""
+        ids, scores = self.search_vector(self.encoder.encode([text])[0], k, nprobe)
+        return [(int(i), float(s)) for i, s in zip(ids, scores)]
+
+
+# --- Publishing ---
+
+def current_index_dir(root: str = EMBEDDINGS_DIR):
+    """Directory of the published index under root, or None if there is none."""
+    try:
+        with open(os.path.join(root, CURRENT_FILE), encoding="utf-8") as f:
+            version = f.read().strip()
+    except FileNotFoundError:
+        # Layout before versioned publishing: the index files in root itself
+        return root if os.path.exists(os.path.join(root, META_FILE)) else None
+    return os.path.join(root, version)
+
+
+def new_index_dir(root: str = EMBEDDINGS_DIR) -> str:
+    """A fresh, not yet published version directory under root."""
+    version = f"{time.strftime('%Y%m%d-%H%M%S')}-{secrets.token_hex(3)}"
+    path = os.path.join(root, version)
+    os.makedirs(path)
+    return path
+
+
+def publish_index(root: str, version_dir: str, keep: int = 2):
+    """Point root's CURRENT at version_dir (one os.replace) and prune old versions.
+
+    The newest ``keep`` versions stay on disk: a reader that resolved the
+    previous pointer just before the switch can still load it.
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=root, prefix=f"{CURRENT_FILE}.", suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(os.path.basename(version_dir))
+    os.replace(tmp_path, os.path.join(root, CURRENT_FILE))
+
+    versions = sorted(
+        entry.name for entry in os.scandir(root)
+        if entry.is_dir() and os.path.exists(os.path.join(entry.path, META_FILE))
+    )
+    current = os.path.basename(version_dir)
+    for name in versions[:-keep] if keep else versions:
+        if name != current:
+            shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+    # Index files of the pre-versioning layout, now unreachable
+    for name in (VECTORS_FILE, MOVIE_IDS_FILE, IVF_FILE, ENCODER_FILE, META_FILE):
+        legacy = os.path.join(root, name)
+        if os.path.isfile(legacy):
+            os.remove(legacy)
+
+
+def write_index(path: str, encoder, vectors, movie_ids, n_lists: int = None, seed: int = 0) -> dict:
+    """Train the IVF lists over a filled vector file and write the rest of the directory."""
+    start = time.perf_counter()
+    ivf = IvfIndex.build(vectors, n_lists=n_lists, seed=seed)
+    ivf.save(os.path.join(path, IVF_FILE))
+    np.save(os.path.join(path, MOVIE_IDS_FILE), np.asarray(movie_ids, dtype=np.int64))
+    joblib.dump(encoder, os.path.join(path, ENCODER_FILE))
+    meta = {
+        "backend": encoder.backend,
+        "dim": int(vectors.shape[1]),
+        "vectors": int(len(vectors)),
+        "n_lists": ivf.n_lists,
+        "version": os.path.basename(os.path.abspath(path)),
+        "ivf_seconds": round(time.perf_counter() - start, 3),
+        "created_at": time.time(),
+    }
+    with open(os.path.join(path, META_FILE), "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+    return meta
+
+
+# --- Benchmark ---
+
+def synthetic_vectors(n_vectors: int, dim: int, n_topics: int = 2000, noise: float = 0.6, seed: int = 0):
+    """Unit vectors scattered around random topic directions (embedding-like)."""
+    rng = np.random.default_rng(seed)
+    topics = _unit_rows(rng.standard_normal((n_topics, dim)))
+    out = np.empty((n_vectors, dim), dtype=np.float32)
+    for start in range(0, n_vectors, 65536):
+        n = min(65536, n_vectors - start)
+        block = topics[rng.integers(0, n_topics, n)] + noise * rng.standard_normal((n, dim)) / np.sqrt(dim)
+        out[start:start + n] = _unit_rows(block)
+    return out
+
+
+def benchmark(sizes, dim: int = EMBEDDING_DIM, queries: int = 200, k: int = 10, nprobes=(4, 8, 16, 32),
+              seed: int = 0) -> list:
+    """IVF build time, query latency and recall@k against exact search."""
+    import tempfile
+
+    rng = np.random.default_rng(seed + 1)
+    report = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_vectors in sizes:
+            path = os.path.join(tmp, f"vectors_{n_vectors}.npy")
+            vectors = create_vector_file(path, n_vectors, dim)
+            vectors[:] = synthetic_vectors(n_vectors, dim, seed=seed)
+            vectors.flush()
+            del vectors
+            vectors = open_vector_file(path)
+
+            start = time.perf_counter()
+            ivf = IvfIndex.build(vectors, seed=seed)
+            build_seconds = time.perf_counter() - start
+
+            query_ids = rng.choice(n_vectors, queries, replace=False)
+            probes = _unit_rows(np.asarray(vectors[query_ids]) + 0.3 * rng.standard_normal((queries, dim)) / np.sqrt(dim))
+            exact = [set(exact_search(vectors, q, k)[0].tolist()) for q in probes]
+
+            exact_ms = []
+            for q in probes[:20]:
+                t = time.perf_counter()
+                exact_search(vectors, q, k)
+                exact_ms.append((time.perf_counter() - t) * 1000)
+
+            row = {
+                "vectors": n_vectors,
+                "dim": dim,
+                "n_lists": ivf.n_lists,
+                "build_seconds": round(build_seconds, 2),
+                "file_mb": round(os.path.getsize(path) / 1e6, 1),
+                "exact_p50_ms": round(float(np.percentile(exact_ms, 50)), 3),
+                "ivf": [],
+            }
+            for nprobe in nprobes:
+                latencies, hits = [], 0
+                for q, truth in zip(probes, exact):
+                    t = time.perf_counter()
+                    ids, _ = ivf.search(vectors, q, k, nprobe)
+                    latencies.append((time.perf_counter() - t) * 1000)
+                    hits += len(truth & set(ids.tolist()))
+                row["ivf"].append({
+                    "nprobe": nprobe,
+                    "p50_ms": round(float(np.percentile(latencies, 50)), 3),
+                    "p99_ms": round(float(np.percentile(latencies, 99)), 3),
+                    f"recall@{k}": round(hits / (k * queries), 4),
+                })
+            report.append(row)
+            del vectors
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the IVF vector index.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    bench_cmd = sub.add_parser("bench")
+    bench_cmd.add_argument("--vectors", type=int, nargs="+", default=[100_000, 300_000])
+    bench_cmd.add_argument("--dim", type=int, default=EMBEDDING_DIM)
+    bench_cmd.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+    print(json.dumps(benchmark(args.vectors, args.dim, args.queries), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""Latency of /movies paging and search as the movie table grows.
+
+Fills a throwaway SQLite database with synthetic movies in steps and, at
+each size, times the queries behind ``GET /movies`` (keyset page) and
+``GET /movies/search`` (FTS5), next to the old load-everything-and-slice
+listing for comparison. From the ``main/`` directory:
+
+    python -m backend.bench_movies --sizes 25000 50000 100000 200000
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sqlite3
+import tempfile
+import time
+import numpy as np
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from backend.main import Movie, create_db_and_tables, movies_page, search_movies
+
+
+def _make_vocabulary(size: int, rng: random.Random) -> list:
+    # Pronounceable pseudo-words, so match counts look like a real catalog's
+    # (a handful of English words would match a large share of all rows)
+    consonants, vowels = "bcdfghjklmnprstvwz", "aeiou"
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(consonants) + rng.choice(vowels) for _ in range(rng.randint(2, 4))))
+    return sorted(words)
+
+
+def _insert_movies(db_path: str, start: int, stop: int, words: list, rng: random.Random, chunk_size: int = 10000):
+    # Plain sqlite3 for speed; the FTS triggers index every row
+    conn = sqlite3.connect(db_path)
+    try:
+        for chunk_start in range(start, stop, chunk_size):
+            rows = [
+                (
+                    " ".join(rng.choices(words, k=3)).title() + f" {i}",
+                    " ".join(rng.choices(words, k=20)) + ".",
+                    "Drama,Comedy",
+                )
+                for i in range(chunk_start, min(chunk_start + chunk_size, stop))
+            ]
+            conn.executemany("INSERT INTO movie (title, description, genres) VALUES (?, ?, ?)", rows)
+            conn.commit()
+    finally:
+        conn.close()
+
+
+async def _time(fn, repeats: int) -> dict:
+    latencies = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        await fn()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return {
+        "p50_ms": round(float(np.percentile(latencies, 50)), 3),
+        "p99_ms": round(float(np.percentile(latencies, 99)), 3),
+    }
+
+
+async def run(sizes, repeats: int = 200, full_scan_repeats: int = 5, vocabulary: int = 20000, seed: int = 0) -> list:
+    rng = random.Random(seed)
+    words = _make_vocabulary(vocabulary, rng)
+    report = []
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        db_engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}")
+        await create_db_and_tables(db_engine)
+        sessions = async_sessionmaker(db_engine, class_=AsyncSession, expire_on_commit=False)
+
+        rows = 0
+        for size in sorted(sizes):
+            _insert_movies(db_path, rows, size, words, rng)
+            rows = size
+            async with sessions() as session:
+                async def page():
+                    await movies_page(session, after_id=rng.randrange(rows), limit=50)
+
+                async def search():
+                    await search_movies(session, rng.choice(words) + " " + rng.choice(words)[:3], limit=20)
+
+                async def old_listing():
+                    # Previous /movies: load the whole table, slice in Python
+                    movies = (await session.exec(select(Movie))).all()
+                    return movies[:50]
+
+                report.append({
+                    "rows": rows,
+                    "keyset_page": await _time(page, repeats),
+                    "fts_search": await _time(search, repeats),
+                    "old_full_scan_listing": await _time(old_listing, full_scan_repeats),
+                })
+        await db_engine.dispose()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark /movies paging and FTS search.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[25000, 50000, 100000, 200000])
+    parser.add_argument("--repeats", type=int, default=200)
+    parser.add_argument("--full-scan-repeats", type=int, default=5)
+    parser.add_argument("--vocabulary", type=int, default=20000, help="distinct words in synthetic text")
+    args = parser.parse_args()
+    report = asyncio.run(run(args.sizes, args.repeats, args.full_scan_repeats, args.vocabulary))
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
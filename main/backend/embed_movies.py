@@ -0,0 +1,145 @@
+"""Embed the Movie table into the semantic index and fill Movie.vector_id.
+
+Movies are read in keyset chunks of ``chunk_size`` rows, their text (title,
+genres, description) embedded in batches and written straight into the
+memory-mapped vector file, so memory stays bounded by the chunk size plus
+the encoder. Vector ``i`` belongs to the i-th movie by id, and
+``Movie.vector_id`` is set to ``i``. Each run builds a new version directory
+and publishes it atomically when complete (see
+``backend.ai.vector_index.publish_index``); a running API picks it up on its
+next query.
+
+From the ``main/`` directory (after ``python -m backend.ingest ...``):
+
+    python -m backend.embed_movies
+    VYBER_EMBEDDING_BACKEND=transformer python -m backend.embed_movies --batch-size 64
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import shutil
+import time
+import numpy as np
+from sqlalchemy import bindparam, func, select, update
+
+from backend.ai.vector_index import (
+    EMBEDDING_BACKEND,
+    EMBEDDINGS_DIR,
+    VECTORS_FILE,
+    create_vector_file,
+    make_encoder,
+    movie_text,
+    new_index_dir,
+    publish_index,
+    write_index,
+)
+from backend.main import DATABASE_URL, Movie, create_db_and_tables, create_db_engine
+
+DEFAULT_CHUNK_SIZE = 5000
+
+
+async def _movie_chunks(db_engine, chunk_size: int, limit: int, stride: int = 1):
+    """Yield [(id, text), ...] chunks by id; every stride-th movie only."""
+    last_id, seen = 0, 0
+    while seen < limit:
+        async with db_engine.connect() as conn:
+            rows = (await conn.execute(
+                select(Movie.id, Movie.title, Movie.genres, Movie.description)
+                .where(Movie.id > last_id)
+                .order_by(Movie.id)
+                .limit(min(chunk_size, limit - seen))
+            )).all()
+        if not rows:
+            return
+        last_id = rows[-1][0]
+        chunk = [(movie_id, movie_text(title, genres, description))
+                 for i, (movie_id, title, genres, description) in enumerate(rows, start=seen) if i % stride == 0]
+        seen += len(rows)
+        yield chunk
+
+
+async def _write_vector_ids(db_engine, movie_ids: np.ndarray, chunk_size: int):
+    stmt = update(Movie).where(Movie.id == bindparam("b_id")).values(vector_id=bindparam("b_vector_id"))
+    async with db_engine.begin() as conn:
+        await conn.execute(update(Movie).values(vector_id=None))
+        for start in range(0, len(movie_ids), chunk_size):
+            rows = [{"b_id": int(movie_id), "b_vector_id": start + i}
+                    for i, movie_id in enumerate(movie_ids[start:start + chunk_size].tolist())]
+            await conn.execute(stmt, rows)
+
+
+async def embed_movies(database_url: str = DATABASE_URL, out_dir: str = EMBEDDINGS_DIR,
+                       backend: str = EMBEDDING_BACKEND, batch_size: int = None,
+                       chunk_size: int = DEFAULT_CHUNK_SIZE, n_lists: int = None, on_progress=print) -> dict:
+    """Embed every movie, build the IVF index in out_dir and set Movie.vector_id."""
+    db_engine = create_db_engine(database_url)
+    started = time.perf_counter()
+    try:
+        await create_db_and_tables(db_engine)
+        async with db_engine.connect() as conn:
+            n_movies = (await conn.execute(select(func.count(Movie.id)))).scalar() or 0
+        if n_movies == 0:
+            raise ValueError("The movie table is empty; load a catalog first (python -m backend.ingest)")
+
+        encoder = make_encoder(backend)
+        if encoder.needs_fit:
+            # Fit on an evenly spaced sample of at most max_fit_docs movies
+            stride = max(1, math.ceil(n_movies / encoder.max_fit_docs))
+            texts = [text async for chunk in _movie_chunks(db_engine, chunk_size, n_movies, stride) for _, text in chunk]
+            encoder.fit(texts)
+            del texts
+
+        os.makedirs(out_dir, exist_ok=True)
+        version_dir = new_index_dir(out_dir)
+        try:
+            vectors = create_vector_file(os.path.join(version_dir, VECTORS_FILE), n_movies, encoder.dim)
+            movie_ids = np.zeros(n_movies, dtype=np.int64)
+
+            position = 0
+            encode_kwargs = {"batch_size": batch_size} if batch_size else {}
+            async for chunk in _movie_chunks(db_engine, chunk_size, n_movies):
+                ids, texts = zip(*chunk)
+                vectors[position:position + len(ids)] = encoder.encode(texts, **encode_kwargs)
+                movie_ids[position:position + len(ids)] = ids
+                position += len(ids)
+                if on_progress:
+                    seconds = time.perf_counter() - started
+                    on_progress(json.dumps({"embedded": position, "of": n_movies, "movies_per_s": round(position / seconds, 1)}))
+            vectors.flush()
+            # Movies deleted since the count leave unused zero rows at the end
+            vectors, movie_ids = vectors[:position], movie_ids[:position]
+
+            meta = write_index(version_dir, encoder, vectors, movie_ids, n_lists=n_lists)
+            del vectors
+        except BaseException:
+            shutil.rmtree(version_dir, ignore_errors=True)
+            raise
+        publish_index(out_dir, version_dir)
+
+        await _write_vector_ids(db_engine, movie_ids, chunk_size)
+        report = {**meta, "seconds": round(time.perf_counter() - started, 3), "path": version_dir}
+        if on_progress:
+            on_progress(json.dumps(report))
+        return report
+    finally:
+        await db_engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Embed the Movie table into the semantic (IVF) index.")
+    parser.add_argument("--database-url", default=DATABASE_URL)
+    parser.add_argument("--output", default=EMBEDDINGS_DIR)
+    parser.add_argument("--backend", choices=["lsa", "transformer"], default=EMBEDDING_BACKEND)
+    parser.add_argument("--batch-size", type=int, default=None, help="texts per encoder call")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="movies read per query")
+    parser.add_argument("--lists", type=int, default=None, help="IVF lists (default ~sqrt(N))")
+    args = parser.parse_args()
+    asyncio.run(embed_movies(args.database_url, args.output, args.backend, args.batch_size,
+                             args.chunk_size, args.lists))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""Group-commit writer for high-volume inserts such as /feedback.
+
+Request handlers enqueue rows and return immediately. One background task
+drains the bounded queue and inserts up to ``max_batch_size`` rows per
+transaction, waiting at most ``max_wait_ms`` after the first row of a batch
+arrives, so N clicks cost one commit (and one fsync) instead of N.
+
+    writer = GroupCommitWriter(async_session, Feedback, max_batch_size=200, max_wait_ms=50)
+    await writer.start()                      # in the app lifespan
+    await writer.submit({"user_id": 1, "movie_id": 2, "rating": 5})
+    await writer.stop()                       # flushes what is still queued
+
+When the queue is full, ``submit`` waits up to ``put_timeout`` seconds and
+then raises ``WriterOverloaded`` (back-pressure for the caller to turn into
+a 503).
+"""
+
+import asyncio
+import time
+from sqlalchemy import insert
+
+
+class WriterOverloaded(Exception):
+    """The write queue stayed full for longer than put_timeout."""
+
+
+class GroupCommitWriter:
+    """Batch queued rows of one table into few transactions.
+
+    If a batch fails, its rows are retried one per transaction so a single
+    bad row does not drop its neighbours.
+    """
+
+    def __init__(
+        self,
+        session_factory,
+        model,
+        max_batch_size: int = 200,
+        max_wait_ms: float = 50.0,
+        max_queue_size: int = 10000,
+        put_timeout: float = 2.0,
+    ):
+        self.session_factory = session_factory
+        self.model = model
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait_ms = max(0.0, float(max_wait_ms))
+        self.max_queue_size = max(1, int(max_queue_size))
+        self.put_timeout = put_timeout
+
+        self._queue = None
+        self._task = None
+        self._reset_stats()
+
+    # --- Lifecycle ---
+
+    async def start(self):
+        if self._task is None:
+            self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+            self._task = asyncio.create_task(self._run(), name=f"group-commit-{self.model.__name__}")
+
+    async def stop(self):
+        """Write everything still queued, then stop the background task."""
+        if self._task is None:
+            return
+        await self._queue.join()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    # --- Public API ---
+
+    async def submit(self, row: dict):
+        """Queue one row (a dict of column values) for insertion."""
+        if self._task is None:
+            await self.start()
+        try:
+            self._queue.put_nowait((row, time.perf_counter()))
+            return
+        except asyncio.QueueFull:
+            pass
+        try:
+            await asyncio.wait_for(self._queue.put((row, time.perf_counter())), self.put_timeout)
+        except asyncio.TimeoutError:
+            self._rejected += 1
+            raise WriterOverloaded(f"{self.model.__name__} write queue is full") from None
+
+    def stats(self) -> dict:
+        """Batch size and commit latency counters since start."""
+        batches = self._batches
+        rows = self._rows
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait_ms,
+            "batches": batches,
+            "rows": rows,
+            "failed_batches": self._failed_batches,
+            "failed_rows": self._failed_rows,
+            "rejected": self._rejected,
+            "avg_batch_size": round(rows / batches, 3) if batches else 0.0,
+            "avg_commit_ms": round(self._commit_total / batches * 1000, 3) if batches else 0.0,
+            "max_commit_ms": round(self._commit_max * 1000, 3),
+            "avg_queue_latency_ms": round(self._queue_latency_total / rows * 1000, 3) if rows else 0.0,
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "max_queue_size": self.max_queue_size,
+        }
+
+    # --- Worker ---
+
+    def _reset_stats(self):
+        self._batches = 0
+        self._rows = 0
+        self._failed_batches = 0
+        self._failed_rows = 0
+        self._rejected = 0
+        self._commit_total = 0.0
+        self._commit_max = 0.0
+        self._queue_latency_total = 0.0
+
+    async def _collect_batch(self):
+        """Wait for the first row, then gather more until full or timed out."""
+        batch = [await self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait_ms / 1000.0
+        while len(batch) < self.max_batch_size:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _insert(self, rows):
+        async with self.session_factory() as session:
+            await session.execute(insert(self.model), rows)
+            await session.commit()
+
+    async def _run(self):
+        while True:
+            batch = await self._collect_batch()
+            started = time.perf_counter()
+            rows = [row for row, _ in batch]
+            try:
+                try:
+                    await self._insert(rows)
+                except Exception as e:
+                    print(f"Group commit of {len(rows)} {self.model.__name__} rows failed:", e)
+                    self._failed_batches += 1
+                    if len(rows) == 1:
+                        self._failed_rows += 1
+                    else:
+                        for row in rows:
+                            try:
+                                await self._insert([row])
+                            except Exception:
+                                self._failed_rows += 1
+                commit_seconds = time.perf_counter() - started
+                self._batches += 1
+                self._rows += len(rows)
+                self._commit_total += commit_seconds
+                self._commit_max = max(self._commit_max, commit_seconds)
+                self._queue_latency_total += sum(started - enqueued for _, enqueued in batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
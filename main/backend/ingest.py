@@ -0,0 +1,342 @@
+"""Bulk catalog ingest: stream CSV or NDJSON movies into the Movie table.
+
+Input is parsed line by line and written in chunks of ``chunk_size`` rows,
+one transaction and one executemany per chunk, so memory stays bounded by
+the chunk size whatever the file size. Rows with a ``movieId`` are upserted
+on it, else rows with a ``tmdb_id``; ``movie_genres`` and the FTS index
+follow every chunk.
+
+Accepted columns / keys (extra ones are ignored):
+
+- ``movieId`` (or ``movielens_id``): the MovieLens id, the key of the
+  recommender catalog and the ratings
+- ``tmdb_id`` (or ``tmdbId``)
+- ``title`` (required; rows without one are skipped)
+- ``description`` (or ``overview``)
+- ``genres``: "Drama,Comedy", "Drama|Comedy", "['Drama', 'Comedy']" or a JSON list
+
+From the ``main/`` directory:
+
+    python -m backend.ingest data/movies_cleaned.csv
+    python -m backend.ingest models/loaded_movies_df.csv --database-url sqlite:///./vyber.db
+
+Over HTTP, ``POST /admin/movies/bulk`` takes the same CSV (``Content-Type:
+text/csv``) or NDJSON body and streams NDJSON progress lines back.
+"""
+
+import argparse
+import ast
+import asyncio
+import codecs
+import csv
+import json
+import time
+from typing import List, Optional
+from sqlalchemy import bindparam, delete, func, insert, or_, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from starlette.responses import Response
+
+from backend.main import DATABASE_URL, Movie, MovieGenre, create_db_and_tables, create_db_engine, split_genres
+
+DEFAULT_CHUNK_SIZE = 5000
+
+
+# --- Parsing ---
+
+def _parse_genres(value) -> Optional[str]:
+    """Any supported genres spelling → "Drama,Comedy" (None if empty)."""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        text = value.strip()
+        if text.startswith("["):
+            try:
+                value = ast.literal_eval(text)
+            except (ValueError, SyntaxError):
+                value = text.strip("[]").replace("'", "").split(",")
+        else:
+            value = text.replace("|", ",").split(",")
+    names = [str(g).strip() for g in value if g is not None and str(g).strip()]
+    # "(no genres listed)" is MovieLens' empty marker
+    names = [g for g in names if g != "(no genres listed)"]
+    return ",".join(dict.fromkeys(names)) or None
+
+
+def _parse_int(value) -> Optional[int]:
+    try:
+        return int(float(value)) if value not in (None, "") else None
+    except (TypeError, ValueError):
+        return None
+
+
+def normalize_record(record: dict) -> Optional[dict]:
+    """Input record → Movie column values, or None if it has no title."""
+    title = record.get("title")
+    title = str(title).strip() if title is not None else ""
+    if not title:
+        return None
+    description = record.get("description", record.get("overview"))
+    return {
+        "movielens_id": _parse_int(record.get("movielens_id", record.get("movieId"))),
+        "tmdb_id": _parse_int(record.get("tmdb_id", record.get("tmdbId"))),
+        "title": title,
+        "description": str(description) if description not in (None, "") else None,
+        "genres": _parse_genres(record.get("genres")),
+    }
+
+
+class RecordParser:
+    """Turn input lines (CSV with a header row, or NDJSON) into dicts.
+
+    CSV records may span lines (quoted newlines): physical lines are joined
+    until the quotes balance.
+    """
+
+    def __init__(self, fmt: str = "csv"):
+        if fmt not in ("csv", "ndjson"):
+            raise ValueError(f"Unsupported format: {fmt!r} (use 'csv' or 'ndjson')")
+        self.fmt = fmt
+        self._header = None
+        self._pending = ""
+
+    def feed_line(self, line: str) -> Optional[dict]:
+        if self.fmt == "ndjson":
+            line = line.strip()
+            return json.loads(line) if line else None
+
+        self._pending += line
+        if self._pending.count('"') % 2:
+            return None  # inside a quoted field: wait for the rest
+        logical, self._pending = self._pending, ""
+        if not logical.strip():
+            return None
+        values = next(csv.reader([logical]))
+        if self._header is None:
+            self._header = [h.strip() for h in values]
+            return None
+        return dict(zip(self._header, values))
+
+
+class LineSplitter:
+    """Incrementally decode UTF-8 byte chunks into complete lines."""
+
+    def __init__(self):
+        self._decoder = codecs.getincrementaldecoder("utf-8-sig")()
+        self._buffer = ""
+
+    def feed(self, chunk: bytes) -> List[str]:
+        self._buffer += self._decoder.decode(chunk)
+        *lines, self._buffer = self._buffer.split("\n")
+        return [line + "\n" for line in lines]
+
+    def close(self) -> List[str]:
+        rest = self._buffer + self._decoder.decode(b"", final=True)
+        self._buffer = ""
+        return [rest] if rest else []
+
+
+# --- Writing ---
+
+def _upsert_statement(dialect_name: str, key):
+    """INSERT ... ON CONFLICT (key) DO UPDATE; ids that are NULL in the input are kept."""
+    if dialect_name == "sqlite":
+        stmt = sqlite.insert(Movie)
+    elif dialect_name == "postgresql":
+        stmt = postgresql.insert(Movie)
+    else:
+        raise ValueError(f"Bulk upsert is not supported on {dialect_name}")
+    return stmt.on_conflict_do_update(
+        index_elements=[key],
+        set_={
+            "title": stmt.excluded.title,
+            "genres": stmt.excluded.genres,
+            "description": func.coalesce(stmt.excluded.description, Movie.description),
+            "movielens_id": func.coalesce(stmt.excluded.movielens_id, Movie.movielens_id),
+            "tmdb_id": func.coalesce(stmt.excluded.tmdb_id, Movie.tmdb_id),
+        },
+    )
+
+
+def _adopt_legacy_rows(conn, rows: List[dict]):
+    """Move MovieLens ids that older ingests stored in tmdb_id to movielens_id.
+
+    Only rows with the same title are adopted, so a real TMDB id that
+    happens to equal a movieId is left alone.
+    """
+    legacy = [{"b_id": r["movielens_id"], "b_title": r["title"]} for r in rows if r["tmdb_id"] is None]
+    if legacy:
+        conn.execute(
+            update(Movie)
+            .where(Movie.movielens_id.is_(None), Movie.tmdb_id == bindparam("b_id"), Movie.title == bindparam("b_title"))
+            .values(movielens_id=bindparam("b_id"), tmdb_id=None),
+            legacy,
+        )
+
+
+def _insert_genre_rows(conn, movies):
+    rows = [{"movie_id": movie_id, "genre": g} for movie_id, genres in movies for g in split_genres(genres)]
+    if rows:
+        conn.execute(insert(MovieGenre), rows)
+
+
+def write_movie_chunk(conn, rows: List[dict]):
+    """Upsert one chunk of normalized rows and refresh their movie_genres rows."""
+    before = conn.execute(select(func.max(Movie.id))).scalar() or 0
+
+    # Last row wins for a key repeated within the chunk
+    by_movielens = list({r["movielens_id"]: r for r in rows if r["movielens_id"] is not None}.values())
+    by_tmdb = list({r["tmdb_id"]: r for r in rows if r["movielens_id"] is None and r["tmdb_id"] is not None}.values())
+    unkeyed = [r for r in rows if r["movielens_id"] is None and r["tmdb_id"] is None]
+    if by_movielens:
+        _adopt_legacy_rows(conn, by_movielens)
+        conn.execute(_upsert_statement(conn.dialect.name, Movie.movielens_id), by_movielens)
+    if by_tmdb:
+        conn.execute(_upsert_statement(conn.dialect.name, Movie.tmdb_id), by_tmdb)
+    if by_movielens or by_tmdb:
+        updated = conn.execute(
+            select(Movie.id, Movie.genres)
+            .where(or_(Movie.movielens_id.in_([r["movielens_id"] for r in by_movielens]),
+                       Movie.tmdb_id.in_([r["tmdb_id"] for r in by_tmdb])))
+            .where(Movie.id <= before)
+        ).all()
+        if updated:
+            conn.execute(delete(MovieGenre).where(MovieGenre.movie_id.in_([movie_id for movie_id, _ in updated])))
+            _insert_genre_rows(conn, updated)
+    if unkeyed:
+        conn.execute(insert(Movie), unkeyed)
+
+    # New rows got ids above the previous maximum
+    _insert_genre_rows(conn, conn.execute(select(Movie.id, Movie.genres).where(Movie.id > before)).all())
+
+
+class CatalogIngest:
+    """Buffer normalized rows and write them chunk by chunk."""
+
+    def __init__(self, db_engine, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        self.db_engine = db_engine
+        self.chunk_size = max(1, int(chunk_size))
+        self.rows = 0
+        self.skipped = 0
+        self.chunks = 0
+        self._buffer = []
+        self._started = time.perf_counter()
+
+    async def add(self, record: dict) -> Optional[dict]:
+        """Queue one raw record; returns a progress dict when a chunk was written."""
+        row = normalize_record(record)
+        if row is None:
+            self.skipped += 1
+            return None
+        self._buffer.append(row)
+        if len(self._buffer) >= self.chunk_size:
+            return await self.flush()
+        return None
+
+    async def flush(self) -> Optional[dict]:
+        if not self._buffer:
+            return None
+        rows, self._buffer = self._buffer, []
+        async with self.db_engine.begin() as conn:
+            await conn.run_sync(write_movie_chunk, rows)
+        self.rows += len(rows)
+        self.chunks += 1
+        return self.progress()
+
+    def progress(self, done: bool = False) -> dict:
+        seconds = time.perf_counter() - self._started
+        return {
+            "rows": self.rows,
+            "skipped": self.skipped,
+            "chunks": self.chunks,
+            "seconds": round(seconds, 3),
+            "rows_per_s": round(self.rows / seconds, 1) if seconds > 0 else 0.0,
+            "done": done,
+        }
+
+
+class IngestResponse(Response):
+    """Read the request body as it arrives, ingest it and stream NDJSON progress.
+
+    The body is consumed here, inside the response, so progress lines can be
+    sent while the upload is still running.
+    """
+
+    media_type = "application/x-ndjson"
+
+    def __init__(self, db_engine, fmt: str = "csv", chunk_size: int = DEFAULT_CHUNK_SIZE):
+        super().__init__(media_type=self.media_type)
+        self.raw_headers = [h for h in self.raw_headers if h[0] != b"content-length"]
+        self.db_engine = db_engine
+        self.parser = RecordParser(fmt)
+        self.chunk_size = chunk_size
+
+    async def __call__(self, scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": self.raw_headers})
+
+        async def emit(progress: dict):
+            await send({"type": "http.response.body", "body": (json.dumps(progress) + "\n").encode(), "more_body": True})
+
+        ingest = CatalogIngest(self.db_engine, self.chunk_size)
+        splitter = LineSplitter()
+        try:
+            more_body = True
+            while more_body:
+                message = await receive()
+                if message["type"] == "http.disconnect":
+                    return
+                more_body = message.get("more_body", False)
+                lines = splitter.feed(message.get("body", b""))
+                if not more_body:
+                    lines += splitter.close()
+                for line in lines:
+                    record = self.parser.feed_line(line)
+                    if record is not None:
+                        progress = await ingest.add(record)
+                        if progress:
+                            await emit(progress)
+            await ingest.flush()
+            await emit(ingest.progress(done=True))
+        except Exception as e:
+            await emit({**ingest.progress(), "error": f"{type(e).__name__}: {e}"})
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+
+# --- CLI ---
+
+async def ingest_file(path: str, fmt: str = None, database_url: str = DATABASE_URL,
+                      chunk_size: int = DEFAULT_CHUNK_SIZE, on_progress=print) -> dict:
+    """Load a CSV / NDJSON file into the Movie table; returns the final progress."""
+    fmt = fmt or ("ndjson" if path.endswith((".ndjson", ".jsonl")) else "csv")
+    db_engine = create_db_engine(database_url)
+    try:
+        await create_db_and_tables(db_engine)
+        ingest = CatalogIngest(db_engine, chunk_size)
+        parser = RecordParser(fmt)
+        with open(path, encoding="utf-8-sig", newline="") as f:
+            for line in f:
+                record = parser.feed_line(line)
+                if record is not None:
+                    progress = await ingest.add(record)
+                    if progress and on_progress:
+                        on_progress(json.dumps(progress))
+        await ingest.flush()
+        final = ingest.progress(done=True)
+        if on_progress:
+            on_progress(json.dumps(final))
+        return final
+    finally:
+        await db_engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-load movies (CSV / NDJSON) into the Movie table.")
+    parser.add_argument("path", help="e.g. data/movies_cleaned.csv or models/loaded_movies_df.csv")
+    parser.add_argument("--format", choices=["csv", "ndjson"], default=None, help="default: from the file extension")
+    parser.add_argument("--database-url", default=DATABASE_URL)
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    args = parser.parse_args()
+    asyncio.run(ingest_file(args.path, args.format, args.database_url, args.chunk_size))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Small async load generator for the Vyber API.
+
+Logs in as the demo user, then keeps ``--concurrency`` requests in flight
+against a few endpoints and prints throughput and latency percentiles per
+endpoint. Start the server first, then from the ``main/`` directory:
+
+    uvicorn backend.main:app --workers 1
+    python -m backend.loadtest --url http://127.0.0.1:8000 --concurrency 32 --requests 2000
+
+Needs ``httpx`` (not a runtime dependency of the API).
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import time
+import numpy as np
+
+# (method, path, kwargs) cycled by the workers
+DEFAULT_SCENARIO = [
+    ("GET", "/movies", {"params": {"limit": 20}}),
+    ("POST", "/recommend", {"json": {"mood": "happy", "limit": 10}}),
+    ("POST", "/feedback", {"params": {"movie_id": 1, "rating": 4}}),
+]
+
+
+async def _login(client, username: str, password: str) -> dict:
+    resp = await client.post("/auth/token", data={"username": username, "password": password})
+    resp.raise_for_status()
+    return {"Authorization": f"Bearer {resp.json()['access_token']}"}
+
+
+async def run(url: str, concurrency: int = 32, requests: int = 2000, scenario=None,
+              username: str = "demo", password: str = "demo123") -> dict:
+    """Send ``requests`` requests with ``concurrency`` in flight; return the report."""
+    import httpx
+
+    scenario = scenario or DEFAULT_SCENARIO
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60) as client:
+        headers = await _login(client, username, password)
+        jobs = itertools.islice(itertools.cycle(scenario), requests)
+        latencies = {path: [] for _, path, _ in scenario}
+        errors = {path: 0 for _, path, _ in scenario}
+
+        async def worker():
+            for method, path, kwargs in jobs:
+                start = time.perf_counter()
+                resp = await client.request(method, path, headers=headers, **kwargs)
+                latencies[path].append((time.perf_counter() - start) * 1000)
+                if resp.status_code >= 400:
+                    errors[path] += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    report = {
+        "concurrency": concurrency,
+        "requests": requests,
+        "seconds": round(elapsed, 3),
+        "requests_per_s": round(requests / elapsed, 1),
+        "endpoints": {},
+    }
+    for path, values in latencies.items():
+        values = np.array(values)
+        report["endpoints"][path] = {
+            "requests": len(values),
+            "errors": errors[path],
+            "p50_ms": round(float(np.percentile(values, 50)), 2),
+            "p99_ms": round(float(np.percentile(values, 99)), 2),
+        }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test a running Vyber API.")
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--username", default="demo")
+    parser.add_argument("--password", default="demo123")
+    args = parser.parse_args()
+    report = asyncio.run(run(args.url, args.concurrency, args.requests,
+                             username=args.username, password=args.password))
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
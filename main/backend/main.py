@@ -4,31 +4,130 @@ Usage (dev):
     uvicorn Vyber_FastAPI_Backend_Main:app --reload
 """
 
-from typing import List, Optional
-from fastapi import FastAPI, HTTPException, Depends, status, BackgroundTasks
+import asyncio
+import re
+import sys
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from pathlib import Path
+from typing import AsyncIterator, List, Optional
+from fastapi import FastAPI, HTTPException, Depends, Query, Request, Response, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from pydantic import BaseModel, Field
-from sqlmodel import Field as SQLField, SQLModel, Session, create_engine, select
-import joblib
+from sqlalchemy import Index, delete, event, exists, insert, inspect, text, union
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlmodel import Field as SQLField, SQLModel, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 import os
 import hashlib
 import secrets
+import time
+import threading
+
+# Make the `main/` package root importable (backend.ai, personalization, ...)
+MAIN_DIR = Path(__file__).resolve().parents[1]
+if str(MAIN_DIR) not in sys.path:
+    sys.path.insert(0, str(MAIN_DIR))
+
+from backend.ai.cache import TTLCache
+from backend.ai import emotion_detection
+from backend.ai.emotion_detection import engine as recommender_engine
+from backend.ai.vector_index import EMBEDDINGS_DIR, META_FILE, SemanticIndex, current_index_dir
+from backend.feedback_writer import GroupCommitWriter, WriterOverloaded
+from backend.tokens import make_token_store
 
 # Configuration
-DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./vyber.db")
-MODEL_PATH = os.getenv("MODEL_PATH", "./model.joblib")
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite+aiosqlite:///./vyber.db")
 ACCESS_TOKEN_EXPIRE_SECONDS = 60 * 60 * 24  # 1 day
 
+# Where access tokens live: "memory" (one worker) or a SQLite file shared
+# by all workers on the host
+TOKEN_STORE_URL = os.getenv("VYBER_TOKEN_STORE", "sqlite:///./vyber_tokens.db")
+# Per-worker cache of token → username and username → User, so protected
+# routes skip the token store and the users table in the common case
+USER_CACHE_SIZE = int(os.getenv("VYBER_USER_CACHE_SIZE", "10000"))
+USER_CACHE_TTL_SECONDS = float(os.getenv("VYBER_USER_CACHE_TTL", "60"))
+
+# Connection pool of the async DB engine (ignored for SQLite)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+
+# Threads for CPU-bound scoring, so it never runs on the event loop
+SCORING_WORKERS = int(os.getenv("VYBER_SCORING_WORKERS", str(min(8, (os.cpu_count() or 1) + 2))))
+
+# /feedback group commit: rows are queued and written in batches of up to
+# BATCH_SIZE rows, at most FLUSH_MS after the first row of a batch arrived
+FEEDBACK_BATCH_SIZE = int(os.getenv("VYBER_FEEDBACK_BATCH_SIZE", "200"))
+FEEDBACK_FLUSH_MS = float(os.getenv("VYBER_FEEDBACK_FLUSH_MS", "50"))
+FEEDBACK_QUEUE_SIZE = int(os.getenv("VYBER_FEEDBACK_QUEUE_SIZE", "10000"))
+FEEDBACK_PUT_TIMEOUT = float(os.getenv("VYBER_FEEDBACK_PUT_TIMEOUT", "2"))
+
+# New Feedback ratings are folded into the recommender's live rating
+# aggregates every SYNC_SECONDS (per worker, from the DB, so every worker
+# sees every rating), at most SYNC_BATCH rows per query
+RATING_SYNC_SECONDS = float(os.getenv("VYBER_RATING_SYNC_SECONDS", "2"))
+RATING_SYNC_BATCH = int(os.getenv("VYBER_RATING_SYNC_BATCH", "5000"))
+# Accepted /feedback ratings (the MovieLens star scale); other values are
+# rejected and never reach the aggregates
+FEEDBACK_RATING_MIN = 1
+FEEDBACK_RATING_MAX = 5
+
+# Sync driver URL → async driver URL
+_ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "postgres": "postgresql+asyncpg",
+    "mysql": "mysql+aiomysql",
+}
+
+def async_database_url(url: str) -> str:
+    """Use the async driver for plain URLs ("sqlite:///x.db" → "sqlite+aiosqlite:///x.db")."""
+    scheme, sep, rest = url.partition("://")
+    return f"{_ASYNC_DRIVERS.get(scheme, scheme)}{sep}{rest}"
+
 # Database models
 class Movie(SQLModel, table=True):
     id: Optional[int] = SQLField(default=None, primary_key=True)
     tmdb_id: Optional[int] = SQLField(index=True)
+    movielens_id: Optional[int] = SQLField(default=None, index=True)  # catalog movieId (recommender, ratings)
     title: str
     description: Optional[str] = None
     genres: Optional[str] = None  # comma-separated
     vector_id: Optional[int] = None  # for embedding store
 
+class MovieGenre(SQLModel, table=True):
+    """One row per (movie, genre): Movie.genres normalized for indexed filtering."""
+    __tablename__ = "movie_genres"
+    # (genre, movie_id) index serves "movies with genre X" lookups
+    __table_args__ = (Index("ix_movie_genres_genre_movie", "genre", "movie_id"),)
+    movie_id: int = SQLField(foreign_key="movie.id", primary_key=True)
+    genre: str = SQLField(primary_key=True)  # lowercased, stripped
+
+def split_genres(genres: Optional[str]) -> List[str]:
+    """ "Adventure, drama" → ["adventure", "drama"] (deduplicated, order kept)."""
+    names = (g.strip().lower() for g in (genres or "").split(","))
+    return list(dict.fromkeys(g for g in names if g))
+
+def _genre_rows(movie_id: int, genres: Optional[str]) -> List[dict]:
+    return [{"movie_id": movie_id, "genre": g} for g in split_genres(genres)]
+
+# Keep movie_genres in sync with every ORM insert/update of a Movie
+@event.listens_for(Movie, "after_insert")
+def _insert_movie_genres(mapper, connection, movie):
+    rows = _genre_rows(movie.id, movie.genres)
+    if rows:
+        connection.execute(insert(MovieGenre), rows)
+
+@event.listens_for(Movie, "after_update")
+def _update_movie_genres(mapper, connection, movie):
+    connection.execute(delete(MovieGenre).where(MovieGenre.movie_id == movie.id))
+    _insert_movie_genres(mapper, connection, movie)
+
 class User(SQLModel, table=True):
     id: Optional[int] = SQLField(default=None, primary_key=True)
     username: str = SQLField(index=True)
@@ -49,9 +148,34 @@ class MovieOut(BaseModel):
     description: Optional[str]
     genres: Optional[str]
 
+class SemanticMatchOut(MovieOut):
+    score: float  # cosine similarity to the query
+
 class RecommendRequest(BaseModel):
     mood: str = Field(..., example="happy")
-    limit: int = 10
+    limit: int = Field(10, ge=1, le=100)
+    user_text: Optional[str] = None  # personalizes the explanations
+    viewing_mode: str = "solo"
+    weight_cf: float = Field(0.0, ge=0, le=1)  # item-item collaborative filtering blend
+
+class SurpriseRequest(BaseModel):
+    mood: str = Field(..., example="happy")
+    user_text: Optional[str] = None
+    seed: Optional[int] = None  # reproducible pick
+
+class MoodRequest(BaseModel):
+    text: str = Field(..., example="I want something light and funny")
+
+class MoodOut(BaseModel):
+    mood: str
+
+class RecommendationOut(BaseModel):
+    title: str
+    genres: List[str] = []
+    mood: str
+    avg_rating: Optional[float] = None
+    vibe_cluster: Optional[int] = None
+    explanation: str = ""
 
 class Token(BaseModel):
     access_token: str
@@ -67,25 +191,234 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-engine = create_engine(DATABASE_URL, echo=False)
+def _sqlite_wal(dbapi_connection, connection_record):
+    # WAL: readers don't block the writer, and commits only fsync the log
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.close()
+
+def create_db_engine(url: str = DATABASE_URL):
+    url = async_database_url(url)
+    if url.startswith("sqlite"):
+        # aiosqlite: one connection per checkout, no server-side pool to size
+        db_engine = create_async_engine(url, echo=False)
+        event.listen(db_engine.sync_engine, "connect", _sqlite_wal)
+        return db_engine
+    return create_async_engine(
+        url,
+        echo=False,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=True,
+    )
+
+engine = create_db_engine()
+async_session = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+feedback_writer = GroupCommitWriter(
+    async_session,
+    Feedback,
+    max_batch_size=FEEDBACK_BATCH_SIZE,
+    max_wait_ms=FEEDBACK_FLUSH_MS,
+    max_queue_size=FEEDBACK_QUEUE_SIZE,
+    put_timeout=FEEDBACK_PUT_TIMEOUT,
+)
+scoring_executor = ThreadPoolExecutor(max_workers=SCORING_WORKERS, thread_name_prefix="vyber-scoring")
+
+async def get_session() -> AsyncIterator[AsyncSession]:
+    """One DB session per request (FastAPI dependency)."""
+    async with async_session() as session:
+        yield session
+
+async def run_scoring(fn, *args, **kwargs):
+    """Run CPU-bound work on the scoring executor instead of the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(scoring_executor, partial(fn, *args, **kwargs))
+
+# Full-text index over movie title + description (SQLite FTS5). It is an
+# external-content table: rows live in `movie`, triggers keep it in sync.
+# Only title/description changes touch the FTS rows: updates of other
+# columns (vector_id, genres, ...) leave the index alone
+MOVIE_FTS_UPDATE_TRIGGER = (
+    "CREATE TRIGGER movie_fts_au AFTER UPDATE OF title, description ON movie BEGIN "
+    "INSERT INTO movie_fts(movie_fts, rowid, title, description) "
+    "VALUES ('delete', old.id, old.title, old.description); "
+    "INSERT INTO movie_fts(rowid, title, description) VALUES (new.id, new.title, new.description); END"
+)
+MOVIE_FTS_DDL = [
+    "CREATE VIRTUAL TABLE movie_fts USING fts5("
+    "title, description, content='movie', content_rowid='id')",
+    "CREATE TRIGGER movie_fts_ai AFTER INSERT ON movie BEGIN "
+    "INSERT INTO movie_fts(rowid, title, description) VALUES (new.id, new.title, new.description); END",
+    "CREATE TRIGGER movie_fts_ad AFTER DELETE ON movie BEGIN "
+    "INSERT INTO movie_fts(movie_fts, rowid, title, description) "
+    "VALUES ('delete', old.id, old.title, old.description); END",
+    MOVIE_FTS_UPDATE_TRIGGER,
+    # Index the rows that existed before the table was created
+    "INSERT INTO movie_fts(movie_fts) VALUES ('rebuild')",
+]
+
+async def migrate_movie_fts_trigger(conn):
+    """Replace an older movie_fts_au (one that fired on every column) with the current one."""
+    current = (await conn.execute(text("SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name = 'movie_fts_au'"))).scalar()
+    if current != MOVIE_FTS_UPDATE_TRIGGER:
+        await conn.execute(text("DROP TRIGGER IF EXISTS movie_fts_au"))
+        await conn.execute(text(MOVIE_FTS_UPDATE_TRIGGER))
+
+def migrate_movie_genres(conn, chunk_size: int = 10000) -> int:
+    """Fill movie_genres from Movie.genres for movies that have no rows yet.
+
+    Idempotent; a no-op once every movie with genres is indexed. Returns
+    the number of movies migrated.
+    """
+    missing = (
+        select(Movie.id, Movie.genres)
+        .where(Movie.genres.is_not(None))
+        .where(~exists().where(MovieGenre.movie_id == Movie.id))
+        .order_by(Movie.id)
+    )
+    migrated = 0
+    last_id = 0
+    while True:
+        chunk = conn.execute(missing.where(Movie.id > last_id).limit(chunk_size)).all()
+        if not chunk:
+            return migrated
+        rows = [row for movie_id, genres in chunk for row in _genre_rows(movie_id, genres)]
+        if rows:
+            conn.execute(insert(MovieGenre), rows)
+        migrated += len(chunk)
+        last_id = chunk[-1][0]
+
+def migrate_movie_columns(conn) -> List[str]:
+    """Add Movie columns that create_all does not add to existing tables."""
+    existing = {column["name"] for column in inspect(conn).get_columns("movie")}
+    added = []
+    if "movielens_id" not in existing:
+        conn.execute(text("ALTER TABLE movie ADD COLUMN movielens_id INTEGER"))
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_movie_movielens_id ON movie (movielens_id)"))
+        added.append("movielens_id")
+    return added
+
+async def create_db_and_tables(db_engine=None):
+    db_engine = db_engine or engine
+    async with db_engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+        await conn.run_sync(migrate_movie_columns)
+        # Bulk ingest upserts on movielens_id, else tmdb_id (NULLs stay allowed)
+        await conn.execute(text("CREATE UNIQUE INDEX IF NOT EXISTS ux_movie_tmdb_id ON movie (tmdb_id)"))
+        await conn.execute(text("CREATE UNIQUE INDEX IF NOT EXISTS ux_movie_movielens_id ON movie (movielens_id)"))
+        await conn.run_sync(migrate_movie_genres)
+        if db_engine.dialect.name == "sqlite":
+            exists = await conn.execute(text("SELECT 1 FROM sqlite_master WHERE name = 'movie_fts'"))
+            if exists.first() is None:
+                for ddl in MOVIE_FTS_DDL:
+                    await conn.execute(text(ddl))
+            else:
+                await migrate_movie_fts_trigger(conn)
+
+# Feedback rows seen by sync_rating_aggregates in this worker, by outcome
+rating_sync_stats = Counter()
+
+async def sync_rating_aggregates() -> int:
+    """Add Feedback ratings newer than the store's watermark; returns the count.
+
+    Feedback.movie_id is the API's Movie.id; the store is keyed by the
+    catalog's movieId, Movie.movielens_id. Rows without a rating, or for
+    movies outside the catalog, only advance the watermark; they are
+    counted in rating_sync_stats (see /metrics).
+    """
+    store = recommender_engine.ratings
+    if store is None:
+        return 0
+    added = 0
+    while True:
+        async with async_session() as session:
+            rows = (await session.execute(
+                select(Feedback.id, Movie.movielens_id, Feedback.rating)
+                .outerjoin(Movie, Movie.id == Feedback.movie_id)
+                .where(Feedback.id > store.watermark)
+                .order_by(Feedback.id)
+                .limit(RATING_SYNC_BATCH)
+            )).all()
+        if not rows:
+            return added
+        events = []
+        for _, movielens_id, rating in rows:
+            if rating is None or not FEEDBACK_RATING_MIN <= rating <= FEEDBACK_RATING_MAX:
+                rating_sync_stats["no_rating"] += 1
+            elif movielens_id is None:
+                rating_sync_stats["not_in_catalog"] += 1
+            else:
+                events.append((movielens_id, rating))
+        store.add_many(events, watermark=rows[-1][0])
+        rating_sync_stats["synced"] += len(events)
+        added += len(events)
+        if len(rows) < RATING_SYNC_BATCH:
+            return added
+
+async def _rating_sync_loop():
+    while True:
+        await asyncio.sleep(RATING_SYNC_SECONDS)
+        try:
+            await sync_rating_aggregates()
+            await run_scoring(recommender_engine.ratings.maybe_checkpoint)
+        except Exception as e:
+            print("Rating aggregate sync failed:", e)
 
-def create_db_and_tables():
-    SQLModel.metadata.create_all(engine)
+async def start_rating_sync():
+    """Load the rating store, catch up on Feedback, then keep syncing."""
+    store = recommender_engine.ratings
+    if store is None:
+        return None
+    await run_scoring(store.load)
+    async with async_session() as session:
+        last_id = (await session.execute(text("SELECT MAX(id) FROM feedback"))).scalar() or 0
+    if last_id < store.watermark:
+        # The checkpoint was written against another database: its feedback
+        # counts must not stay under the replay of this one
+        print("Rating checkpoint is ahead of the feedback table; rebuilding from the seed ratings.")
+        await run_scoring(store.reset_to_seed)
+    await sync_rating_aggregates()
+    return asyncio.create_task(_rating_sync_loop(), name="vyber-rating-sync")
+
+async def stop_rating_sync(task):
+    if task is None:
+        return
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+    await sync_rating_aggregates()
+    try:
+        await run_scoring(recommender_engine.ratings.checkpoint)
+    except OSError as e:
+        print("Could not checkpoint rating aggregates:", e)
 
 from contextlib import asynccontextmanager
 
 @asynccontextmanager
 async def lifespan(app):
-    create_db_and_tables()
-    load_model_background()
-    seed_demo_data()
-    yield  # Shutdown logic can go here
+    await create_db_and_tables()
+    recommender_engine.warm_up()  # non-blocking, see /ready
+    await seed_demo_data()
+    await feedback_writer.start()
+    rating_sync = await start_rating_sync()
+    yield
+    await feedback_writer.stop()  # flush queued feedback before closing the DB
+    await stop_rating_sync(rating_sync)
+    await engine.dispose()
+    scoring_executor.shutdown(wait=False)
 
 app = FastAPI(title="Vyber — Movies that match your vibe", lifespan=lifespan)
 
-# Simple in-memory auth (demo)
+# Simple token auth (demo)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/token")
-_fake_tokens = {}  # token -> username
+token_store = make_token_store(TOKEN_STORE_URL)
+_token_cache = TTLCache(max_size=USER_CACHE_SIZE, ttl_seconds=USER_CACHE_TTL_SECONDS)  # token -> username
+_user_cache = TTLCache(max_size=USER_CACHE_SIZE, ttl_seconds=USER_CACHE_TTL_SECONDS)   # username -> User
 
 def hash_password(password: str) -> str:
     return hashlib.sha256(password.encode()).hexdigest()
@@ -93,56 +426,56 @@ def hash_password(password: str) -> str:
 def verify_password(password: str, hashed: str) -> bool:
     return hash_password(password) == hashed
 
-def authenticate_user(db: Session, username: str, password: str) -> Optional[User]:
-    user = db.exec(select(User).where(User.username == username)).first()
+async def authenticate_user(db: AsyncSession, username: str, password: str) -> Optional[User]:
+    user = (await db.exec(select(User).where(User.username == username))).first()
     if not user:
         return None
     if not verify_password(password, user.hashed_password):
         return None
     return user
 
-def create_access_token(username: str) -> str:
+# The token store is synchronous (SQLite file I/O with a busy timeout):
+# every call runs in a thread so it never blocks the event loop
+
+async def create_access_token(username: str) -> str:
     token = secrets.token_urlsafe(32)
-    _fake_tokens[token] = username
+    await asyncio.to_thread(token_store.set, token, username, ACCESS_TOKEN_EXPIRE_SECONDS)
+    _token_cache.set(token, username, ttl_seconds=ACCESS_TOKEN_EXPIRE_SECONDS)
     return token
 
-async def get_current_user(token: str = Depends(oauth2_scheme)) -> User:
-    username = _fake_tokens.get(token)
-    if not username:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid authentication credentials")
-    with Session(engine) as session:
-        user = session.exec(select(User).where(User.username == username)).first()
+async def invalidate_user(username: str):
+    """Revoke a user's tokens and drop them from this worker's caches.
+
+    Other workers stop accepting the user once their cache entries expire
+    (at most VYBER_USER_CACHE_TTL seconds).
+    """
+    await asyncio.to_thread(token_store.delete_user, username)
+    _user_cache.delete(username)
+    _token_cache.delete_where(lambda token, name: name == username)
+
+async def get_current_user(token: str = Depends(oauth2_scheme), session: AsyncSession = Depends(get_session)) -> User:
+    username = _token_cache.get(token)
+    if username is None:
+        entry = await asyncio.to_thread(token_store.lookup, token)
+        if entry is None:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid authentication credentials")
+        username, expires_at = entry
+        # Never cache a token past its own expiry
+        _token_cache.set(token, username, ttl_seconds=expires_at - time.time())
+    user = _user_cache.get(username)
+    if user is None:
+        user = (await session.exec(select(User).where(User.username == username))).first()
         if not user:
             raise HTTPException(status_code=401, detail="User not found")
-        return user
-
-# ML Model stub & loader
-_ml_pipeline = None
-
-def load_model():
-    global _ml_pipeline
-    try:
-        if os.path.exists(MODEL_PATH):
-            _ml_pipeline = joblib.load(MODEL_PATH)
-            print("Model loaded from", MODEL_PATH)
-        else:
-            _ml_pipeline = None
-            print("No model found at", MODEL_PATH, "— recommendation endpoint will use heuristics.")
-    except Exception as e:
-        print("Failed to load model:", e)
-        _ml_pipeline = None
-
-def load_model_background():
-    # call on startup
-    try:
-        load_model()
-    except Exception:
-        pass
+        _user_cache.set(username, user)
+    if not user.is_active:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Inactive user")
+    return user
 
 # Demo seeding
-def seed_demo_data():
-    with Session(engine) as session:
-        exists = session.exec(select(Movie)).first()
+async def seed_demo_data():
+    async with async_session() as session:
+        exists = (await session.exec(select(Movie))).first()
         if exists:
             return
         demo = [
@@ -154,10 +487,10 @@ def seed_demo_data():
         # create demo user
         demo_user = User(username="demo", hashed_password=hash_password("demo123"))
         session.add(demo_user)
-        session.commit()
+        await session.commit()
 
 # Helper: simple heuristic recommender
-def heuristic_recommend(mood: str, limit: int = 10) -> List[MovieOut]:
+async def heuristic_recommend(session: AsyncSession, mood: str, limit: int = 10) -> List[MovieOut]:
     """Very simple mood->genre mapping"""
     mood_map = {
         "happy": ["Comedy", "Family"],
@@ -165,78 +498,262 @@ def heuristic_recommend(mood: str, limit: int = 10) -> List[MovieOut]:
         "calm": ["Drama", "Documentary"],
         "excited": ["Action", "Adventure"],
     }
-    preferred = mood_map.get(mood.lower(), ["Drama"])
-    with Session(engine) as session:
-        stmt = select(Movie)
-        movies = session.exec(stmt).all()
-        # filter by genres if possible
-        filtered = [m for m in movies if any(g.strip() in (m.genres or "") for g in preferred)]
-        chosen = filtered[:limit] if filtered else movies[:limit]
-        return [MovieOut(id=m.id or -1, title=m.title, description=m.description, genres=m.genres) for m in chosen]
+    preferred = [g.lower() for g in mood_map.get(mood.lower(), ["Drama"])]
+    # Exact, case-insensitive genre match in SQL, driven by the (genre,
+    # movie_id) index: the first `limit` ids of each preferred genre (one
+    # index range each, already in id order), merged, then joined to movie.
+    # Reads at most limit * len(preferred) index entries, matches or not.
+    per_genre = [
+        select(MovieGenre.movie_id).where(MovieGenre.genre == genre).order_by(MovieGenre.movie_id).limit(limit).subquery()
+        for genre in dict.fromkeys(preferred)
+    ]
+    candidates = union(*(select(sub.c.movie_id) for sub in per_genre)).subquery()
+    matched = select(candidates.c.movie_id).order_by(candidates.c.movie_id).limit(limit).subquery()
+    stmt = select(Movie).join(matched, Movie.id == matched.c.movie_id).order_by(Movie.id)
+    movies = (await session.exec(stmt)).all()
+    if not movies:
+        movies = (await session.exec(select(Movie).order_by(Movie.id).limit(limit))).all()
+    return [MovieOut(id=m.id or -1, title=m.title, description=m.description, genres=m.genres) for m in movies]
 
 # Routes
 @app.get("/health")
 def health():
     return {"status": "ok"}
 
+@app.get("/ready")
+def ready():
+    """Readiness probe: 200 once every recommender artifact is loaded, else 503.
+
+    Unlike /health (process is up), this tells orchestration whether the
+    worker is warm enough to take traffic.
+    """
+    report = recommender_engine.status()
+    code = status.HTTP_200_OK if report["ready"] else status.HTTP_503_SERVICE_UNAVAILABLE
+    return JSONResponse(status_code=code, content=report)
+
+@app.get("/metrics")
+def metrics():
+    """Runtime counters of the recommender (batching, caches, ...) and auth caches."""
+    return {
+        **recommender_engine.metrics(),
+        "feedback_writer": feedback_writer.stats(),
+        "rating_sync": dict(rating_sync_stats),
+        "auth": {"token_cache": _token_cache.stats(), "user_cache": _user_cache.stats()},
+    }
+
 @app.post("/auth/token", response_model=Token)
-def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends()):
-    with Session(engine) as session:
-        user = authenticate_user(session, form_data.username, form_data.password)
-        if not user:
-            raise HTTPException(status_code=400, detail="Incorrect username or password")
-        token = create_access_token(user.username)
-        return {"access_token": token, "token_type": "bearer"}
+async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), session: AsyncSession = Depends(get_session)):
+    user = await authenticate_user(session, form_data.username, form_data.password)
+    if not user:
+        raise HTTPException(status_code=400, detail="Incorrect username or password")
+    token = await create_access_token(user.username)
+    return {"access_token": token, "token_type": "bearer"}
+
+async def movies_page(session: AsyncSession, q: Optional[str] = None, after_id: Optional[int] = None, limit: int = 50) -> List[Movie]:
+    """One page of movies by id (keyset pagination: WHERE id > after_id)."""
+    stmt = select(Movie)
+    if q:
+        stmt = stmt.where(Movie.title.contains(q))
+    if after_id is not None:
+        stmt = stmt.where(Movie.id > after_id)
+    return list((await session.exec(stmt.order_by(Movie.id).limit(limit))).all())
+
+_FTS_TOKEN_RE = re.compile(r"\w+")
+
+def fts_query(text_query: str) -> Optional[str]:
+    """Free text → FTS5 MATCH expression: every word required, last one as a prefix."""
+    tokens = _FTS_TOKEN_RE.findall(text_query or "")
+    if not tokens:
+        return None
+    return " ".join(f'"{t}"' for t in tokens) + "*"
+
+async def search_movies(session: AsyncSession, q: str, limit: int = 20) -> List[Movie]:
+    """Movies matching q in title/description, best BM25 rank first."""
+    match = fts_query(q)
+    if match is None:
+        return []
+    if session.bind.dialect.name != "sqlite":
+        # No FTS5 outside SQLite: plain title substring match
+        return await movies_page(session, q=q, limit=limit)
+    stmt = select(Movie).from_statement(
+        text(
+            "SELECT movie.* FROM movie_fts JOIN movie ON movie.id = movie_fts.rowid "
+            "WHERE movie_fts MATCH :match ORDER BY movie_fts.rank LIMIT :limit"
+        ).bindparams(match=match, limit=limit)
+    )
+    return list((await session.execute(stmt)).scalars().all())
+
+# Semantic index over the movie table (built by `python -m backend.embed_movies`).
+# Loaded on first use and reloaded when a rebuild publishes a new version.
+_semantic_index = None
+_semantic_index_key = None
+_semantic_index_lock = threading.Lock()
+
+def get_semantic_index(root: str = EMBEDDINGS_DIR) -> Optional[SemanticIndex]:
+    """The published semantic index, or None if none has been built."""
+    global _semantic_index, _semantic_index_key
+    path = current_index_dir(root)
+    if path is None:
+        return None
+    try:
+        key = (path, os.path.getmtime(os.path.join(path, META_FILE)))
+    except OSError:
+        return _semantic_index  # pruned under us: keep serving what we have
+    with _semantic_index_lock:
+        if _semantic_index is None or key != _semantic_index_key:
+            _semantic_index = SemanticIndex.load(path)
+            _semantic_index_key = key
+        return _semantic_index
+
+async def semantic_movies(session: AsyncSession, q: str, limit: int) -> List[SemanticMatchOut]:
+    """Movies closest to a free-text query, best first."""
+    index = await run_scoring(get_semantic_index)
+    if index is None:
+        raise HTTPException(status_code=503, detail="Semantic index not built (python -m backend.embed_movies)")
+    matches = await run_scoring(index.search_text, q, limit)
+    scores = {int(index.movie_ids[vector_id]): score for vector_id, score in matches}
+    stmt = select(Movie).where(Movie.id.in_(list(scores)))
+    movies = {m.id: m for m in (await session.execute(stmt)).scalars().all()}
+    # Movies deleted since the last embedding run are skipped
+    return [
+        SemanticMatchOut(id=m.id, title=m.title, description=m.description, genres=m.genres, score=round(scores[m.id], 4))
+        for m in (movies.get(movie_id) for movie_id in scores)
+        if m is not None
+    ]
 
 @app.get("/movies", response_model=List[MovieOut])
-def list_movies(q: Optional[str] = None, limit: int = 50):
-    with Session(engine) as session:
-        stmt = select(Movie)
-        if q:
-            stmt = stmt.where(Movie.title.contains(q))
-        movies = session.exec(stmt).all()
-        return [MovieOut(id=m.id or -1, title=m.title, description=m.description, genres=m.genres) for m in movies[:limit]]
-
-@app.post("/recommend", response_model=List[MovieOut])
-def recommend(req: RecommendRequest, background_tasks: BackgroundTasks, current_user: User = Depends(get_current_user)):
-    # If ML pipeline available, use it. Else fallback to heuristic.
-    if _ml_pipeline:
-        try:
-            # Example: the pipeline expects a dict with 'mood' key
-            ids = _ml_pipeline.predict([req.mood])  # this is a stub — replace with real method
-            # Convert ids to MovieOut
-            with Session(engine) as session:
-                movies = session.exec(select(Movie).where(Movie.id.in_(ids[:req.limit]))).all()
-                return [MovieOut(id=m.id or -1, title=m.title, description=m.description, genres=m.genres) for m in movies]
-        except Exception as e:
-            print("Model predict failed:", e)
-    # Heuristic fallback
-    return heuristic_recommend(req.mood, req.limit)
-
-@app.post("/feedback")
-def feedback(movie_id: int, rating: Optional[int] = None, comment: Optional[str] = None, user: User = Depends(get_current_user)):
-    with Session(engine) as session:
-        fb = Feedback(user_id=user.id, movie_id=movie_id, rating=rating, comment=comment)
-        session.add(fb)
-        session.commit()
-    return {"status": "saved"}
+async def list_movies(response: Response, q: Optional[str] = None, limit: int = Query(50, ge=1, le=500),
+                      after_id: Optional[int] = None, session: AsyncSession = Depends(get_session)):
+    """Movies ordered by id. Pass the X-Next-Cursor header back as after_id for the next page."""
+    movies = await movies_page(session, q=q, after_id=after_id, limit=limit)
+    if len(movies) == limit:
+        response.headers["X-Next-Cursor"] = str(movies[-1].id)
+    return [MovieOut(id=m.id or -1, title=m.title, description=m.description, genres=m.genres) for m in movies]
+
+@app.get("/movies/search", response_model=List[MovieOut])
+async def search(q: str, limit: int = Query(20, ge=1, le=100), session: AsyncSession = Depends(get_session)):
+    """Ranked full-text search over title and description."""
+    movies = await search_movies(session, q, limit)
+    return [MovieOut(id=m.id or -1, title=m.title, description=m.description, genres=m.genres) for m in movies]
+
+@app.get("/movies/semantic", response_model=List[SemanticMatchOut])
+async def semantic_search(q: str = Query(..., min_length=1), limit: int = Query(10, ge=1, le=100),
+                          session: AsyncSession = Depends(get_session)):
+    """Movies whose title, genres and description best match a free-text query."""
+    return await semantic_movies(session, q, limit)
+
+# Recommender endpoints: the shared emotion_detection engine, one warm copy
+# per backend worker, serving every UI session (see frontend/api_client.py)
+@app.post("/mood", response_model=MoodOut)
+async def mood(req: MoodRequest, current_user: User = Depends(get_current_user)):
+    return {"mood": await run_scoring(emotion_detection.detect_mood, req.text)}
+
+@app.post("/recommend", response_model=List[RecommendationOut])
+async def recommend(req: RecommendRequest, current_user: User = Depends(get_current_user),
+                    session: AsyncSession = Depends(get_session)):
+    try:
+        return await run_scoring(
+            emotion_detection.recommend,
+            req.mood,
+            top_n=req.limit,
+            user_text=req.user_text,
+            viewing_mode=req.viewing_mode,
+            weight_cf=req.weight_cf,
+        )
+    except Exception as e:
+        print("Recommender failed, using the heuristic fallback:", e)
+    # Heuristic fallback over the DB catalog (e.g. model artifacts missing)
+    movies = await heuristic_recommend(session, req.mood, req.limit)
+    return [
+        RecommendationOut(title=m.title, genres=[g.strip() for g in (m.genres or "").split(",") if g.strip()], mood=req.mood.lower())
+        for m in movies
+    ]
+
+@app.post("/surprise", response_model=RecommendationOut)
+async def surprise(req: SurpriseRequest, current_user: User = Depends(get_current_user)):
+    return await run_scoring(emotion_detection.surprise_me, req.mood, user_text=req.user_text, seed=req.seed)
+
+@app.post("/feedback", status_code=202)
+async def feedback(movie_id: int, rating: Optional[int] = Query(None, ge=FEEDBACK_RATING_MIN, le=FEEDBACK_RATING_MAX), comment: Optional[str] = None,
+                   user: User = Depends(get_current_user)):
+    # Queued for the group-commit writer; written within VYBER_FEEDBACK_FLUSH_MS
+    try:
+        await feedback_writer.submit({"user_id": user.id, "movie_id": movie_id, "rating": rating, "comment": comment})
+    except WriterOverloaded:
+        raise HTTPException(status_code=503, detail="Feedback queue is full, retry later", headers={"Retry-After": "1"})
+    return {"status": "queued"}
 
 # Admin endpoint to add movies (protected)
 @app.post("/admin/movies", status_code=201)
-def add_movie(movie: MovieOut, current_user: User = Depends(get_current_user)):
+async def add_movie(movie: MovieOut, current_user: User = Depends(get_current_user), session: AsyncSession = Depends(get_session)):
     # In production check user.is_admin
-    with Session(engine) as session:
-        m = Movie(title=movie.title, description=movie.description, genres=movie.genres)
-        session.add(m)
-        session.commit()
-        session.refresh(m)
+    m = Movie(title=movie.title, description=movie.description, genres=movie.genres)
+    session.add(m)
+    await session.commit()
+    await session.refresh(m)
     return {"id": m.id}
 
+@app.post("/admin/movies/bulk")
+async def bulk_ingest_movies(request: Request, format: Optional[str] = Query(None, pattern="^(csv|ndjson)$"),
+                             chunk_size: int = Query(5000, ge=1, le=50000),
+                             current_user: User = Depends(get_current_user)):
+    """Stream a CSV or NDJSON catalog into the Movie table (upsert on movieId / tmdb_id).
+
+    The response is NDJSON: one progress line per written chunk, then a
+    final line with "done": true. See backend/ingest.py for the columns.
+    """
+    from backend.ingest import IngestResponse  # imports this module
+
+    fmt = format or ("csv" if "csv" in request.headers.get("content-type", "") else "ndjson")
+    return IngestResponse(engine, fmt, chunk_size)
+
+@app.post("/admin/users/{username}/deactivate")
+async def deactivate_user(username: str, current_user: User = Depends(get_current_user), session: AsyncSession = Depends(get_session)):
+    # In production check user.is_admin
+    user = (await session.exec(select(User).where(User.username == username))).first()
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    user.is_active = False
+    session.add(user)
+    await session.commit()
+    await invalidate_user(username)
+    return {"status": "deactivated"}
+
 # Utilities: export database or run one-off tasks
-@app.post("/admin/reload_model")
-def reload_model(current_user: User = Depends(get_current_user)):
-    load_model()
-    return {"status": "model reloaded"}
+@app.post("/admin/reload_model", status_code=status.HTTP_202_ACCEPTED)
+async def reload_model(
+    version: Optional[str] = Query(None, description="bundle name under VYBER_BUNDLES_DIR (default: models/)"),
+    current_user: User = Depends(get_current_user),
+):
+    """Start loading an artifact bundle in the background.
+
+    The current bundle keeps serving until the new one is loaded and has
+    passed a smoke query; poll GET /admin/reload_model/{job_id} for the result.
+    """
+    try:
+        emotion_detection.bundle_dir(version)
+    except (ValueError, FileNotFoundError) as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    job = recommender_engine.reload(version)
+    return job.to_dict()
+
+@app.get("/admin/reload_model/{job_id}")
+async def reload_model_status(job_id: str, current_user: User = Depends(get_current_user)):
+    job = recommender_engine.reload_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Unknown reload job")
+    return job.to_dict()
+
+@app.get("/model_version")
+def model_version():
+    """Artifact bundle currently serving, and the state of the latest reload."""
+    report = recommender_engine.status()
+    return {
+        **recommender_engine.bundle.describe(),
+        "ready": report["ready"],
+        "reloading": report["reloading"],
+        "last_reload": report["last_reload"],
+    }
 
 # If run directly
 if __name__ == "__main__":
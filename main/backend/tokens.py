@@ -0,0 +1,118 @@
+"""Access-token stores for the API.
+
+A token store maps bearer tokens to usernames with an expiry. The
+in-memory store only works for a single worker; ``SQLiteTokenStore`` keeps
+tokens in a local SQLite file so every uvicorn worker on the host sees the
+same logins (and logouts).
+
+    store = make_token_store(os.getenv("VYBER_TOKEN_STORE", "sqlite:///./vyber_tokens.db"))
+    store.set(token, "demo", ttl_seconds=3600)
+    store.get(token)     # → "demo", or None once expired / deleted
+    store.lookup(token)  # → ("demo", expires_at), or None
+
+The stores are synchronous (``SQLiteTokenStore`` may wait on the file
+lock); async callers run them in a thread.
+"""
+
+import sqlite3
+import threading
+import time
+from typing import Optional, Tuple
+
+
+class MemoryTokenStore:
+    """Per-process token store (single worker / tests)."""
+
+    def __init__(self):
+        self._tokens = {}  # token -> (username, expires_at)
+        self._lock = threading.Lock()
+
+    def lookup(self, token: str) -> Optional[Tuple[str, float]]:
+        """(username, expires_at) of a live token, else None."""
+        with self._lock:
+            entry = self._tokens.get(token)
+            if entry is None:
+                return None
+            if entry[1] < time.time():
+                del self._tokens[token]
+                return None
+            return entry
+
+    def get(self, token: str) -> Optional[str]:
+        entry = self.lookup(token)
+        return entry[0] if entry else None
+
+    def set(self, token: str, username: str, ttl_seconds: float):
+        with self._lock:
+            self._tokens[token] = (username, time.time() + ttl_seconds)
+
+    def delete(self, token: str):
+        with self._lock:
+            self._tokens.pop(token, None)
+
+    def delete_user(self, username: str):
+        """Revoke every token of a user."""
+        with self._lock:
+            for token in [t for t, (u, _) in self._tokens.items() if u == username]:
+                del self._tokens[token]
+
+
+class SQLiteTokenStore:
+    """Token store in a local SQLite file, shared by all workers on a host."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS tokens ("
+                "token TEXT PRIMARY KEY, username TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_tokens_username ON tokens (username)")
+
+    def _connect(self) -> sqlite3.Connection:
+        # One connection per thread; WAL lets workers read while one writes
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def lookup(self, token: str) -> Optional[Tuple[str, float]]:
+        """(username, expires_at) of a live token, else None."""
+        row = self._connect().execute(
+            "SELECT username, expires_at FROM tokens WHERE token = ? AND expires_at >= ?", (token, time.time())
+        ).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def get(self, token: str) -> Optional[str]:
+        entry = self.lookup(token)
+        return entry[0] if entry else None
+
+    def set(self, token: str, username: str, ttl_seconds: float):
+        conn = self._connect()
+        now = time.time()
+        conn.execute(
+            "INSERT OR REPLACE INTO tokens (token, username, expires_at) VALUES (?, ?, ?)",
+            (token, username, now + ttl_seconds),
+        )
+        # Logins are rare: drop expired tokens while we are writing anyway
+        conn.execute("DELETE FROM tokens WHERE expires_at < ?", (now,))
+
+    def delete(self, token: str):
+        self._connect().execute("DELETE FROM tokens WHERE token = ?", (token,))
+
+    def delete_user(self, username: str):
+        """Revoke every token of a user."""
+        self._connect().execute("DELETE FROM tokens WHERE username = ?", (username,))
+
+
+def make_token_store(url: str):
+    """``memory`` or ``sqlite:///path/to/tokens.db``."""
+    if url == "memory":
+        return MemoryTokenStore()
+    if url.startswith("sqlite:///"):
+        return SQLiteTokenStore(url[len("sqlite:///"):])
+    raise ValueError(f"Unsupported token store: {url!r} (use 'memory' or 'sqlite:///path')")
@@ -0,0 +1,103 @@
+"""Thin HTTP client for the Vyber recommendation API.
+
+The Streamlit app calls these instead of importing backend.ai.emotion_detection,
+so UI processes stay small and one warm backend engine serves every session.
+The functions mirror the engine helpers (same arguments, same dicts back).
+
+One pooled ``requests.Session`` (keep-alive connections, retries on connect
+errors) is shared by all sessions of a Streamlit server process.
+
+Set ``VYBER_API_URL`` to the backend (default http://localhost:8000). The
+engine endpoints require a bearer token: ``VYBER_API_TOKEN`` if set, else one
+obtained from /auth/token with ``VYBER_API_USERNAME`` / ``VYBER_API_PASSWORD``
+(default: the seeded demo account) and renewed when it expires.
+"""
+
+import os
+import threading
+from typing import List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+API_URL = os.getenv("VYBER_API_URL", "http://localhost:8000").rstrip("/")
+API_TIMEOUT_SECONDS = float(os.getenv("VYBER_API_TIMEOUT", "30"))
+API_POOL_SIZE = int(os.getenv("VYBER_API_POOL_SIZE", "20"))
+API_TOKEN = os.getenv("VYBER_API_TOKEN")
+API_USERNAME = os.getenv("VYBER_API_USERNAME", "demo")
+API_PASSWORD = os.getenv("VYBER_API_PASSWORD", "demo123")
+
+
+class ApiError(RuntimeError):
+    """The recommendation API could not be reached or returned an error."""
+
+
+_session = None
+_session_lock = threading.Lock()
+_token = API_TOKEN
+_token_lock = threading.Lock()
+
+
+def get_session() -> requests.Session:
+    """Process-wide pooled session (created on first use)."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                retry = Retry(total=3, connect=3, read=0, backoff_factor=0.2, allowed_methods=None)
+                adapter = HTTPAdapter(pool_connections=API_POOL_SIZE, pool_maxsize=API_POOL_SIZE, max_retries=retry)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                _session = session
+    return _session
+
+
+def get_token(renew: bool = False) -> str:
+    """Bearer token for the API (logs in on first use or when renew=True)."""
+    global _token
+    with _token_lock:
+        if _token is None or (renew and not API_TOKEN):
+            resp = get_session().post(
+                f"{API_URL}/auth/token",
+                data={"username": API_USERNAME, "password": API_PASSWORD},
+                timeout=API_TIMEOUT_SECONDS,
+            )
+            resp.raise_for_status()
+            _token = resp.json()["access_token"]
+        return _token
+
+
+def _post(path: str, payload: dict):
+    try:
+        resp = None
+        for renew in (False, True):
+            headers = {"Authorization": f"Bearer {get_token(renew)}"}
+            resp = get_session().post(f"{API_URL}{path}", json=payload, headers=headers, timeout=API_TIMEOUT_SECONDS)
+            # Expired or revoked token: log in again once
+            if resp.status_code != 401 or API_TOKEN:
+                break
+        resp.raise_for_status()
+        return resp.json()
+    except requests.RequestException as e:
+        raise ApiError(f"Recommendation API request to {path} failed: {e}") from e
+
+
+def detect_mood(text: str) -> str:
+    return _post("/mood", {"text": text})["mood"]
+
+
+def recommend(mood: str, top_n: int = 5, user_text: str = None, viewing_mode: str = "solo",
+              weight_cf: float = 0.0) -> List[dict]:
+    return _post("/recommend", {
+        "mood": mood,
+        "limit": top_n,
+        "user_text": user_text,
+        "viewing_mode": viewing_mode,
+        "weight_cf": weight_cf,
+    })
+
+
+def surprise_me(mood: str, user_text: str = None, seed: Optional[int] = None) -> dict:
+    return _post("/surprise", {"mood": mood, "user_text": user_text, "seed": seed})
@@ -14,7 +14,9 @@ MAIN_DIR = CURRENT_FILE.parents[1]
 if str(MAIN_DIR) not in sys.path:
     sys.path.insert(0, str(MAIN_DIR))
 
-from backend.ai.emotion_detection import load_movies, detect_mood, recommend, surprise_me
+# Recommendations come from the backend API (one warm engine for every
+# UI session), see frontend/api_client.py
+from frontend.api_client import ApiError, detect_mood, recommend, surprise_me
 from analytics.logger import log_event
 from analytics.dashboard import show_dashboard
 
@@ -467,11 +469,15 @@ with tabs[0]:
         st.caption(f"Using mood: {mood}")
 
         with st.spinner("Finding best matches..."):
-            movies = recommend(
-                mood=mood,
-                top_n=top_n,
-                user_text=typed_text,
-            )
+            try:
+                movies = recommend(
+                    mood=mood,
+                    top_n=top_n,
+                    user_text=typed_text,
+                )
+            except ApiError as e:
+                st.error(f"Could not get recommendations: {e}")
+                st.stop()
 
         log_event("recommendation_shown", {
             "mood": mood,
@@ -503,10 +509,14 @@ with tabs[0]:
         st.subheader("🎲 Surprise pick")
 
         with st.spinner("Picking a surprise..."):
-            movie = surprise_me(
-                mood=mood,
-                user_text=typed_text,
-            )
+            try:
+                movie = surprise_me(
+                    mood=mood,
+                    user_text=typed_text,
+                )
+            except ApiError as e:
+                st.error(f"Could not pick a surprise: {e}")
+                st.stop()
 
         log_event("surprise_shown", {
             "mood": mood,
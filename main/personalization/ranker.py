@@ -1,4 +1,6 @@
-from .context import UserContext
+import numpy as np
+
+from .context import UserContext, classify_time_of_day, context_to_preferences
 
 def apply_context_boost(genres: list[str], ctx: UserContext) -> float:
     g = set([x.lower() for x in genres])
@@ -16,4 +18,72 @@ def apply_context_boost(genres: list[str], ctx: UserContext) -> float:
     if ctx.hour >= 22 and "horror" in g:
         boost += 0.05
 
-    return boost
\ No newline at end of file
+    return boost
+
+
+def context_key(ctx: UserContext) -> tuple:
+    """
+    Bucket a context into the few states the boost rules can tell apart.
+
+    (time_of_day, hour >= 22, is_weekend, viewing_mode) – apply_context_boost
+    and context_to_preferences give the same answer for every context
+    in a bucket.
+    """
+    return (classify_time_of_day(ctx.hour), ctx.hour >= 22, ctx.is_weekend, ctx.viewing_mode)
+
+
+# One representative hour per (time_of_day, hour >= 22) bucket
+_BUCKET_HOURS = (8, 14, 19, 2, 23)
+
+
+class ContextBoostTable:
+    """
+    Precompiled context boosts over a whole catalog.
+
+    Movies are grouped by their unique genre combination and the rules are
+    evaluated once per combination and context bucket, so applying context
+    in the recommender is a single array lookup instead of one
+    apply_context_boost() call per movie.
+
+    genre_matrix is the N×G multi-hot genre matrix (columns follow
+    genre_vocab). If preference_weight > 0, movies that have one of the
+    genre_boost genres from context_to_preferences get that extra boost
+    (off by default, so results equal apply_context_boost exactly).
+    """
+
+    def __init__(self, genre_vocab, genre_matrix, preference_weight: float = 0.0):
+        self.preference_weight = preference_weight
+        combos, inverse = np.unique(np.asarray(genre_matrix), axis=0, return_inverse=True)
+        self._inverse = inverse.ravel()
+        self._combo_genres = [[genre_vocab[j] for j in np.flatnonzero(row)] for row in combos]
+        self._vectors = {}
+
+    def _compile(self, ctx: UserContext) -> np.ndarray:
+        preferred = set()
+        if self.preference_weight:
+            preferred = {g.lower() for g in context_to_preferences(ctx)["genre_boost"]}
+
+        per_combo = np.empty(len(self._combo_genres), dtype=float)
+        for i, genres in enumerate(self._combo_genres):
+            boost = apply_context_boost(genres, ctx)
+            if preferred and any(g.lower() in preferred for g in genres):
+                boost += self.preference_weight
+            per_combo[i] = boost
+        return per_combo[self._inverse]
+
+    def boosts(self, ctx: UserContext) -> np.ndarray:
+        """Boost for every movie in the catalog under this context."""
+        key = context_key(ctx)
+        vector = self._vectors.get(key)
+        if vector is None:
+            vector = self._compile(ctx)
+            self._vectors[key] = vector
+        return vector
+
+    def compile_all(self):
+        """Precompute the vectors for every context bucket (20 states)."""
+        for hour in _BUCKET_HOURS:
+            for is_weekend in (False, True):
+                for viewing_mode in ("solo", "group"):
+                    self.boosts(UserContext(hour=hour, is_weekend=is_weekend, viewing_mode=viewing_mode))
+        return self
@@ -0,0 +1,57 @@
+"""Shared setup for the backend tests.
+
+Run from the ``main/`` directory:
+
+    python -m pytest tests
+
+backend.main reads its configuration at import time, so the environment
+is pointed at throwaway locations before any test module imports it: the
+tests never touch ``vyber.db``, ``vyber_tokens.db`` or the live rating
+checkpoint in ``models/``.
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+
+MAIN_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if MAIN_DIR not in sys.path:
+    sys.path.insert(0, MAIN_DIR)
+
+_SCRATCH_DIR = tempfile.mkdtemp(prefix="vyber-tests-")
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{os.path.join(_SCRATCH_DIR, 'vyber.db')}"
+os.environ["VYBER_TOKEN_STORE"] = "memory"
+os.environ["VYBER_RATING_AGGREGATES_PATH"] = os.path.join(_SCRATCH_DIR, "rating_aggregates.npz")
+os.environ["VYBER_EMBEDDINGS_DIR"] = os.path.join(_SCRATCH_DIR, "embeddings")
+os.environ.pop("VYBER_MOOD_CACHE_PATH", None)
+
+import pytest
+
+
+@pytest.fixture
+def bundle_dir(tmp_path):
+    """A small artifact bundle: the first 600 movies of the catalog and a TF-IDF fitted on them."""
+    import joblib
+    import pandas as pd
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from backend.ai.catalog import MOVIES_DF_PATH
+
+    if not os.path.exists(MOVIES_DF_PATH):
+        pytest.skip("models/loaded_movies_df.csv is not available")
+    movies_df = pd.read_csv(MOVIES_DF_PATH, nrows=600)
+    movies_df.to_csv(tmp_path / "loaded_movies_df.csv", index=False)
+    vectorizer = TfidfVectorizer(stop_words="english").fit(movies_df["combined_features"].fillna(""))
+    joblib.dump(vectorizer, tmp_path / "tfidf_vectorizer.pkl")
+    return str(tmp_path)
+
+
+@pytest.fixture
+def db_engine(tmp_path):
+    """A fresh SQLite database with the app's tables, FTS index and triggers."""
+    from backend.main import create_db_and_tables, create_db_engine
+
+    db_engine = create_db_engine(f"sqlite+aiosqlite:///{tmp_path / 'test.db'}")
+    asyncio.run(create_db_and_tables(db_engine))
+    yield db_engine
+    asyncio.run(db_engine.dispose())
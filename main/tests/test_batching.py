@@ -0,0 +1,86 @@
+"""MicroBatcher: size and window flushing, per-caller results and error delivery."""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from backend.ai.batching import MicroBatcher
+
+
+class _Recorder:
+    """batch_fn that records its batches and doubles every item."""
+
+    def __init__(self, fail_on=None):
+        self.batches = []
+        self.fail_on = fail_on
+        self._lock = threading.Lock()
+
+    def __call__(self, items):
+        with self._lock:
+            self.batches.append(list(items))
+        if self.fail_on is not None and self.fail_on in items:
+            raise ValueError(f"bad item {self.fail_on}")
+        return [item * 2 for item in items]
+
+
+def test_full_batches_flush_without_waiting_for_the_window():
+    recorder = _Recorder()
+    batcher = MicroBatcher(recorder, max_batch_size=4, max_wait_ms=10_000)
+    start = time.perf_counter()
+    assert batcher.map(range(8)) == [i * 2 for i in range(8)]
+    assert time.perf_counter() - start < 5
+    assert recorder.batches == [[0, 1, 2, 3], [4, 5, 6, 7]]
+    assert batcher.stats()["batch_fill_ratio"] == 1.0
+
+
+def test_partial_batches_flush_when_the_window_closes():
+    recorder = _Recorder()
+    batcher = MicroBatcher(recorder, max_batch_size=100, max_wait_ms=50)
+    start = time.perf_counter()
+    assert batcher.map([1, 2, 3]) == [2, 4, 6]
+    assert time.perf_counter() - start >= 0.045
+    assert batcher(4) == 8
+    assert recorder.batches == [[1, 2, 3], [4]]
+
+
+def test_concurrent_callers_get_their_own_results():
+    recorder = _Recorder()
+    batcher = MicroBatcher(recorder, max_batch_size=8, max_wait_ms=20)
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        results = list(pool.map(batcher, range(200)))
+    assert results == [i * 2 for i in range(200)]
+    assert len(recorder.batches) < 200
+    stats = batcher.stats()
+    assert stats["items"] == 200 and stats["max_batch_size"] == 8
+
+
+def test_a_failing_batch_fn_raises_in_every_waiter():
+    def broken(items):
+        raise RuntimeError("model down")
+
+    batcher = MicroBatcher(broken, max_batch_size=4, max_wait_ms=20)
+    futures = [batcher.submit(i) for i in range(4)]
+    for future in futures:
+        with pytest.raises(RuntimeError, match="model down"):
+            future.result(timeout=5)
+    assert batcher.stats()["failed_batches"] == 1
+
+
+def test_a_bad_item_only_fails_its_own_caller():
+    recorder = _Recorder(fail_on=2)
+    batcher = MicroBatcher(recorder, max_batch_size=4, max_wait_ms=10_000)
+    futures = [batcher.submit(i) for i in range(4)]
+    with pytest.raises(ValueError, match="bad item 2"):
+        futures[2].result(timeout=5)
+    assert [futures[i].result(timeout=5) for i in (0, 1, 3)] == [0, 2, 6]
+    # The batch, then each item on its own
+    assert recorder.batches == [[0, 1, 2, 3], [0], [1], [2], [3]]
+
+
+def test_a_short_result_list_is_retried_item_by_item():
+    batcher = MicroBatcher(lambda items: items[:1], max_batch_size=3, max_wait_ms=10_000)
+    futures = [batcher.submit(i) for i in range(3)]
+    assert [f.result(timeout=5) for f in futures] == [0, 1, 2]
+    assert batcher.stats()["failed_batches"] == 1
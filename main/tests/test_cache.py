@@ -0,0 +1,99 @@
+"""TTLCache: expiry, LRU eviction, per-entry TTL, delete_where and persistence."""
+
+import json
+import os
+
+import pytest
+
+from backend.ai import cache as cache_module
+from backend.ai.cache import TTLCache, normalize_text
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Controllable wall clock for the cache module."""
+    now = [1_000_000.0]
+    monkeypatch.setattr(cache_module.time, "time", lambda: now[0])
+    return now
+
+
+def test_normalize_text():
+    assert normalize_text("  Feeling   SAD\ttoday ") == "feeling sad today"
+
+
+def test_entries_expire_after_the_ttl(clock):
+    cache = TTLCache(ttl_seconds=10)
+    cache.set("a", 1)
+    clock[0] += 9
+    assert cache.get("a") == 1
+    clock[0] += 2
+    assert cache.get("a", "gone") == "gone"
+    assert cache.stats()["expirations"] == 1
+    assert len(cache) == 0
+
+
+def test_per_entry_ttl_is_capped_at_the_cache_ttl(clock):
+    cache = TTLCache(ttl_seconds=10)
+    cache.set("short", 1, ttl_seconds=2)
+    cache.set("long", 2, ttl_seconds=1000)
+    clock[0] += 3
+    assert cache.get("short") is None
+    assert cache.get("long") == 2
+    clock[0] += 8
+    assert cache.get("long") is None
+
+
+def test_least_recently_used_entry_is_evicted(clock):
+    cache = TTLCache(max_size=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+    stats = cache.stats()
+    assert (stats["evictions"], stats["hits"], stats["misses"]) == (1, 3, 1)
+
+
+def test_delete_where_drops_only_matching_entries(clock):
+    cache = TTLCache()
+    cache.set("t1", "alice")
+    cache.set("t2", "bob")
+    cache.set("t3", "alice")
+    assert cache.delete_where(lambda key, value: value == "alice") == 2
+    assert (cache.get("t1"), cache.get("t2"), cache.get("t3")) == (None, "bob", None)
+    cache.delete("t2")
+    assert len(cache) == 0
+
+
+def test_save_and_load_keep_deadlines_and_skip_expired(tmp_path, clock):
+    path = str(tmp_path / "cache.json")
+    cache = TTLCache(ttl_seconds=10, path=path, save_every=0)
+    cache.set("old", 1, ttl_seconds=1)
+    cache.set("new", {"mood": "happy"})
+    cache.save()
+    assert os.listdir(tmp_path) == ["cache.json"]  # no temp file left behind
+
+    clock[0] += 5
+    restored = TTLCache(ttl_seconds=10, path=path)
+    assert restored.get("old") is None
+    assert restored.get("new") == {"mood": "happy"}
+    clock[0] += 6
+    assert restored.get("new") is None
+
+
+def test_set_saves_every_n_writes(tmp_path, clock):
+    path = tmp_path / "cache.json"
+    cache = TTLCache(path=str(path), save_every=2)
+    cache.set("a", 1)
+    assert not path.exists()
+    cache.set("b", 2)
+    assert [key for key, _, _ in json.loads(path.read_text())] == ["a", "b"]
+
+
+def test_unserializable_values_do_not_break_the_cache(tmp_path, clock):
+    cache = TTLCache(path=str(tmp_path / "cache.json"), save_every=0)
+    cache.set("a", object())
+    cache.save()
+    assert cache.get("a") is not None
+    assert os.listdir(tmp_path) == []
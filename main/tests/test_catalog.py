@@ -0,0 +1,80 @@
+"""Binary columnar catalog vs the movies CSV it is built from."""
+
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from backend.ai.catalog import (
+    MOVIES_DF_PATH,
+    _ensure_genres_list,
+    catalog_from_frame,
+    load_catalog,
+    read_catalog,
+    write_catalog,
+)
+
+
+@pytest.fixture
+def movies_csv(tmp_path):
+    """A copy of the shipped movies CSV, so the catalog is built in tmp_path."""
+    if not os.path.exists(MOVIES_DF_PATH):
+        pytest.skip("models/loaded_movies_df.csv is not available")
+    path = tmp_path / "loaded_movies_df.csv"
+    shutil.copyfile(MOVIES_DF_PATH, path)
+    return str(path)
+
+
+def test_catalog_matches_the_csv(movies_csv, tmp_path):
+    expected = pd.read_csv(movies_csv)
+    expected["genres"] = expected["genres"].apply(_ensure_genres_list)
+
+    catalog = load_catalog(movies_csv, str(tmp_path / "catalog.npz"))
+    frame = catalog.to_frame()
+
+    assert list(frame.columns) == list(expected.columns)
+    assert len(frame) == len(expected)
+    for name in expected.columns:
+        if name == "genres":
+            assert frame[name].tolist() == expected[name].tolist()
+        elif pd.api.types.is_numeric_dtype(expected[name]):
+            np.testing.assert_array_equal(frame[name].to_numpy(), expected[name].to_numpy(), err_msg=name)
+        else:
+            missing_as_none = lambda values: [None if pd.isna(v) else v for v in values]
+            assert missing_as_none(frame[name]) == missing_as_none(expected[name]), name
+    # Exact float64 ratings, as float(row["avg_rating"]) gives on the CSV
+    assert frame["avg_rating"].dtype == np.float64
+
+
+def test_catalog_is_rebuilt_when_the_csv_changes(tmp_path):
+    csv_path = tmp_path / "movies.csv"
+    catalog_path = str(tmp_path / "catalog.npz")
+    csv_path.write_text("movieId,title,genres,avg_rating\n1,A,\"['Drama']\",3.5\n", encoding="utf-8")
+    assert load_catalog(str(csv_path), catalog_path).columns["title"] == ["A"]
+
+    csv_path.write_text("movieId,title,genres,avg_rating\n1,A,\"['Drama']\",3.5\n2,B,[],4.25\n", encoding="utf-8")
+    catalog = load_catalog(str(csv_path), catalog_path)
+    assert catalog.columns["title"] == ["A", "B"]
+    assert catalog.genres_of(1) == []
+
+    # Without the CSV the stored catalog is used as-is
+    os.unlink(csv_path)
+    assert read_catalog(catalog_path).columns["avg_rating"].tolist() == [3.5, 4.25]
+    assert load_catalog(str(csv_path), catalog_path).columns["title"] == ["A", "B"]
+
+
+def test_missing_strings_round_trip_as_none(tmp_path):
+    frame = pd.DataFrame({"movieId": [1, 2], "title": ["A", None], "genres": [["Drama"], []]})
+    path = str(tmp_path / "catalog.npz")
+    write_catalog(catalog_from_frame(frame), path)
+    catalog = read_catalog(path)
+    assert catalog.columns["title"] == ["A", None]
+    assert catalog.genre_lists() == [["Drama"], []]
+
+
+def test_nul_characters_are_rejected(tmp_path):
+    frame = pd.DataFrame({"movieId": [1], "title": ["bad\x00title"], "genres": [[]]})
+    with pytest.raises(ValueError, match="NUL"):
+        write_catalog(catalog_from_frame(frame), str(tmp_path / "catalog.npz"))
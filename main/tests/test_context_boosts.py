@@ -0,0 +1,68 @@
+"""ContextBoostTable lookups vs the per-movie apply_context_boost rules they precompile."""
+
+import itertools
+
+import numpy as np
+import pytest
+
+from backend.ai.emotion_detection import ArtifactBundle, _mood_candidate_indices, mood_to_genres_map
+from personalization.context import UserContext, context_to_preferences
+from personalization.ranker import ContextBoostTable, apply_context_boost, context_key
+
+CONTEXTS = [
+    UserContext(hour=hour, is_weekend=is_weekend, viewing_mode=viewing_mode)
+    for hour, is_weekend, viewing_mode in itertools.product(range(24), (False, True), ("solo", "group"))
+]
+
+
+def _expected(genre_lists, ctx):
+    return np.array([apply_context_boost(genres, ctx) for genres in genre_lists])
+
+
+def test_catalog_boosts_match_the_rules_for_every_mood_and_context(bundle_dir):
+    bundle = ArtifactBundle(bundle_dir)
+    table = bundle.context_boosts
+    genre_lists = bundle.movies_df["genres"].tolist()
+    expected = {context_key(ctx): _expected(genre_lists, ctx) for ctx in CONTEXTS}
+
+    for mood in mood_to_genres_map:
+        candidates = _mood_candidate_indices(bundle.genre_index, mood)
+        for ctx in CONTEXTS:
+            np.testing.assert_array_equal(
+                table.boosts(ctx)[candidates], expected[context_key(ctx)][candidates],
+                err_msg=f"{mood} {ctx}",
+            )
+
+
+def test_compile_all_covers_every_context_bucket():
+    table = ContextBoostTable(["Action"], np.array([[1], [0]])).compile_all()
+    compiled = len(table._vectors)
+    for ctx in CONTEXTS:
+        table.boosts(ctx)
+    assert len(table._vectors) == compiled == 20
+
+
+def test_genre_spellings_and_duplicates_match_the_rules():
+    vocab = ["Action", "comedy", "HORROR", "Drama", "action"]
+    matrix = np.array([
+        [1, 0, 0, 0, 0],
+        [0, 1, 1, 0, 0],
+        [1, 0, 0, 0, 1],
+        [0, 0, 0, 1, 0],
+        [0, 0, 0, 0, 0],
+        [1, 1, 1, 0, 0],
+    ])
+    genre_lists = [[vocab[j] for j in np.flatnonzero(row)] for row in matrix]
+    table = ContextBoostTable(vocab, matrix)
+    for ctx in CONTEXTS:
+        np.testing.assert_array_equal(table.boosts(ctx), _expected(genre_lists, ctx), err_msg=str(ctx))
+
+
+def test_preference_weight_adds_the_context_genres():
+    vocab = ["Action", "Comedy", "Drama", "Horror"]
+    matrix = np.eye(len(vocab), dtype=np.uint8)
+    table = ContextBoostTable(vocab, matrix, preference_weight=0.02)
+    for ctx in CONTEXTS:
+        preferred = {g.lower() for g in context_to_preferences(ctx)["genre_boost"]}
+        expected = [apply_context_boost([g], ctx) + (0.02 if g.lower() in preferred else 0.0) for g in vocab]
+        assert table.boosts(ctx) == pytest.approx(expected), str(ctx)
@@ -0,0 +1,85 @@
+"""embed_movies: published vectors and Movie.vector_id agree with each other."""
+
+import asyncio
+
+import numpy as np
+from sqlalchemy import delete, insert, select
+
+from backend.ai.vector_index import SemanticIndex, current_index_dir, movie_text
+from backend.embed_movies import _write_vector_ids, embed_movies
+from backend.main import Movie
+
+MOVIES = [
+    (2, "Toy Story (1995)", "Animation, Comedy", "A cowboy doll is threatened by a new spaceman figure."),
+    (3, "Heat (1995)", "Action, Crime", "A detective hunts a crew of professional thieves."),
+    (7, "Sabrina (1995)", "Comedy, Romance", None),
+    (8, "Jumanji (1995)", "Adventure, Fantasy", "Children find a magical board game."),
+    (15, "Casino (1995)", "Crime, Drama", "Greed and betrayal in Las Vegas."),
+    (16, "Sense and Sensibility (1995)", "Drama, Romance", "Two sisters look for love."),
+    (21, "Balto (1995)", "Animation, Adventure", "A dog leads a sled run to bring medicine."),
+]
+
+
+def _vector_ids(db_engine):
+    async def run():
+        async with db_engine.connect() as conn:
+            return dict((await conn.execute(select(Movie.id, Movie.vector_id))).all())
+    return asyncio.run(run())
+
+
+def _embed(db_engine, out_dir):
+    return asyncio.run(embed_movies(str(db_engine.url), str(out_dir), backend="lsa", chunk_size=3, on_progress=None))
+
+
+def test_vector_ids_point_at_the_published_vectors(db_engine, tmp_path):
+    async def seed():
+        async with db_engine.begin() as conn:
+            await conn.execute(insert(Movie), [
+                {"id": i, "title": title, "genres": genres, "description": description}
+                for i, title, genres, description in MOVIES
+            ])
+    asyncio.run(seed())
+
+    out_dir = tmp_path / "embeddings"
+    report = _embed(db_engine, out_dir)
+    index = SemanticIndex.load(current_index_dir(str(out_dir)))
+    assert report["path"] == current_index_dir(str(out_dir)) and len(index) == len(MOVIES)
+
+    vector_ids = _vector_ids(db_engine)
+    assert sorted(vector_ids.values()) == list(range(len(MOVIES)))
+    for movie_id, title, genres, description in MOVIES:
+        vector_id = vector_ids[movie_id]
+        assert index.movie_ids[vector_id] == movie_id
+        expected = index.encoder.encode([movie_text(title, genres, description)])[0]
+        np.testing.assert_allclose(index.vectors[vector_id], expected, rtol=1e-5, atol=1e-6)
+        # A movie's own text finds it
+        assert index.search_text(movie_text(title, genres, description), k=1, nprobe=index.ivf.n_lists)[0][0] == vector_id
+
+
+def test_vector_ids_are_reassigned_on_every_run(db_engine, tmp_path):
+    async def seed():
+        async with db_engine.begin() as conn:
+            await conn.execute(insert(Movie), [{"id": i, "title": title} for i, title, _, _ in MOVIES])
+    asyncio.run(seed())
+    _embed(db_engine, tmp_path / "embeddings")
+
+    async def drop_first():
+        async with db_engine.begin() as conn:
+            await conn.execute(delete(Movie).where(Movie.id == MOVIES[0][0]))
+    asyncio.run(drop_first())
+    _embed(db_engine, tmp_path / "embeddings")
+
+    index = SemanticIndex.load(current_index_dir(str(tmp_path / "embeddings")))
+    vector_ids = _vector_ids(db_engine)
+    assert sorted(vector_ids.values()) == list(range(len(MOVIES) - 1))
+    assert all(index.movie_ids[v] == movie_id for movie_id, v in vector_ids.items())
+
+
+def test_write_vector_ids_clears_movies_missing_from_the_index(db_engine):
+    async def run():
+        async with db_engine.begin() as conn:
+            await conn.execute(insert(Movie), [{"id": i, "title": title, "vector_id": 99} for i, title, _, _ in MOVIES])
+        await _write_vector_ids(db_engine, np.array([16, 3, 21]), chunk_size=2)
+    asyncio.run(run())
+    vector_ids = _vector_ids(db_engine)
+    assert {m: v for m, v in vector_ids.items() if v is not None} == {16: 0, 3: 1, 21: 2}
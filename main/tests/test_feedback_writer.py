@@ -0,0 +1,105 @@
+"""GroupCommitWriter: batching, flush on stop, bad-row isolation and back-pressure."""
+
+import asyncio
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from backend.feedback_writer import GroupCommitWriter, WriterOverloaded
+from backend.main import Feedback
+
+
+def _feedback_rows(db_engine):
+    async def run():
+        async with db_engine.connect() as conn:
+            return (await conn.execute(select(Feedback.movie_id, Feedback.rating).order_by(Feedback.id))).all()
+    return [tuple(row) for row in asyncio.run(run())]
+
+
+def _writer(db_engine, **kwargs):
+    session_factory = async_sessionmaker(db_engine, class_=AsyncSession, expire_on_commit=False)
+    return GroupCommitWriter(session_factory, Feedback, **kwargs)
+
+
+def test_rows_are_grouped_into_few_commits(db_engine):
+    writer = _writer(db_engine, max_batch_size=50, max_wait_ms=200)
+
+    async def run():
+        await writer.start()
+        await asyncio.gather(*(writer.submit({"user_id": 1, "movie_id": i, "rating": 4}) for i in range(120)))
+        await writer.stop()
+    asyncio.run(run())
+
+    stats = writer.stats()
+    assert stats["rows"] == 120
+    assert stats["batches"] == 3
+    assert stats["max_batch_size"] == 50 and stats["avg_batch_size"] == 40.0
+    assert [movie_id for movie_id, _ in _feedback_rows(db_engine)] == list(range(120))
+
+
+def test_stop_flushes_rows_that_are_still_queued(db_engine):
+    writer = _writer(db_engine, max_batch_size=10, max_wait_ms=300)
+
+    async def run():
+        await writer.submit({"movie_id": 1, "rating": 5})  # starts the writer
+        await writer.submit({"movie_id": 2, "rating": 3})
+        await writer.stop()
+    asyncio.run(run())
+
+    assert _feedback_rows(db_engine) == [(1, 5), (2, 3)]
+    assert writer.stats()["queue_depth"] == 0
+
+
+def test_a_bad_row_does_not_drop_its_batch(db_engine):
+    writer = _writer(db_engine, max_batch_size=10, max_wait_ms=50)
+
+    async def run():
+        await writer.start()
+        for row in ({"movie_id": 1, "rating": 5}, {"movie_id": 2, "rating": object()}, {"movie_id": 3, "rating": 1}):
+            await writer.submit(row)
+        await writer.stop()
+    asyncio.run(run())
+
+    assert _feedback_rows(db_engine) == [(1, 5), (3, 1)]
+    stats = writer.stats()
+    assert (stats["failed_batches"], stats["failed_rows"], stats["rows"]) == (1, 1, 3)
+
+
+class _BlockedSession:
+    """Session whose commit waits until the test releases it."""
+
+    def __init__(self, release: asyncio.Event):
+        self.release = release
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, *args, **kwargs):
+        pass
+
+    async def commit(self):
+        await self.release.wait()
+
+
+def test_submit_raises_when_the_queue_stays_full():
+    async def run():
+        release = asyncio.Event()
+        writer = GroupCommitWriter(lambda: _BlockedSession(release), Feedback,
+                                   max_batch_size=1, max_wait_ms=0, max_queue_size=1, put_timeout=0.05)
+        await writer.start()
+        await writer.submit({"movie_id": 1})  # taken by the worker, which then blocks
+        await asyncio.sleep(0.01)
+        await writer.submit({"movie_id": 2})  # fills the queue
+        with pytest.raises(WriterOverloaded):
+            await writer.submit({"movie_id": 3})
+        release.set()
+        await writer.stop()
+        return writer.stats()
+
+    stats = asyncio.run(run())
+    assert (stats["rows"], stats["rejected"]) == (2, 1)
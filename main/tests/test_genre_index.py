@@ -0,0 +1,48 @@
+"""GenreIndex: multi-hot genre filtering vs the per-row genre checks it replaces."""
+
+import numpy as np
+import pandas as pd
+
+from backend.ai.catalog import catalog_from_frame
+from backend.ai.genre_index import GenreIndex
+
+GENRE_LISTS = [
+    ["Comedy", "Romance"],
+    ["Drama"],
+    [],
+    ["Docudrama"],
+    ["comedy", "Family"],
+    ["Horror", "Thriller", "Drama"],
+]
+
+
+def _reference(genre_lists, genres):
+    """The original per-row check: any of the genres, case-insensitive."""
+    wanted = {g.lower() for g in genres}
+    return np.array([any(g.lower() in wanted for g in row) for row in genre_lists])
+
+
+def test_masks_match_the_per_row_check():
+    index = GenreIndex.from_genre_lists(GENRE_LISTS)
+    for genres in (["Comedy"], ["Comedy", "Family"], ["drama"], ["Horror", "Romance"], ["Western"], []):
+        np.testing.assert_array_equal(index.mask_for(genres), _reference(GENRE_LISTS, genres), err_msg=str(genres))
+
+
+def test_matching_is_exact_per_genre_and_case_insensitive():
+    index = GenreIndex.from_genre_lists(GENRE_LISTS)
+    assert index.indices_for(["Drama"]).tolist() == [1, 5]
+    assert index.indices_for(["COMEDY"]).tolist() == [0, 4]
+    assert index.columns_for(["Western"]) == []
+
+
+def test_catalog_codes_build_the_same_index():
+    frame = pd.DataFrame({"movieId": range(len(GENRE_LISTS)), "genres": [str(g) for g in GENRE_LISTS]})
+    from_catalog = GenreIndex.from_catalog(catalog_from_frame(frame))
+    assert len(from_catalog) == len(GENRE_LISTS)
+    for genres in (["Comedy"], ["Drama", "Family"], ["Docudrama"]):
+        np.testing.assert_array_equal(from_catalog.mask_for(genres), _reference(GENRE_LISTS, genres))
+
+
+def test_non_list_genres_count_as_empty():
+    index = GenreIndex.from_genre_lists([None, "Drama", ["Drama", None, "  "]])
+    assert index.indices_for(["Drama"]).tolist() == [2]
@@ -0,0 +1,127 @@
+"""Bulk ingest: CSV / NDJSON parsing, upserts on movielens_id / tmdb_id, movie_genres and legacy rows."""
+
+import asyncio
+
+from sqlalchemy import select, text
+
+from backend.ingest import CatalogIngest, RecordParser, ingest_file, normalize_record
+from backend.main import Movie, MovieGenre, create_db_engine
+
+
+def _ingest(db_engine, records, chunk_size=2):
+    async def run():
+        ingest = CatalogIngest(db_engine, chunk_size=chunk_size)
+        for record in records:
+            await ingest.add(record)
+        await ingest.flush()
+        return ingest.progress(done=True)
+    return asyncio.run(run())
+
+
+def _query(db_engine, statement):
+    async def run():
+        async with db_engine.connect() as conn:
+            return (await conn.execute(statement)).all()
+    return asyncio.run(run())
+
+
+def _movies(db_engine):
+    rows = _query(db_engine, select(Movie.movielens_id, Movie.tmdb_id, Movie.title, Movie.description, Movie.genres).order_by(Movie.id))
+    return [tuple(row) for row in rows]
+
+
+def _genres(db_engine):
+    rows = _query(db_engine, select(Movie.title, MovieGenre.genre).join(MovieGenre, MovieGenre.movie_id == Movie.id))
+    return sorted(tuple(row) for row in rows)
+
+
+def test_normalize_record_maps_movielens_and_tmdb_ids():
+    row = normalize_record({"movieId": "1", "tmdbId": "862.0", "title": " Toy Story (1995) ",
+                            "genres": "['Adventure', 'Animation']"})
+    assert row == {"movielens_id": 1, "tmdb_id": 862, "title": "Toy Story (1995)",
+                   "description": None, "genres": "Adventure,Animation"}
+    assert normalize_record({"movieId": "2", "title": ""}) is None
+    assert normalize_record({"tmdb_id": "5", "title": "x", "genres": "(no genres listed)"})["genres"] is None
+
+
+def test_record_parser_joins_quoted_newlines():
+    parser = RecordParser("csv")
+    lines = ["movieId,title,description\n", '1,Heat,"one\n', 'two"\n']
+    records = [r for r in map(parser.feed_line, lines) if r is not None]
+    assert records == [{"movieId": "1", "title": "Heat", "description": "one\ntwo"}]
+
+
+def test_upsert_updates_rows_in_place_and_refreshes_genres(db_engine):
+    _ingest(db_engine, [
+        {"movieId": 1, "title": "Toy Story", "genres": "Animation|Comedy", "description": "toys"},
+        {"movieId": 2, "title": "Jumanji", "genres": "Adventure"},
+        {"tmdb_id": 99, "title": "TMDB only", "genres": "Drama"},
+    ])
+    # Same keys again: one row per movie, new values, description kept when missing
+    progress = _ingest(db_engine, [
+        {"movieId": 1, "title": "Toy Story (1995)", "genres": "Animation", "tmdbId": 862},
+        {"tmdb_id": 99, "title": "TMDB only (2001)", "genres": "Drama|Crime"},
+        {"movieId": 2, "title": "Jumanji (1995)", "genres": "Adventure|Fantasy"},
+    ])
+
+    assert progress["rows"] == 3 and progress["done"]
+    assert _movies(db_engine) == [
+        (1, 862, "Toy Story (1995)", "toys", "Animation"),
+        (2, None, "Jumanji (1995)", None, "Adventure,Fantasy"),
+        (None, 99, "TMDB only (2001)", None, "Drama,Crime"),
+    ]
+    assert _genres(db_engine) == [
+        ("Jumanji (1995)", "adventure"),
+        ("Jumanji (1995)", "fantasy"),
+        ("TMDB only (2001)", "crime"),
+        ("TMDB only (2001)", "drama"),
+        ("Toy Story (1995)", "animation"),
+    ]
+
+
+def test_last_row_wins_for_a_key_repeated_in_one_chunk(db_engine):
+    _ingest(db_engine, [{"movieId": 5, "title": "First"}, {"movieId": 5, "title": "Second"}], chunk_size=10)
+    assert _movies(db_engine) == [(5, None, "Second", None, None)]
+
+
+def test_unkeyed_rows_are_always_inserted(db_engine):
+    _ingest(db_engine, [{"title": "No id"}, {"title": "No id"}])
+    assert [title for _, _, title, _, _ in _movies(db_engine)] == ["No id", "No id"]
+
+
+def test_legacy_tmdb_rows_are_adopted_only_when_the_title_matches(db_engine):
+    # Older ingests stored the MovieLens movieId in tmdb_id
+    async def seed():
+        async with db_engine.begin() as conn:
+            await conn.execute(text("INSERT INTO movie (tmdb_id, title) VALUES (1, 'Toy Story'), (2, 'Real TMDB movie')"))
+    asyncio.run(seed())
+
+    _ingest(db_engine, [{"movieId": 1, "title": "Toy Story"}, {"movieId": 2, "title": "Jumanji"}])
+
+    assert _movies(db_engine) == [
+        (1, None, "Toy Story", None, None),
+        (None, 2, "Real TMDB movie", None, None),
+        (2, None, "Jumanji", None, None),
+    ]
+
+
+def test_ingest_file_loads_csv_and_ndjson(tmp_path):
+    csv_path = tmp_path / "movies.csv"
+    csv_path.write_text("movieId,title,genres\n1,Heat,Crime|Drama\n2,,Comedy\n", encoding="utf-8")
+    ndjson_path = tmp_path / "movies.ndjson"
+    ndjson_path.write_text('{"movieId": 1, "title": "Heat (1995)", "genres": ["Crime", "Drama"]}\n{"tmdb_id": 7, "title": "Other"}\n', encoding="utf-8")
+    database_url = f"sqlite+aiosqlite:///{tmp_path / 'ingest.db'}"
+
+    first = asyncio.run(ingest_file(str(csv_path), database_url=database_url, on_progress=None))
+    second = asyncio.run(ingest_file(str(ndjson_path), database_url=database_url, on_progress=None))
+
+    assert (first["rows"], first["skipped"]) == (1, 1)
+    assert second["rows"] == 2
+    db_engine = create_db_engine(database_url)
+    try:
+        assert _movies(db_engine) == [
+            (1, None, "Heat (1995)", None, "Crime,Drama"),
+            (None, 7, "Other", None, None),
+        ]
+    finally:
+        asyncio.run(db_engine.dispose())
@@ -0,0 +1,92 @@
+"""Item-item CF index vs a brute-force adjusted cosine, and its rebuild on new ratings."""
+
+import os
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from backend.ai.emotion_detection import ArtifactBundle
+from backend.ai.item_cf import build_from_ratings, build_item_cf_index, build_rating_matrix
+from backend.ai.neighbor_index import index_source_key, neighbors_of
+
+SHRINKAGE = 3.0
+
+
+def _random_ratings(n_users=40, n_movies=15, density=0.35, seed=0):
+    rng = np.random.default_rng(seed)
+    mask = rng.random((n_users, n_movies)) < density
+    values = rng.integers(1, 11, size=(n_users, n_movies)) / 2.0
+    return sparse.csr_matrix(np.where(mask, values, 0.0), dtype=np.float32)
+
+
+def _brute_force_similarities(matrix, shrinkage):
+    """Shrunk adjusted cosine of every movie pair, one pair at a time."""
+    dense = matrix.toarray().astype(np.float64)
+    rated = dense != 0
+    user_means = [dense[u, rated[u]].mean() if rated[u].any() else 0.0 for u in range(dense.shape[0])]
+    centered = np.where(rated, dense - np.array(user_means)[:, None], 0.0)
+
+    n_movies = dense.shape[1]
+    sims = np.full((n_movies, n_movies), -np.inf)
+    for i in range(n_movies):
+        for j in range(n_movies):
+            if i == j:
+                continue
+            norm = np.linalg.norm(centered[:, i]) * np.linalg.norm(centered[:, j])
+            cosine = centered[:, i] @ centered[:, j] / norm if norm > 0 else 0.0
+            co_raters = np.sum(rated[:, i] & rated[:, j])
+            sims[i, j] = cosine * co_raters / (co_raters + shrinkage)
+    return sims
+
+
+def test_index_holds_the_brute_force_top_k_neighbors():
+    matrix = _random_ratings()
+    top_k = 4
+    index = build_item_cf_index(matrix, top_k=top_k, shrinkage=SHRINKAGE, chunk_size=4)
+    sims = _brute_force_similarities(matrix, SHRINKAGE)
+
+    for movie in range(matrix.shape[1]):
+        cols, scores = neighbors_of(index, movie)
+        # Negative similarities are dropped, positive ones kept up to top_k
+        expected = np.sort(sims[movie][sims[movie] > 0])[::-1][:top_k]
+        np.testing.assert_allclose(scores, expected, rtol=1e-4, err_msg=str(movie))
+        np.testing.assert_allclose(sims[movie, cols], scores, rtol=1e-4)
+
+
+def test_rating_matrix_follows_the_catalog_order():
+    matrix = build_rating_matrix(
+        user_ids=np.array([7, 7, 9, 9, 7]),
+        movie_ids=np.array([30, 10, 10, 99, 30]),
+        ratings=np.array([1.0, 4.0, 2.5, 5.0, 3.5]),
+        catalog_movie_ids=[10, 20, 30],
+    )
+    # Unknown movie 99 dropped, the repeated (7, 30) rating keeps its last value
+    np.testing.assert_array_equal(matrix.toarray(), [[4.0, 0.0, 3.5], [2.5, 0.0, 0.0]])
+
+
+def _write_ratings(bundle_dir, n_users, seed):
+    movie_ids = pd.read_csv(os.path.join(bundle_dir, "loaded_movies_df.csv"), usecols=["movieId"])["movieId"].to_numpy()
+    rng = np.random.default_rng(seed)
+    rows = [(user, movie, rng.integers(1, 11) / 2.0, 0)
+            for user in range(n_users) for movie in rng.choice(movie_ids[:50], size=10, replace=False)]
+    pd.DataFrame(rows, columns=["userId", "movieId", "rating", "timestamp"]).to_csv(
+        os.path.join(bundle_dir, "ratings_cleaned.csv"), index=False)
+
+
+def test_index_is_cached_and_rebuilt_for_new_ratings(bundle_dir):
+    path = os.path.join(bundle_dir, "item_cf_index.npz")
+    _write_ratings(bundle_dir, n_users=30, seed=0)
+    bundle = ArtifactBundle(bundle_dir)
+    first = bundle.item_cf_index
+    assert first.nnz > 0
+    assert index_source_key(path) == bundle.source_key("catalog", "ratings")
+    np.testing.assert_array_equal(ArtifactBundle(bundle_dir).item_cf_index.data, first.data)
+
+    _write_ratings(bundle_dir, n_users=60, seed=1)
+    bundle = ArtifactBundle(bundle_dir)
+    rebuilt = bundle.item_cf_index
+    assert index_source_key(path) == bundle.source_key("catalog", "ratings")
+    expected = build_from_ratings(bundle.catalog.columns["movieId"], bundle.ratings_path)
+    assert (rebuilt != first).nnz > 0
+    assert (rebuilt != expected).nnz == 0
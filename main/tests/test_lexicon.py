@@ -0,0 +1,127 @@
+"""Tiered mood detection: the keyword lexicon and the transformer fallback."""
+
+from concurrent.futures import Future
+
+import pytest
+
+from backend.ai import emotion_detection as ed
+from backend.ai.cache import TTLCache
+from backend.ai.lexicon import LexiconScorer
+
+THRESHOLD = ed.LEXICON_CONFIDENCE_THRESHOLD
+
+
+@pytest.fixture
+def scorer():
+    return LexiconScorer(ed.emotion_to_mood_map)
+
+
+class _FakeModel:
+    """Stands in for the batched emotion pipeline; answers with one label."""
+
+    def __init__(self, label="joy", error=None):
+        self.label = label
+        self.error = error
+        self.texts = []
+
+    def _distribution(self, text):
+        self.texts.append(text)
+        if self.error is not None:
+            raise self.error
+        return [{"label": self.label, "score": 0.9}, {"label": "neutral", "score": 0.1}]
+
+    def __call__(self, text):
+        return self._distribution(text)
+
+    def submit(self, text):
+        future = Future()
+        try:
+            future.set_result(self._distribution(text))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+
+@pytest.fixture
+def model(monkeypatch):
+    """Route the engine's model tier to a fake, with an empty mood cache."""
+    fake = _FakeModel(label="fear")
+    monkeypatch.setattr(ed.engine, "emotion_batcher", fake)
+    monkeypatch.setattr(ed.engine, "mood_cache", TTLCache())
+    return fake
+
+
+# --- Lexicon tier ---
+
+@pytest.mark.parametrize("text, mood", [
+    ("I feel sad and lonely", "sad"),
+    ("want to laugh at something funny", "happy"),
+    ("scary horror please", "scary"),
+    ("angry and furious", "action"),
+    ("I fell in love, want a romantic movie", "romantic"),
+])
+def test_agreeing_keywords_are_confident(scorer, text, mood):
+    result = scorer.score(text)
+    assert result.mood == mood
+    assert result.confidence >= THRESHOLD
+
+
+@pytest.mark.parametrize("text", [
+    "I would love to watch a good movie tonight",
+    "I wonder what I should watch",
+    "I want to explore something, maybe a fight or an action flick",
+    "so mad at work today",
+])
+def test_filler_words_do_not_score(scorer, text):
+    assert scorer.score(text).confidence < THRESHOLD
+
+
+def test_a_single_keyword_stays_below_the_threshold(scorer):
+    for text in ("sad", "I'm feeling happy", "something scary"):
+        result = scorer.score(text)
+        assert result.mood is not None
+        assert result.confidence <= 0.5
+
+
+def test_negation_and_mixed_moods_lower_confidence(scorer):
+    assert scorer.score("not happy and not cheerful").confidence == 0.0
+    mixed = scorer.score("sad lonely but also funny hilarious")
+    assert mixed.confidence == 0.5
+
+
+def test_long_texts_are_scaled_down(scorer):
+    short = scorer.score("sad and lonely")
+    long = scorer.score("sad and lonely " + " ".join(["word"] * 30))
+    assert long.confidence < short.confidence
+
+
+# --- Tiers in detect_mood ---
+
+def test_confident_lexicon_hits_skip_the_model(model):
+    assert ed.detect_mood("I feel sad and lonely") == "sad"
+    assert model.texts == []
+
+
+def test_ambiguous_texts_fall_back_to_the_model(model):
+    assert ed.detect_mood("I would love to watch a good movie tonight") == "scary"
+    assert ed.detect_mood("sad") == "scary"
+    assert model.texts == ["I would love to watch a good movie tonight", "sad"]
+
+
+def test_model_results_are_cached(model):
+    ed.detect_mood("I wonder what I should watch")
+    ed.detect_mood("  i WONDER what I should   watch ")
+    assert len(model.texts) == 1
+
+
+def test_batch_mixes_tiers_and_deduplicates_model_calls(model):
+    moods = ed.detect_mood_batch(["I feel sad and lonely", "what now", "", "What  now"])
+    assert moods == ["sad", "scary", ed.DEFAULT_MOOD, "scary"]
+    assert model.texts == ["what now"]
+
+
+def test_model_errors_fall_back_to_the_default_mood(monkeypatch):
+    monkeypatch.setattr(ed.engine, "emotion_batcher", _FakeModel(error=RuntimeError("model down")))
+    monkeypatch.setattr(ed.engine, "mood_cache", TTLCache())
+    assert ed.detect_mood("what should I watch") == ed.DEFAULT_MOOD
+    assert ed.detect_mood_batch(["what should I watch"]) == [ed.DEFAULT_MOOD]
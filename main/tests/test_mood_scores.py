@@ -0,0 +1,98 @@
+"""Precomputed per-mood similarity vectors vs the dense cosine matrix they replace."""
+
+import os
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.metrics.pairwise import cosine_similarity
+
+from backend.ai.emotion_detection import (
+    ArtifactBundle,
+    _centroid_sim_scores,
+    _mood_candidate_indices,
+    _submatrix_sim_scores,
+    mood_to_genres_map,
+)
+
+
+def _dense_reference(bundle, mood):
+    """The original per-request computation: mean of the candidates' cosine block."""
+    vectorizer = bundle.tfidf_vectorizer
+    cosine_sim_matrix = cosine_similarity(vectorizer.transform(bundle.movies_df["combined_features"].fillna("")))
+    candidate_indices = _mood_candidate_indices(bundle.genre_index, mood)
+    return candidate_indices, cosine_sim_matrix[np.ix_(candidate_indices, candidate_indices)].mean(axis=1)
+
+
+def test_mood_vectors_match_the_dense_cosine_matrix(bundle_dir):
+    bundle = ArtifactBundle(bundle_dir)
+    scores = bundle.mood_sim_scores
+
+    assert set(scores) == set(mood_to_genres_map)
+    for mood, (candidate_indices, sim_scores) in scores.items():
+        expected_indices, expected_scores = _dense_reference(bundle, mood)
+        np.testing.assert_array_equal(candidate_indices, expected_indices)
+        np.testing.assert_allclose(sim_scores, expected_scores, rtol=1e-9, atol=1e-12, err_msg=mood)
+
+
+def test_submatrix_reference_matches_the_centroid_shortcut(bundle_dir):
+    bundle = ArtifactBundle(bundle_dir)
+    features = bundle.tfidf_matrix
+    for mood in mood_to_genres_map:
+        candidate_indices = _mood_candidate_indices(bundle.genre_index, mood)
+        np.testing.assert_allclose(
+            _submatrix_sim_scores(features, candidate_indices, chunk_size=64),
+            _centroid_sim_scores(features, candidate_indices),
+            rtol=1e-9, atol=1e-12, err_msg=mood,
+        )
+
+
+def test_mood_vectors_are_cached_and_rebuilt_for_a_new_catalog(bundle_dir):
+    first = ArtifactBundle(bundle_dir).mood_sim_scores
+    cache_path = os.path.join(bundle_dir, "mood_sim_scores.npz")
+    assert os.path.exists(cache_path)
+
+    cached = ArtifactBundle(bundle_dir).mood_sim_scores
+    for mood in mood_to_genres_map:
+        np.testing.assert_array_equal(cached[mood][1], first[mood][1])
+
+    # A catalog of a different size invalidates the cache
+    movies_df = pd.read_csv(os.path.join(bundle_dir, "loaded_movies_df.csv"))
+    half = len(movies_df) // 2
+    movies_df.iloc[:half].to_csv(os.path.join(bundle_dir, "loaded_movies_df.csv"), index=False)
+    rebuilt = ArtifactBundle(bundle_dir).mood_sim_scores
+    for mood, (candidate_indices, sim_scores) in rebuilt.items():
+        assert candidate_indices.max() < half
+        assert len(sim_scores) == len(candidate_indices)
+
+
+def _assert_fresh(bundle_dir):
+    bundle = ArtifactBundle(bundle_dir)
+    for mood, (candidate_indices, sim_scores) in bundle.mood_sim_scores.items():
+        expected_indices, expected_scores = _dense_reference(bundle, mood)
+        np.testing.assert_array_equal(candidate_indices, expected_indices)
+        np.testing.assert_allclose(sim_scores, expected_scores, rtol=1e-9, atol=1e-12, err_msg=mood)
+
+
+def test_mood_vectors_are_rebuilt_for_an_edited_catalog_of_the_same_size(bundle_dir):
+    ArtifactBundle(bundle_dir).mood_sim_scores
+    csv_path = os.path.join(bundle_dir, "loaded_movies_df.csv")
+    movies_df = pd.read_csv(csv_path)
+    movies_df.iloc[::-1].to_csv(csv_path, index=False)
+    _assert_fresh(bundle_dir)
+
+
+def test_mood_vectors_are_rebuilt_for_a_retrained_vectorizer(bundle_dir):
+    ArtifactBundle(bundle_dir).mood_sim_scores
+    movies_df = pd.read_csv(os.path.join(bundle_dir, "loaded_movies_df.csv"))
+    vectorizer = TfidfVectorizer(max_features=40).fit(movies_df["combined_features"].fillna(""))
+    joblib.dump(vectorizer, os.path.join(bundle_dir, "tfidf_vectorizer.pkl"))
+    _assert_fresh(bundle_dir)
+
+
+def test_moods_without_matching_genres_fall_back_to_every_movie(bundle_dir, monkeypatch):
+    bundle = ArtifactBundle(bundle_dir)
+    monkeypatch.setitem(mood_to_genres_map, "happy", ["No Such Genre"])
+    candidate_indices = _mood_candidate_indices(bundle.genre_index, "happy")
+    np.testing.assert_array_equal(candidate_indices, np.arange(len(bundle.movies_df)))
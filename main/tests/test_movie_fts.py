@@ -0,0 +1,85 @@
+"""movie_fts triggers: title/description changes are indexed, other updates skip FTS."""
+
+import asyncio
+
+from sqlalchemy import text
+
+from backend.main import MOVIE_FTS_UPDATE_TRIGGER, create_db_and_tables
+
+
+def _execute(db_engine, *statements):
+    async def run():
+        results = []
+        async with db_engine.begin() as conn:
+            for sql, params in statements:
+                result = await conn.execute(text(sql), params)
+                results.append(result.all() if result.returns_rows else None)
+        return results
+    return asyncio.run(run())
+
+
+def _match(db_engine, query):
+    (rows,) = _execute(db_engine, ("SELECT rowid FROM movie_fts WHERE movie_fts MATCH :q ORDER BY rowid", {"q": query}))
+    return [rowid for rowid, in rows]
+
+
+def _insert_movie(db_engine, title, description=None):
+    (rows,) = _execute(db_engine, (
+        "INSERT INTO movie (title, description) VALUES (:title, :description) RETURNING id",
+        {"title": title, "description": description},
+    ))
+    return rows[0][0]
+
+
+def test_insert_and_delete_follow_the_movie_table(db_engine):
+    movie_id = _insert_movie(db_engine, "Spirited Away", "a girl in the spirit world")
+    assert _match(db_engine, "spirit*") == [movie_id]
+
+    _execute(db_engine, ("DELETE FROM movie WHERE id = :id", {"id": movie_id}))
+    assert _match(db_engine, "spirit*") == []
+
+
+def test_title_update_replaces_the_indexed_text(db_engine):
+    movie_id = _insert_movie(db_engine, "Working Title", "an overview")
+    _execute(db_engine, ("UPDATE movie SET title = 'Final Title' WHERE id = :id", {"id": movie_id}))
+
+    assert _match(db_engine, "working") == []
+    assert _match(db_engine, "final") == [movie_id]
+    (rows,) = _execute(db_engine, ("INSERT INTO movie_fts(movie_fts) VALUES ('integrity-check')", {}))
+    assert rows is None
+
+
+def test_updates_of_other_columns_do_not_touch_fts(db_engine):
+    movie_id = _insert_movie(db_engine, "Arrival", "linguist meets visitors")
+    # Drop the row from the index behind the trigger's back: if an update
+    # of another column fired movie_fts_au, it would be re-inserted
+    _execute(db_engine, (
+        "INSERT INTO movie_fts(movie_fts, rowid, title, description) VALUES ('delete', :id, 'Arrival', 'linguist meets visitors')",
+        {"id": movie_id},
+    ))
+    _execute(db_engine, ("UPDATE movie SET vector_id = 7, genres = 'Drama' WHERE id = :id", {"id": movie_id}))
+    assert _match(db_engine, "arrival") == []
+
+    # Put the row back so the index matches the table again
+    _execute(db_engine, (
+        "INSERT INTO movie_fts(rowid, title, description) VALUES (:id, 'Arrival', 'linguist meets visitors')",
+        {"id": movie_id},
+    ))
+    _execute(db_engine, ("UPDATE movie SET description = 'linguist meets heptapods' WHERE id = :id", {"id": movie_id}))
+    assert _match(db_engine, "heptapods") == [movie_id]
+
+
+def test_create_db_and_tables_migrates_the_old_update_trigger(db_engine):
+    _execute(
+        db_engine,
+        ("DROP TRIGGER movie_fts_au", {}),
+        ("CREATE TRIGGER movie_fts_au AFTER UPDATE ON movie BEGIN "
+         "INSERT INTO movie_fts(movie_fts, rowid, title, description) "
+         "VALUES ('delete', old.id, old.title, old.description); "
+         "INSERT INTO movie_fts(rowid, title, description) VALUES (new.id, new.title, new.description); END", {}),
+    )
+
+    asyncio.run(create_db_and_tables(db_engine))
+
+    (rows,) = _execute(db_engine, ("SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name = 'movie_fts_au'", {}))
+    assert rows == [(MOVIE_FTS_UPDATE_TRIGGER,)]
@@ -0,0 +1,71 @@
+"""Sparse top-K neighbor index vs the dense cosine matrix, and its rebuild on new inputs."""
+
+import os
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.metrics.pairwise import cosine_similarity
+
+from backend.ai.emotion_detection import ArtifactBundle
+from backend.ai.neighbor_index import build_neighbor_index, index_source_key, neighbors_of
+
+TOP_K = 10
+
+
+def _assert_exact_top_k(index, features, top_k):
+    dense = cosine_similarity(features)
+    np.fill_diagonal(dense, -np.inf)
+    for movie in range(0, dense.shape[0], 37):
+        cols, scores = neighbors_of(index, movie)
+        assert movie not in cols
+        expected = np.sort(dense[movie])[::-1][: len(scores)]
+        np.testing.assert_allclose(scores, expected, rtol=1e-5, atol=1e-6, err_msg=str(movie))
+        np.testing.assert_allclose(dense[movie, cols], scores, rtol=1e-5, atol=1e-6)
+        # Only zero similarities are dropped from a full row
+        if len(cols) < top_k:
+            assert np.sort(dense[movie])[::-1][len(cols)] <= 1e-6
+
+
+def test_index_holds_the_exact_top_k_neighbors(bundle_dir):
+    features = ArtifactBundle(bundle_dir).tfidf_matrix
+    index = build_neighbor_index(features, top_k=TOP_K, chunk_size=64)
+    assert index.shape == (features.shape[0], features.shape[0])
+    assert np.diff(index.indptr).max() == TOP_K
+    _assert_exact_top_k(index, features, TOP_K)
+
+
+def test_index_is_loaded_lazily_and_cached(bundle_dir):
+    assert "neighbor_index" not in ArtifactBundle.WARM_ARTIFACTS
+    bundle = ArtifactBundle(bundle_dir)
+    bundle.mood_sim_scores
+    path = os.path.join(bundle_dir, "neighbor_index.npz")
+    assert not os.path.exists(path)
+
+    index = bundle.neighbor_index
+    assert index_source_key(path) == bundle.source_key("catalog", "vectorizer")
+    cached = ArtifactBundle(bundle_dir).neighbor_index
+    np.testing.assert_array_equal(cached.indices, index.indices)
+
+
+def _assert_fresh(bundle_dir):
+    bundle = ArtifactBundle(bundle_dir)
+    index = bundle.neighbor_index
+    assert index_source_key(os.path.join(bundle_dir, "neighbor_index.npz")) == bundle.source_key("catalog", "vectorizer")
+    _assert_exact_top_k(index, bundle.tfidf_matrix, np.diff(index.indptr).max())
+
+
+def test_index_is_rebuilt_for_an_edited_catalog_of_the_same_size(bundle_dir):
+    ArtifactBundle(bundle_dir).neighbor_index
+    csv_path = os.path.join(bundle_dir, "loaded_movies_df.csv")
+    pd.read_csv(csv_path).iloc[::-1].to_csv(csv_path, index=False)
+    _assert_fresh(bundle_dir)
+
+
+def test_index_is_rebuilt_for_a_retrained_vectorizer(bundle_dir):
+    ArtifactBundle(bundle_dir).neighbor_index
+    movies_df = pd.read_csv(os.path.join(bundle_dir, "loaded_movies_df.csv"))
+    vectorizer = TfidfVectorizer(max_features=40).fit(movies_df["combined_features"].fillna(""))
+    joblib.dump(vectorizer, os.path.join(bundle_dir, "tfidf_vectorizer.pkl"))
+    _assert_fresh(bundle_dir)
@@ -0,0 +1,94 @@
+"""ONNX Runtime emotion backend vs the PyTorch pipeline it replaces.
+
+A tiny randomly initialized BERT classifier with the emotion model's labels
+stands in for distilroberta, so the export path runs without downloading
+anything.
+"""
+
+import numpy as np
+import pytest
+
+pytest.importorskip("torch")
+pytest.importorskip("onnx")
+pytest.importorskip("onnxruntime")
+transformers = pytest.importorskip("transformers")
+
+from backend.ai.onnx_backend import (
+    BENCH_TEXTS,
+    FP32_MODEL_FILE,
+    QUANTIZED_MODEL_FILE,
+    OnnxEmotionClassifier,
+    export_onnx,
+)
+
+LABELS = ["anger", "disgust", "fear", "joy", "neutral", "sadness", "surprise"]
+
+
+@pytest.fixture(scope="module")
+def tiny_model(tmp_path_factory):
+    """(model dir, ONNX export dir) of a small BERT emotion classifier."""
+    import torch
+    from transformers import BertConfig, BertForSequenceClassification, BertTokenizer
+
+    torch.manual_seed(0)
+    model_dir = tmp_path_factory.mktemp("tiny_model")
+    words = sorted({w.strip(".,!?'").lower() for text in BENCH_TEXTS for w in text.split()} - {""})
+    (model_dir / "vocab.txt").write_text("\n".join(["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"] + words), encoding="utf-8")
+    config = BertConfig(
+        vocab_size=len(words) + 5, hidden_size=64, num_hidden_layers=2, num_attention_heads=2,
+        intermediate_size=128, num_labels=len(LABELS),
+        id2label=dict(enumerate(LABELS)), label2id={label: i for i, label in enumerate(LABELS)},
+    )
+    BertForSequenceClassification(config).save_pretrained(model_dir)
+    BertTokenizer(str(model_dir / "vocab.txt")).save_pretrained(model_dir)
+
+    onnx_dir = tmp_path_factory.mktemp("tiny_onnx")
+    export_onnx(str(model_dir), str(onnx_dir), quantize=True)
+    return str(model_dir), str(onnx_dir)
+
+
+def _torch_proba(model_dir, texts, labels):
+    pipe = transformers.pipeline("text-classification", model=model_dir)
+    outputs = pipe(list(texts), truncation=True, top_k=None)
+    column = {label: i for i, label in enumerate(labels)}
+    scores = np.zeros((len(texts), len(labels)))
+    for row, ranked in enumerate(outputs):
+        for d in ranked:
+            scores[row, column[d["label"]]] = d["score"]
+    return scores
+
+
+def test_fp32_export_matches_torch(tiny_model):
+    model_dir, onnx_dir = tiny_model
+    classifier = OnnxEmotionClassifier(onnx_dir, FP32_MODEL_FILE)
+    assert classifier.labels == LABELS
+
+    torch_scores = _torch_proba(model_dir, BENCH_TEXTS, classifier.labels)
+    onnx_scores = classifier.predict_proba(BENCH_TEXTS, batch_size=4)
+    np.testing.assert_allclose(onnx_scores, torch_scores, atol=1e-4)
+    assert (onnx_scores.argmax(axis=1) == torch_scores.argmax(axis=1)).all()
+
+
+def test_int8_model_stays_close_to_torch(tiny_model):
+    model_dir, onnx_dir = tiny_model
+    classifier = OnnxEmotionClassifier(onnx_dir, QUANTIZED_MODEL_FILE, intra_op_threads=1)
+    torch_scores = _torch_proba(model_dir, BENCH_TEXTS, classifier.labels)
+    onnx_scores = classifier.predict_proba(BENCH_TEXTS)
+
+    assert onnx_scores.shape == torch_scores.shape
+    np.testing.assert_allclose(onnx_scores.sum(axis=1), 1.0)
+    assert np.abs(onnx_scores - torch_scores).max() < 0.05
+
+
+def test_outputs_follow_the_pipeline_shapes(tiny_model):
+    _, onnx_dir = tiny_model
+    classifier = OnnxEmotionClassifier(onnx_dir, FP32_MODEL_FILE)
+
+    single = classifier("I feel great today")
+    assert len(single) == 1 and set(single[0]) == {"label", "score"}
+    batch = classifier(["I feel great today", "this is scary"])
+    assert [set(d) for d in batch] == [{"label", "score"}] * 2
+    ranked = classifier("I feel great today", top_k=None)
+    assert sorted(d["label"] for d in ranked) == sorted(LABELS)
+    assert ranked[0] == single[0]
+    assert classifier.predict_proba([]).shape == (0, len(LABELS))
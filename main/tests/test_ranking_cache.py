@@ -0,0 +1,82 @@
+"""Ranking cache: hits within a context bucket, new keys per rating epoch and per bundle."""
+
+import numpy as np
+import pytest
+
+from backend.ai import emotion_detection as ed
+from backend.ai.cache import TTLCache
+from backend.ai.rating_store import RatingAggregates
+from personalization.context import UserContext
+
+EVENING = UserContext(hour=19, is_weekend=False, viewing_mode="solo")
+# Uncached ranking, for reference (the fixture counts calls of the patched one)
+rank_candidates = ed._rank_candidates
+
+
+@pytest.fixture
+def live(bundle_dir, tmp_path, monkeypatch):
+    """(bundle on a live rating store, list of computed rankings) routed through the engine."""
+    store = RatingAggregates(path=str(tmp_path / "aggregates.npz"), seed_path=str(tmp_path / "missing.csv"),
+                             refresh_seconds=0).load()
+    bundle = ed.ArtifactBundle(bundle_dir, ratings=store)
+    monkeypatch.setattr(ed.engine, "bundle", bundle)
+    monkeypatch.setattr(ed.engine, "ranking_cache", TTLCache())
+
+    computed = []
+
+    def counting(mood, ctx, *args, **kwargs):
+        computed.append((mood, ctx))
+        return rank_candidates(mood, ctx, *args, **kwargs)
+    monkeypatch.setattr(ed, "_rank_candidates", counting)
+    return bundle, computed
+
+
+def _ranking(bundle, mood="happy", ctx=EVENING):
+    return ed._cached_ranking(bundle, ed._live_ratings(bundle), mood, ctx, 10, 0.7, 0.3)
+
+
+def test_repeated_requests_in_one_context_bucket_hit_the_cache(live):
+    bundle, computed = live
+    first = _ranking(bundle)
+    # 20:00 is in the same (evening, solo, weekday) bucket as 19:00
+    assert _ranking(bundle, ctx=UserContext(hour=20, is_weekend=False, viewing_mode="solo")) is first
+    assert len(computed) == 1
+
+    _ranking(bundle, ctx=UserContext(hour=19, is_weekend=False, viewing_mode="group"))
+    _ranking(bundle, mood="sad")
+    assert len(computed) == 3
+    assert ed.engine.ranking_cache.stats()["hits"] == 1
+
+
+def test_a_new_rating_snapshot_invalidates_cached_rankings(live):
+    bundle, computed = live
+    movie_ids = bundle.catalog.columns["movieId"]
+    bundle.ratings.add_many([(int(m), 3.0) for m in movie_ids])
+    first = _ranking(bundle)
+
+    # Rate the first movie below the top 10 far above the rest
+    ranked = rank_candidates("happy", EVENING, 11, 0.7, 0.3, bundle=bundle, ratings=ed._live_ratings(bundle))
+    bundle.ratings.add_many([(int(movie_ids[ranked[10]]), 5.0)] * 500)
+
+    second = _ranking(bundle)
+    assert len(computed) == 2
+    assert ranked[10] in second and ranked[10] not in first
+    np.testing.assert_array_equal(
+        second, rank_candidates("happy", EVENING, 10, 0.7, 0.3, bundle=bundle, ratings=ed._live_ratings(bundle)))
+    assert _ranking(bundle) is second
+
+
+def test_a_new_bundle_does_not_reuse_cached_rankings(live, bundle_dir, monkeypatch):
+    bundle, computed = live
+    _ranking(bundle)
+    new_bundle = ed.ArtifactBundle(bundle_dir, ratings=bundle.ratings)
+    monkeypatch.setattr(ed.engine, "bundle", new_bundle)
+    _ranking(new_bundle)
+    assert len(computed) == 2
+
+    # Rankings of a bundle that does not serve are computed, not cached
+    other = ed.ArtifactBundle(bundle_dir, ratings=bundle.ratings)
+    _ranking(other)
+    _ranking(other)
+    assert len(computed) == 4
+    assert len(ed.engine.ranking_cache) == 2
@@ -0,0 +1,153 @@
+"""RatingAggregates: O(1) updates, shrunk means, snapshots and checkpoints."""
+
+import asyncio
+import os
+
+import numpy as np
+import pytest
+
+from backend.ai.rating_store import RatingAggregates
+
+
+def _store(tmp_path, **kwargs):
+    kwargs.setdefault("refresh_seconds", 0)
+    return RatingAggregates(path=str(tmp_path / "aggregates.npz"), seed_path=str(tmp_path / "missing.csv"), **kwargs)
+
+
+def test_snapshot_reflects_added_ratings(tmp_path):
+    store = _store(tmp_path, prior_weight=2).load()
+    store.add(10, 5.0)
+    store.add(10, 4.0)
+    store.add(20, 1.0)
+
+    snapshot = store.snapshot()
+    slots = store.slots_for([10, 20])
+    assert snapshot.count[slots].tolist() == [2, 1]
+    assert snapshot.mean[slots].tolist() == [4.5, 1.0]
+    assert snapshot.global_mean == pytest.approx(10 / 3)
+    # (prior_weight * global_mean + sum) / (prior_weight + count)
+    expected = [(2 * 10 / 3 + 9) / 4, (2 * 10 / 3 + 1) / 3]
+    assert snapshot.shrunk[slots] == pytest.approx(expected)
+
+
+def test_snapshots_are_immutable_and_republished_on_change(tmp_path):
+    store = _store(tmp_path).load()
+    store.add(1, 3.0)
+    first = store.snapshot()
+    assert store.snapshot() is first
+    with pytest.raises(ValueError):
+        first.shrunk[0] = 0
+
+    store.add(1, 5.0)
+    second = store.snapshot()
+    assert second.epoch > first.epoch
+    assert first.count[0] == 1 and second.count[0] == 2
+
+
+def test_snapshot_waits_for_the_refresh_interval(tmp_path):
+    store = _store(tmp_path, refresh_seconds=3600).load()
+    store.add(1, 3.0)
+    first = store.snapshot()
+    store.add(1, 5.0)
+    assert store.snapshot() is first
+
+
+def test_unknown_movies_get_empty_slots(tmp_path):
+    store = _store(tmp_path).load()
+    store.add(1, 4.0)
+    slots = store.slots_for([1, 99])
+    snapshot = store.snapshot()
+    assert snapshot.count[slots].tolist() == [1, 0]
+    assert np.isnan(snapshot.mean[slots[1]])
+    assert snapshot.shrunk[slots[1]] == pytest.approx(snapshot.global_mean)
+
+
+def test_checkpoint_round_trip_keeps_counts_and_watermark(tmp_path):
+    store = _store(tmp_path).load()
+    store.add_many([(1, 4.0), (2, 2.0), (1, 5.0)], watermark=42)
+    store.checkpoint()
+    assert os.listdir(tmp_path) == ["aggregates.npz"]  # no temp file left behind
+
+    restored = _store(tmp_path).load()
+    assert restored.watermark == 42
+    slots = restored.slots_for([1, 2])
+    assert restored.snapshot().count[slots].tolist() == [2, 1]
+    assert restored.stats()["ratings"] == 3
+
+
+def test_maybe_checkpoint_only_writes_unsaved_changes(tmp_path):
+    store = _store(tmp_path, checkpoint_seconds=0).load()
+    assert not store.maybe_checkpoint()
+    store.add(1, 4.0)
+    assert store.maybe_checkpoint()
+    assert not store.maybe_checkpoint()
+
+
+def test_seeds_from_the_ratings_csv(tmp_path):
+    seed = tmp_path / "ratings.csv"
+    seed.write_text("userId,movieId,rating,timestamp\n1,10,4.0,0\n2,10,2.0,0\n1,30,5.0,0\n", encoding="utf-8")
+    store = RatingAggregates(path=str(tmp_path / "aggregates.npz"), seed_path=str(seed)).load()
+    slots = store.slots_for([10, 30])
+    assert store.snapshot().mean[slots].tolist() == [3.0, 5.0]
+    assert store.stats()["unsaved"]
+
+
+def _seeded_store(tmp_path):
+    seed = tmp_path / "ratings.csv"
+    seed.write_text("userId,movieId,rating,timestamp\n1,10,4.0,0\n2,10,2.0,0\n", encoding="utf-8")
+    return RatingAggregates(path=str(tmp_path / "aggregates.npz"), seed_path=str(seed), refresh_seconds=0)
+
+
+def test_reset_to_seed_drops_checkpointed_ratings_and_keeps_slots(tmp_path):
+    store = _seeded_store(tmp_path).load()
+    store.add_many([(10, 5.0), (20, 1.0)], watermark=100)
+    store.checkpoint()
+
+    store = _seeded_store(tmp_path).load()
+    slots = store.slots_for([10, 20])
+    store.reset_to_seed()
+    assert store.watermark == 0
+    assert store.slots_for([10, 20]).tolist() == slots.tolist()
+    assert store.snapshot().count[slots].tolist() == [2, 0]
+    assert store.stats()["ratings"] == 2
+
+
+def _sync_against(tmp_path, db_engine, monkeypatch, checkpoint_watermark):
+    """Run start/stop_rating_sync with a checkpoint at the given watermark and two DB feedback rows."""
+    from sqlalchemy import insert
+    from sqlalchemy.ext.asyncio import async_sessionmaker
+    from sqlmodel.ext.asyncio.session import AsyncSession
+    from backend import main
+    from backend.main import Feedback, Movie
+
+    store = _seeded_store(tmp_path).load()
+    store.add_many([(10, 5.0), (10, 5.0), (10, 5.0)], watermark=checkpoint_watermark)
+    store.checkpoint()
+
+    store = _seeded_store(tmp_path)
+    monkeypatch.setattr(main.recommender_engine, "ratings", store)
+    monkeypatch.setattr(main, "async_session", async_sessionmaker(db_engine, class_=AsyncSession, expire_on_commit=False))
+
+    async def run():
+        async with db_engine.begin() as conn:
+            await conn.execute(insert(Movie).values(id=1, movielens_id=10, title="A"))
+            await conn.execute(insert(Feedback), [{"id": 1, "movie_id": 1, "rating": 5}, {"id": 2, "movie_id": 1, "rating": 3}])
+        await main.stop_rating_sync(await main.start_rating_sync())
+    asyncio.run(run())
+    return store
+
+
+def test_sync_rebuilds_from_the_seed_when_the_checkpoint_is_ahead_of_the_db(tmp_path, db_engine, monkeypatch):
+    store = _sync_against(tmp_path, db_engine, monkeypatch, checkpoint_watermark=50)
+    # Seed (4.0, 2.0) plus both feedback rows; the checkpoint's ratings are gone
+    assert store.watermark == 2
+    slot = store.slots_for([10])
+    assert store.snapshot().count[slot].tolist() == [4]
+    assert store.snapshot().mean[slot].tolist() == [3.5]
+
+
+def test_sync_continues_from_the_checkpoint_watermark(tmp_path, db_engine, monkeypatch):
+    store = _sync_against(tmp_path, db_engine, monkeypatch, checkpoint_watermark=1)
+    # Seed, the checkpointed ratings and feedback row 2 only
+    assert store.watermark == 2
+    assert store.snapshot().count[store.slots_for([10])].tolist() == [6]
@@ -0,0 +1,65 @@
+"""Streamed per-movie / per-user rating stats vs a pandas groupby of the same CSV."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from backend.ai.ratings_pipeline import read_stats, run, write_synthetic_ratings
+
+
+@pytest.fixture
+def ratings_csv(tmp_path):
+    """3000 MovieLens-shaped ratings plus rows the pipeline must skip."""
+    path = tmp_path / "ratings.csv"
+    write_synthetic_ratings(str(path), 3000, n_users=80, n_movies=150, chunk_size=1000)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write("-1,5,4.0,900000000\n3,-7,2.5,900000000\n4,9,,900000000\n")
+    return path
+
+
+def _expected(path, by):
+    frame = pd.read_csv(path)
+    frame = frame[(frame["userId"] >= 0) & (frame["movieId"] >= 0) & frame["rating"].notna()]
+    grouped = frame.groupby(by)
+    return pd.DataFrame({
+        "count": grouped["rating"].count(),
+        "sum": grouped["rating"].sum(),
+        "mean": grouped["rating"].mean(),
+        "std": grouped["rating"].std(ddof=0),
+        "first_ts": grouped["timestamp"].min(),
+        "last_ts": grouped["timestamp"].max(),
+    }).sort_index()
+
+
+def _assert_matches(stats, expected, id_name):
+    np.testing.assert_array_equal(stats[id_name], expected.index.to_numpy())
+    np.testing.assert_array_equal(stats["count"], expected["count"].to_numpy())
+    np.testing.assert_allclose(stats["sum"], expected["sum"].to_numpy(), rtol=1e-12)
+    np.testing.assert_allclose(stats["mean"], expected["mean"].to_numpy(), rtol=1e-6)
+    np.testing.assert_allclose(stats["std"], expected["std"].to_numpy(), rtol=1e-5, atol=1e-5)
+    np.testing.assert_array_equal(stats["first_ts"], expected["first_ts"].to_numpy())
+    np.testing.assert_array_equal(stats["last_ts"], expected["last_ts"].to_numpy())
+
+
+@pytest.mark.parametrize("chunk_size", [1, 97, 10_000])
+def test_streamed_stats_match_a_pandas_groupby(ratings_csv, tmp_path, chunk_size):
+    movie_path, user_path = tmp_path / "movies.npz", tmp_path / "users.npz"
+    report = run(str(ratings_csv), str(movie_path), str(user_path), chunk_size=chunk_size)
+
+    assert (report["rows"], report["skipped"]) == (3000, 3)
+    movies, users = read_stats(str(movie_path)), read_stats(str(user_path))
+    assert int(movies["rows"]) == int(users["rows"]) == 3000
+    _assert_matches(movies, _expected(ratings_csv, "movieId"), "movie_id")
+    _assert_matches(users, _expected(ratings_csv, "userId"), "user_id")
+
+
+def test_a_directory_of_files_gives_the_same_stats(ratings_csv, tmp_path):
+    frame = pd.read_csv(ratings_csv)
+    parts = tmp_path / "parts"
+    parts.mkdir()
+    frame.iloc[:1200].to_csv(parts / "a.csv", index=False)
+    frame.iloc[1200:].to_csv(parts / "b.csv.gz", index=False)
+
+    run(str(parts), str(tmp_path / "movies.npz"), str(tmp_path / "users.npz"), chunk_size=500)
+    _assert_matches(read_stats(str(tmp_path / "movies.npz")), _expected(ratings_csv, "movieId"), "movie_id")
+    _assert_matches(read_stats(str(tmp_path / "users.npz")), _expected(ratings_csv, "userId"), "user_id")
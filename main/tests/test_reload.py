@@ -0,0 +1,91 @@
+"""Hot reload: the new bundle is swapped in whole, a failed reload keeps the old one serving."""
+
+import shutil
+
+import pandas as pd
+import pytest
+
+from backend.ai import emotion_detection as ed
+
+
+def _fake_pipeline(texts, **kwargs):
+    return [[{"label": "joy", "score": 0.9}, {"label": "neutral", "score": 0.1}] for _ in texts]
+
+
+@pytest.fixture
+def bundles(bundle_dir, tmp_path_factory, monkeypatch):
+    """An engine serving bundle_dir, with versions "v2" (fewer movies) and "broken" to reload."""
+    bundles_dir = tmp_path_factory.mktemp("bundles")
+    shutil.copytree(bundle_dir, bundles_dir / "v2")
+    csv_path = bundles_dir / "v2" / "loaded_movies_df.csv"
+    pd.read_csv(csv_path).iloc[:300].to_csv(csv_path, index=False)
+    shutil.copytree(bundle_dir, bundles_dir / "broken")
+    (bundles_dir / "broken" / "tfidf_vectorizer.pkl").write_bytes(b"not a pickle")
+
+    monkeypatch.setattr(ed, "BUNDLES_DIR", str(bundles_dir))
+    monkeypatch.setattr(ed.ArtifactBundle, "_load_emotion_pipeline", lambda self: _fake_pipeline)
+    engine = ed.RecommenderEngine(bundle_dir)
+    monkeypatch.setattr(ed, "engine", engine)
+    engine.warm_up(background=False)
+    assert engine.ready
+    return engine
+
+
+def test_reload_swaps_in_a_fully_loaded_bundle(bundles, monkeypatch):
+    engine = bundles
+    old = engine.bundle
+    seen_while_validating = []
+    smoke_test = ed.smoke_test
+
+    def checking_smoke_test(bundle):
+        # Until the swap, requests are served by the old bundle
+        seen_while_validating.append(engine.bundle)
+        assert len(ed.recommend("happy", top_n=3)) == 3
+        return smoke_test(bundle)
+    monkeypatch.setattr(ed, "smoke_test", checking_smoke_test)
+
+    ed.recommend("happy")
+    assert len(engine.ranking_cache) > 0
+    job = engine.reload("v2", background=False)
+
+    assert job.status == "succeeded", job.error
+    assert seen_while_validating == [old]
+    new = engine.bundle
+    assert new is not old and new.version == job.version and job.previous_version == old.version
+    assert new.ready and len(new.movies_df) == 300
+    # The emotion model is shared, cached rankings of the old bundle are dropped
+    assert new.emotion_pipeline is old.emotion_pipeline
+    assert len(engine.ranking_cache) == 0
+    assert all(r["title"] in set(new.movies_df["title"]) for r in ed.recommend("happy", top_n=5))
+    # A request that still holds the old bundle finishes on it
+    assert len(old.mood_sim_scores["happy"][0]) > 0 and old.ready
+
+
+@pytest.mark.parametrize("version, error", [
+    ("broken", ""),  # whatever joblib raises for a corrupt pickle
+    ("missing", "FileNotFoundError"),
+    ("../v2", "ValueError"),
+])
+def test_a_failed_reload_keeps_the_old_bundle_serving(bundles, version, error):
+    engine = bundles
+    old = engine.bundle
+    before = [r["title"] for r in ed.recommend("sad", top_n=5)]
+
+    job = engine.reload(version, background=False)
+    assert job.status == "failed" and job.error.startswith(error), job.error
+    assert engine.bundle is old and engine.ready
+    assert engine.status()["last_reload"]["status"] == "failed"
+    assert [r["title"] for r in ed.recommend("sad", top_n=5)] == before
+
+
+def test_a_failed_smoke_test_keeps_the_old_bundle(bundles, monkeypatch):
+    engine = bundles
+    old = engine.bundle
+
+    def failing_smoke_test(bundle):
+        raise RuntimeError("Emotion model returned no scores")
+    monkeypatch.setattr(ed, "smoke_test", failing_smoke_test)
+
+    job = engine.reload("v2", background=False)
+    assert job.status == "failed" and "no scores" in job.error
+    assert engine.bundle is old
@@ -0,0 +1,67 @@
+"""ClusterPool draws and surprise_me picks: cluster exclusion, coverage and seeding."""
+
+from collections import Counter
+
+import numpy as np
+import pytest
+
+from backend.ai import emotion_detection as ed
+from backend.ai.surprise import ClusterPool
+
+# Candidate row → vibe cluster
+CANDIDATES = np.array([40, 11, 25, 7, 33, 18, 2, 29, 14])
+CLUSTERS = np.array([3, 1, 3, 0, 1, 3, 0, 2, 1])
+
+
+@pytest.fixture
+def pool():
+    return ClusterPool(CANDIDATES, CLUSTERS)
+
+
+def test_partitions_hold_each_clusters_candidates(pool):
+    assert len(pool) == len(CANDIDATES)
+    for cluster in np.unique(CLUSTERS):
+        assert pool.partition(cluster).tolist() == CANDIDATES[CLUSTERS == cluster].tolist()
+    assert pool.partition(9).tolist() == []
+
+
+@pytest.mark.parametrize("exclude", [set(), {3}, {0, 1}, {0, 1, 3}])
+def test_draws_cover_the_allowed_clusters_uniformly(pool, exclude):
+    allowed = CANDIDATES[~np.isin(CLUSTERS, list(exclude))]
+    rng = np.random.default_rng(0)
+    picks = Counter(pool.draw(rng, exclude=exclude) for _ in range(4000))
+    assert set(picks) == set(allowed.tolist())
+    expected = 4000 / len(allowed)
+    assert all(abs(n - expected) < 0.2 * expected for n in picks.values())
+
+
+def test_excluding_every_cluster_draws_from_all_candidates(pool):
+    rng = np.random.default_rng(1)
+    picks = {pool.draw(rng, exclude={0, 1, 2, 3}) for _ in range(500)}
+    assert picks == set(CANDIDATES.tolist())
+
+
+def test_seeded_draws_are_reproducible(pool):
+    def picks(seed):
+        rng = np.random.default_rng(seed)
+        return [pool.draw(rng, exclude={1}) for _ in range(50)]
+    assert picks(7) == picks(7)
+    assert picks(7) != picks(8)
+
+
+def test_surprise_me_picks_outside_the_top_clusters_and_is_reproducible(bundle_dir, monkeypatch):
+    bundle = ed.ArtifactBundle(bundle_dir)
+    monkeypatch.setattr(ed.engine, "bundle", bundle)
+    clusters = bundle.result_columns["vibe_cluster"]
+    titles = bundle.result_columns["title"]
+
+    for mood in ("happy", "scary"):
+        top_indices = ed._cached_ranking(bundle, None, mood, ed.build_context("solo"), 5, 0.7, 0.3)
+        top_clusters = set(clusters[top_indices].tolist())
+        candidates = bundle.surprise_pools[mood].indices
+        allowed = {titles[i] for i in candidates if clusters[i] not in top_clusters}
+
+        # The explanation wording varies; the pick itself follows the seed
+        picks = [ed.surprise_me(mood, seed=seed)["title"] for seed in range(20)]
+        assert picks == [ed.surprise_me(mood, seed=seed)["title"] for seed in range(20)]
+        assert set(picks) <= allowed and len(set(picks)) > 1
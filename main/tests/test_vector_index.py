@@ -0,0 +1,103 @@
+"""IVF search vs brute force, and publishing index versions under an embeddings root."""
+
+import os
+
+import numpy as np
+import pytest
+
+from backend.ai.vector_index import (
+    CURRENT_FILE,
+    META_FILE,
+    VECTORS_FILE,
+    IvfIndex,
+    current_index_dir,
+    exact_search,
+    publish_index,
+    synthetic_vectors,
+)
+
+
+@pytest.fixture(scope="module")
+def vectors():
+    return synthetic_vectors(4000, 32, n_topics=60, seed=0)
+
+
+def _queries(vectors, n=40, seed=1):
+    rng = np.random.default_rng(seed)
+    queries = vectors[rng.choice(len(vectors), n, replace=False)] + 0.1 * rng.standard_normal((n, vectors.shape[1]))
+    return (queries / np.linalg.norm(queries, axis=1, keepdims=True)).astype(np.float32)
+
+
+def _recall(ivf, vectors, queries, k, nprobe):
+    hits = 0
+    for query in queries:
+        expected, _ = exact_search(vectors, query, k)
+        found, _ = ivf.search(vectors, query, k, nprobe=nprobe)
+        hits += len(set(expected.tolist()) & set(found.tolist()))
+    return hits / (k * len(queries))
+
+
+def test_exact_search_is_the_brute_force_top_k(vectors):
+    query = _queries(vectors, n=1)[0]
+    ids, scores = exact_search(vectors, query, k=10, chunk_size=333)
+    expected = np.argsort(-(vectors @ query), kind="stable")[:10]
+    np.testing.assert_array_equal(ids, expected)
+    np.testing.assert_allclose(scores, vectors[expected] @ query, rtol=1e-6)
+
+
+def test_ivf_recall_against_brute_force(vectors):
+    ivf = IvfIndex.build(vectors, n_lists=64, seed=0)
+    assert ivf.offsets[-1] == len(vectors) and sorted(ivf.ids.tolist()) == list(range(len(vectors)))
+    queries = _queries(vectors)
+
+    # Probing every list is an exact search
+    assert _recall(ivf, vectors, queries, k=10, nprobe=ivf.n_lists) == 1.0
+    recalls = [_recall(ivf, vectors, queries, k=10, nprobe=nprobe) for nprobe in (1, 8, 32)]
+    assert recalls == sorted(recalls)
+    assert recalls[1] >= 0.9
+
+
+def test_ivf_round_trips_through_save(vectors, tmp_path):
+    ivf = IvfIndex.build(vectors, n_lists=16, seed=0)
+    ivf.save(str(tmp_path / "ivf.npz"))
+    loaded = IvfIndex.load(str(tmp_path / "ivf.npz"))
+    query = _queries(vectors, n=1)[0]
+    for a, b in zip(ivf.search(vectors, query, 5, nprobe=4), loaded.search(vectors, query, 5, nprobe=4)):
+        np.testing.assert_array_equal(a, b)
+
+
+def _version(root, name):
+    path = root / name
+    path.mkdir()
+    (path / META_FILE).write_text("{}", encoding="utf-8")
+    return str(path)
+
+
+def test_publish_switches_current_and_prunes_old_versions(tmp_path):
+    root = tmp_path / "embeddings"
+    root.mkdir()
+    # Files of the layout before versioned publishing
+    (root / META_FILE).write_text("{}", encoding="utf-8")
+    (root / VECTORS_FILE).write_bytes(b"")
+    assert current_index_dir(str(root)) == str(root)
+
+    names = ["20260101-000000-aaaaaa", "20260102-000000-bbbbbb", "20260103-000000-cccccc"]
+    for name in names:
+        publish_index(str(root), _version(root, name), keep=2)
+        assert current_index_dir(str(root)) == str(root / name)
+        assert (root / CURRENT_FILE).read_text(encoding="utf-8") == name
+
+    # The two newest versions stay; legacy files and temp pointers are gone
+    assert set(os.listdir(root)) == {CURRENT_FILE, *names[1:]}
+
+
+def test_publishing_an_older_version_never_prunes_it(tmp_path):
+    root = tmp_path / "embeddings"
+    root.mkdir()
+    old = _version(root, "20260101-000000-aaaaaa")
+    for name in ("20260102-000000-bbbbbb", "20260103-000000-cccccc"):
+        _version(root, name)
+
+    publish_index(str(root), old, keep=1)
+    assert current_index_dir(str(root)) == old
+    assert set(os.listdir(root)) == {CURRENT_FILE, "20260101-000000-aaaaaa", "20260103-000000-cccccc"}